@@ -0,0 +1,119 @@
+import os
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+REGISTRY_PATH = os.path.join(ROOT, "agent_platform/injection/api_registry.json")
+
+
+class ComponentRegistry:
+    """
+    进程级组件注册表：
+    - LLMRouter / Executor / Evaluator 在每个 worker 内只创建一次，复用其中的 HTTP 客户端与连接池
+    - 首次使用时才创建（gunicorn fork 之后），避免在父进程里建立连接
+    - API 注册表文件 mtime 变化时，已创建的路由器与 Executor（接口方法表）原地热加载，无需重启
+    """
+
+    def __init__(self, registry_path: str = REGISTRY_PATH, router_kwargs=None, executor_kwargs=None,
+                 evaluator_kwargs=None):
+        self.registry_path = registry_path
+        self.router_kwargs = router_kwargs or {}
+        self.executor_kwargs = executor_kwargs or {}
+        self.evaluator_kwargs = evaluator_kwargs or {}
+        self._lock = threading.Lock()
+        self._router = None
+        self._executor = None
+        self._evaluator = None
+        self._registry_mtime = None
+
+    def _mtime(self):
+        try:
+            return os.stat(self.registry_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _create_router(self):
+        """ROUTER_MODE=cascade 时按 ROUTER_TIERS 依次路由，置信度不足才交给下一层；否则直接使用 LLMRouter"""
+        from agent_platform.utils.config import Config
+        if Config.ROUTER_MODE != "cascade":
+            from agent_platform.router.llm_router import LLMRouter
+            return LLMRouter(registry_path=self.registry_path, **self.router_kwargs)
+        from agent_platform.router.cascading_router import CascadingRouter
+        tiers = [self._create_tier(name.strip()) for name in Config.ROUTER_TIERS.split(",") if name.strip()]
+        return CascadingRouter(tiers)
+
+    def _create_tier(self, name: str):
+        if name == "basic":
+            from agent_platform.router.basic_router import BasicRouter
+            return BasicRouter()
+        if name == "knn":
+            from agent_platform.router.knn_router import KNNRouter
+            return KNNRouter(registry_path=self.registry_path)
+        if name == "llm":
+            from agent_platform.router.llm_router import LLMRouter
+            return LLMRouter(registry_path=self.registry_path, **self.router_kwargs)
+        raise ValueError(f"未知的路由层: {name}（可用 basic / knn / llm）")
+
+    def router_stats(self):
+        """级联路由各层的处理占比；路由器尚未创建或不是级联路由时为 None"""
+        router = self._router
+        return router.stats() if router is not None and hasattr(router, "stats") else None
+
+    def _check_registry(self):
+        """注册表文件 mtime 变化时，已创建的路由器与 Executor 一起热加载"""
+        mtime = self._mtime()
+        if mtime is None or mtime == self._registry_mtime:
+            return
+        with self._lock:
+            if mtime == self._registry_mtime:
+                return
+            for component in (self._router, self._executor):
+                if component is not None:
+                    component.reload_registry()
+            self._registry_mtime = mtime
+            print(f"[Components] API 注册表已热加载: {self.registry_path}")
+
+    def _created(self):
+        # 持有 self._lock 时调用：第一个依赖注册表的组件创建时记下当时的 mtime
+        if self._registry_mtime is None:
+            self._registry_mtime = self._mtime()
+
+    def router(self):
+        router = self._router
+        if router is None:
+            with self._lock:
+                if self._router is None:
+                    self._created()
+                    self._router = self._create_router()
+                router = self._router
+        else:
+            self._check_registry()
+        return router
+
+    def executor(self):
+        executor = self._executor
+        if executor is None:
+            with self._lock:
+                if self._executor is None:
+                    from agent_platform.core.executor import Executor
+                    self._created()
+                    self._executor = Executor(**{"registry_path": self.registry_path, **self.executor_kwargs})
+                executor = self._executor
+        else:
+            self._check_registry()
+        return executor
+
+    def evaluator(self):
+        if self._evaluator is None:
+            with self._lock:
+                if self._evaluator is None:
+                    from agent_platform.core.evaluator import Evaluator
+                    self._evaluator = Evaluator(**self.evaluator_kwargs)
+        return self._evaluator
+
+    def reset(self):
+        """丢弃已创建的组件，下次使用时重新创建"""
+        with self._lock:
+            self._router = None
+            self._executor = None
+            self._evaluator = None
+            self._registry_mtime = None
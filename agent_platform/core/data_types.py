@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 
 @dataclass
@@ -12,11 +12,23 @@ class RoutePlan:
     params: Dict[str, Any]
     reason: str
 
+@dataclass
+class RouteDecision:
+    api: str
+    # 0~1，级联路由据此决定是否交给下一层
+    confidence: float
+    tier: str = ""
+    reason: str = ""
+    # 备选 API 及分数（按分数降序），没有时为 None
+    candidates: Optional[List[Tuple[str, float]]] = None
+
 @dataclass
 class ExecutionTrace:
     request: Dict[str, Any]
     response: Dict[str, Any]
     latency_ms: float
+    # 耗时拆分：connect_ms / ttfb_ms / total_ms / retries
+    timing: Optional[Dict[str, float]] = None
 
 @dataclass
 class EvalRecord:
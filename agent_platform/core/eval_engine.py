@@ -0,0 +1,138 @@
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from agent_platform.utils.config import Config
+
+
+def parse_provider_limits(spec: str) -> Dict[str, int]:
+    """解析 "moonshot=4,hr_api=8" 形式的并发上限配置"""
+    limits = {}
+    for item in (spec or "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+def case_error(case: Dict, idx: int, error_msg: str) -> Dict:
+    """用例执行失败 / 超时时的结果结构，与 Evaluator.evaluate 的输出字段一致"""
+    # 截断过长的错误信息
+    if len(error_msg) > 500:
+        error_msg = error_msg[:500] + "..."
+    return {
+        "id": case.get("id", f"case_{idx}"),
+        "query": case.get("query", "") or "",
+        "expected": case.get("expected_api", ""),
+        "predicted": "",
+        "error": error_msg,
+        "pass": False
+    }
+
+
+class EvaluationEngine:
+    """
+    并发评估引擎（CLI 与 /eval 接口共用）：
+    - 线程池并发执行用例，max_workers 控制总并发
+    - 按 provider 限流：run_case 内用 `with engine.limit("moonshot"):` 包住外部调用
+    - 单条用例超时后记为失败结果（Python 线程无法强制终止，超时线程会在后台自行结束）
+    - 所有工作线程都被超时用例占住、且再等一个超时时间仍没有线程空出来时，尚未开始的用例全部记为超时，
+      避免排队的用例永远得不到执行、run() 无法返回
+    - 结果与回调都严格按输入顺序输出，与并发度无关
+    """
+
+    def __init__(self, max_workers: int = Config.EVAL_CONCURRENCY,
+                 provider_limits: Optional[Dict[str, int]] = None,
+                 case_timeout: Optional[float] = Config.EVAL_CASE_TIMEOUT,
+                 make_error: Callable[[Dict, int, str], Dict] = case_error):
+        self.max_workers = max(1, max_workers)
+        self.case_timeout = case_timeout if case_timeout and case_timeout > 0 else None
+        self.make_error = make_error
+        if provider_limits is None:
+            provider_limits = parse_provider_limits(Config.EVAL_PROVIDER_LIMITS)
+        self._semaphores = {name: threading.BoundedSemaphore(n) for name, n in provider_limits.items() if n > 0}
+
+    @contextmanager
+    def limit(self, provider: str):
+        """占用 provider 的一个并发名额；未配置上限的 provider 不限流"""
+        sem = self._semaphores.get(provider)
+        if sem is None:
+            yield
+            return
+        with sem:
+            yield
+
+    def run(self, cases: List[Dict], run_case: Callable[[Dict, int], Dict],
+            on_result: Optional[Callable[[Dict], Any]] = None,
+            should_stop: Optional[Callable[[], bool]] = None,
+            make_error: Optional[Callable[[Dict, int, str], Dict]] = None) -> List[Dict]:
+        """
+        并发执行 run_case(case, idx)（idx 从 1 开始），返回按输入顺序排列的结果；
+        on_result 按输入顺序逐条回调；should_stop 返回 True 时不再启动新用例并返回已完成的前缀；
+        make_error 可覆盖本次运行中失败 / 超时用例的结果结构
+        """
+        if not cases:
+            return []
+        make_error = make_error or self.make_error
+
+        started: Dict[int, float] = {}
+
+        def task(i: int, case: Dict):
+            if should_stop and should_stop():
+                return None  # 已停止：排队中的用例不再开始
+            started[i] = time.monotonic()
+            return run_case(case, i + 1)
+
+        results: List[Optional[Dict]] = [None] * len(cases)
+        emitted = 0
+        n_workers = min(self.max_workers, len(cases))
+        pool = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="eval-case")
+        try:
+            futures = {pool.submit(task, i, case): i for i, case in enumerate(cases)}
+            pending = set(futures)
+            poll = min(self.case_timeout, 0.5) if self.case_timeout else None
+            hung = set()  # 已判超时但线程仍在运行的用例
+            stalled_since = None
+            while pending:
+                if should_stop and should_stop():
+                    break
+                done, pending = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+                for f in done:
+                    i = futures[f]
+                    try:
+                        results[i] = f.result()
+                    except Exception as e:
+                        results[i] = make_error(cases[i], i + 1, str(e))
+                if self.case_timeout:
+                    now = time.monotonic()
+                    for f in list(pending):
+                        i = futures[f]
+                        if i in started and now - started[i] > self.case_timeout:
+                            results[i] = make_error(
+                                cases[i], i + 1, f"用例执行超时（>{self.case_timeout:g}s）"
+                            )
+                            pending.discard(f)
+                            hung.add(f)
+                    hung = {f for f in hung if not f.done()}
+                    if len(hung) < n_workers:
+                        stalled_since = None
+                    elif stalled_since is None:
+                        stalled_since = now
+                    elif now - stalled_since > self.case_timeout:
+                        for f in list(pending):
+                            i = futures[f]
+                            results[i] = make_error(
+                                cases[i], i + 1,
+                                f"用例执行超时（>{self.case_timeout:g}s，工作线程均被超时用例占用，未能开始执行）"
+                            )
+                            pending.discard(f)
+                # 按输入顺序释放连续完成的前缀
+                while emitted < len(results) and results[emitted] is not None:
+                    if on_result:
+                        on_result(results[emitted])
+                    emitted += 1
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return results[:emitted]
@@ -1,17 +1,118 @@
-import requests, time
+import os, json, threading, asyncio
+import time
+from urllib.parse import urlsplit, parse_qsl
+from agent_platform.core.data_types import ExecutionTrace
+from agent_platform.core.http_client import PooledHTTPClient
 from agent_platform.utils.langfuse_client import LangfuseClient
 
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+REGISTRY_PATH = os.path.join(ROOT, "agent_platform/injection/api_registry.json")
+
+
 class Executor:
-    def __init__(self, base_url="http://127.0.0.1:8000"):
+    """
+    路由结果执行器，两种后端：
+    - http：通过 HTTP 请求 base_url 上的服务
+    - inprocess：直接在当前进程内把请求分发给 Flask app（不走网络、不占用额外 worker）
+    两种后端都按接口实际支持的 HTTP 方法发送：GET 参数放在 query string，POST 参数放在 JSON body
+    http 后端使用 PooledHTTPClient：keep-alive 连接池、connect/read 超时、抖动退避重试
+    """
+
+    BACKENDS = ("http", "inprocess")
+
+    def __init__(self, base_url="http://127.0.0.1:8000", backend="http", app=None, registry_path=REGISTRY_PATH,
+                 http_client: PooledHTTPClient = None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"未知的 Executor 后端: {backend}，可选: {', '.join(self.BACKENDS)}")
+        if backend == "inprocess" and app is None:
+            raise ValueError("inprocess 后端需要传入 Flask app")
         self.base_url = base_url
+        self.backend = backend
+        self.app = app
+        self.registry_path = registry_path
         self.langfuse = LangfuseClient()
+        self._local = threading.local()
+        self.methods = self._load_methods(registry_path)
+        self.http = http_client or (PooledHTTPClient() if backend == "http" else None)
+
+    def _load_methods(self, registry_path):
+        """接口路径 -> HTTP 方法；inprocess 以 app 的路由表为准，http 以 API 注册表为准"""
+        methods = {}
+        if self.app is not None:
+            for rule in self.app.url_map.iter_rules():
+                allowed = sorted((rule.methods or set()) - {"HEAD", "OPTIONS"})
+                if allowed:
+                    methods[rule.rule] = "GET" if "GET" in allowed else allowed[0]
+            return methods
+        try:
+            with open(registry_path, "r", encoding="utf-8") as f:
+                for api in json.load(f):
+                    methods[api["api"]] = api.get("method", "GET").upper()
+        except (OSError, ValueError) as e:
+            print(f"[Executor] 读取 API 注册表失败，默认使用 GET: {e}")
+        return methods
+
+    def reload_registry(self):
+        """重新生成接口方法表（整体替换）；API 注册表或 app 路由变化后调用"""
+        self.methods = self._load_methods(self.registry_path)
+
+    def _client(self):
+        # Flask test client 不是线程安全的，每个线程各用一个
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client
 
-    def execute(self, case_id, query, route_plan):
+    def _request(self, route_plan, params=None):
+        parts = urlsplit(route_plan)
+        path = parts.path
+        params = {**dict(parse_qsl(parts.query)), **(params or {})}
+        method = self.methods.get(path, "GET")
+        kwargs = {"query_string" if self.backend == "inprocess" else "params": params} if method == "GET" \
+            else {"json": params}
+        return method, path, kwargs
+
+    def execute_trace(self, case_id, query, route_plan, params=None) -> ExecutionTrace:
+        """执行一次调用，返回包含请求、响应与耗时拆分（connect / ttfb / total）的 ExecutionTrace"""
         trace = self.langfuse.trace_start(name=f"case_{case_id}", input_data=query)
-        start = time.time()
-        url = f"{self.base_url}{route_plan}"
-        resp = requests.get(url).json()
-        latency = (time.time() - start) * 1000
-        self.langfuse.log(trace, "api_call", {"url": url, "response": resp})
+        method, path, kwargs = self._request(route_plan, params)
+        if self.backend == "inprocess":
+            url = path
+            start = time.perf_counter()
+            resp = self._client().open(path, method=method, **kwargs).get_json()
+            total = (time.perf_counter() - start) * 1000
+            timing = {"connect_ms": 0.0, "ttfb_ms": round(total, 3), "total_ms": round(total, 3), "retries": 0}
+        else:
+            url = f"{self.base_url}{path}"
+            http_resp, timing = self.http.request(method, url, **kwargs)
+            resp = http_resp.json()
+        self.langfuse.log(trace, "api_call", {"url": url, "method": method, "backend": self.backend,
+                                              "timing": timing, "response": resp})
         self.langfuse.end(trace)
-        return resp, latency
+        return ExecutionTrace(
+            request={"method": method, "url": url, **kwargs},
+            response=resp,
+            latency_ms=timing["total_ms"],
+            timing=timing
+        )
+
+    def execute(self, case_id, query, route_plan, params=None):
+        result = self.execute_trace(case_id, query, route_plan, params)
+        return result.response, result.latency_ms
+
+    async def execute_async(self, case_id, query, route_plan, params=None) -> ExecutionTrace:
+        """异步版本：在线程池中执行，共享同一个连接池"""
+        return await asyncio.to_thread(self.execute_trace, case_id, query, route_plan, params)
+
+    async def execute_many_async(self, calls, concurrency: int = 8):
+        """
+        并发执行多次调用，calls 为 (case_id, query, route_plan[, params]) 序列；
+        结果按输入顺序返回，单次失败时对应位置为异常对象
+        """
+        sem = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(call):
+            async with sem:
+                return await self.execute_async(*call)
+
+        return await asyncio.gather(*(run(c) for c in calls), return_exceptions=True)
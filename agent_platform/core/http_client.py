@@ -0,0 +1,132 @@
+import time
+import random
+import threading
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from agent_platform.utils.config import Config
+
+# 当前线程上一次请求中建连耗时（ms）；复用 keep-alive 连接时为 0
+_timing = threading.local()
+
+
+def _record_connect(start: float):
+    _timing.connect_ms = getattr(_timing, "connect_ms", 0.0) + (time.perf_counter() - start) * 1000
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """连接池使用可计时的连接类，用于统计建连耗时"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class PooledHTTPClient:
+    """
+    带连接池的 HTTP 客户端：
+    - 一个 Session + keep-alive 连接池，跨请求、跨线程复用 TCP 连接
+    - connect / read 两段超时，挂起的接口不会卡住整轮评估
+    - 有限次重试 + 抖动指数退避：幂等方法遇到连接错误、超时、502/503/504 时重试；非幂等方法只在请求确定未发出时重试
+    - 每次请求返回耗时拆分：connect_ms / ttfb_ms 为最后一次尝试的建连与首字节耗时，
+      total_ms 为整次调用的耗时（含此前失败的尝试与退避等待），retries 为重试次数
+    """
+
+    RETRY_STATUS = (502, 503, 504)
+    IDEMPOTENT = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+    def __init__(self, connect_timeout: float = Config.EXECUTOR_CONNECT_TIMEOUT,
+                 read_timeout: float = Config.EXECUTOR_READ_TIMEOUT,
+                 max_retries: int = Config.EXECUTOR_MAX_RETRIES,
+                 backoff: float = Config.EXECUTOR_BACKOFF,
+                 pool_size: int = max(10, Config.EVAL_CONCURRENCY)):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = _TimedAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _sleep_before_retry(self, attempt: int):
+        # full jitter：在 [0, backoff * 2^attempt] 内随机等待，避免重试请求同时打到服务端
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def _safe_to_retry(self, method: str, exc: Exception) -> bool:
+        if method in self.IDEMPOTENT:
+            return True
+        # 非幂等请求只在确定没有发出时重试：建连超时 / 建连被拒
+        if isinstance(exc, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(exc.args[0], "reason", None) if exc.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def request(self, method: str, url: str, **kwargs) -> Tuple[requests.Response, Dict[str, float]]:
+        """发送请求并读完响应体，返回 (response, timing)"""
+        method = method.upper()
+        attempt = 0
+        call_start = time.perf_counter()
+        while True:
+            _timing.connect_ms = 0.0
+            start = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, timeout=self.timeout, stream=True, **kwargs)
+                ttfb = time.perf_counter()
+                resp.content  # 读完响应体，连接归还连接池
+                end = time.perf_counter()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries or not self._safe_to_retry(method, e):
+                    raise
+                self._sleep_before_retry(attempt)
+                attempt += 1
+                continue
+
+            if resp.status_code in self.RETRY_STATUS and method in self.IDEMPOTENT and attempt < self.max_retries:
+                self._sleep_before_retry(attempt)
+                attempt += 1
+                continue
+
+            timing = {
+                "connect_ms": round(_timing.connect_ms, 3),
+                "ttfb_ms": round((ttfb - start) * 1000, 3),
+                "total_ms": round((end - call_start) * 1000, 3),
+                "retries": attempt,
+            }
+            return resp, timing
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,167 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from agent_platform.core.eval_engine import EvaluationEngine
+
+
+class EvalJob:
+    """
+    后台评估任务：
+    - results 按用例顺序追加，可随时读取部分结果
+    - 状态：queued -> running -> succeeded / failed / cancelled
+    """
+
+    FINISHED = ("succeeded", "failed", "cancelled")
+
+    def __init__(self, kind: str, total: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.total = total
+        self.status = "queued"
+        self.results: List[Dict] = []
+        self.metrics: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in self.FINISHED
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def start(self):
+        with self._cond:
+            self.status = "running"
+            self.started_at = time.time()
+            self._cond.notify_all()
+
+    def add_result(self, result: Dict):
+        with self._cond:
+            self.results.append(result)
+            self._cond.notify_all()
+
+    def finish(self, status: str, metrics: Optional[Dict] = None, error: Optional[str] = None):
+        with self._cond:
+            self.status = status
+            self.metrics = metrics
+            self.error = error
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def snapshot(self, offset: int = 0, include_results: bool = True) -> Dict[str, Any]:
+        with self._cond:
+            completed = len(self.results)
+            data = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "total": self.total,
+                "completed": completed,
+                "progress": round(completed / self.total * 100, 2) if self.total else 100.0,
+                "metrics": self.metrics,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+            if include_results:
+                data["offset"] = offset
+                data["results"] = self.results[offset:]
+            return data
+
+    def events(self, offset: int = 0, heartbeat: float = 15.0) -> Iterator[Tuple[str, Dict]]:
+        """
+        事件流（供 SSE 使用）：
+        - ("progress", {...}) 每完成一条用例一次，携带该条结果
+        - ("ping", {...})     长时间无进展时的心跳
+        - ("done", snapshot)  任务结束（不含逐条结果）
+        """
+        seen = offset
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self.results) > seen or self.finished, timeout=heartbeat)
+                new = self.results[seen:]
+                finished = self.finished
+            if not new and not finished:
+                yield "ping", {"job_id": self.id, "completed": seen, "total": self.total}
+                continue
+            for result in new:
+                seen += 1
+                yield "progress", {"job_id": self.id, "index": seen, "completed": seen,
+                                   "total": self.total, "result": result}
+            if finished:
+                yield "done", self.snapshot(include_results=False)
+                return
+
+
+class JobManager:
+    """
+    评估任务管理器：线程池中后台执行，按 job_id 查询；只保留最近 max_jobs 个任务
+    单个任务内的用例由 EvaluationEngine 并发执行
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 100, engine: Optional[EvaluationEngine] = None):
+        self.max_jobs = max_jobs
+        self.engine = engine or EvaluationEngine()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eval-job")
+        self._jobs: "OrderedDict[str, EvalJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, cases: List[Dict], run_case: Callable[[Dict, int], Dict],
+               summarize: Callable[[List[Dict]], Dict],
+               make_error: Optional[Callable[[Dict, int, str], Dict]] = None) -> EvalJob:
+        """
+        提交任务：run_case(case, idx) 返回单条结果，summarize(results) 返回汇总指标，
+        make_error 覆盖失败 / 超时用例的结果结构
+        """
+        job = EvalJob(kind, len(cases))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        self._pool.submit(self._run, job, cases, run_case, summarize, make_error)
+        return job
+
+    def _evict(self):
+        # 只淘汰已结束的旧任务，运行中的任务始终可查询
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].finished:
+                del self._jobs[job_id]
+
+    def _run(self, job: EvalJob, cases, run_case, summarize, make_error):
+        job.start()
+        try:
+            self.engine.run(cases, run_case, on_result=job.add_result,
+                            should_stop=lambda: job.cancelled, make_error=make_error)
+            status = "cancelled" if job.cancelled and len(job.results) < job.total else "succeeded"
+            job.finish(status, metrics=summarize(job.results))
+        except Exception as e:
+            job.finish("failed", error=str(e)[:500])
+
+    def get(self, job_id: str) -> Optional[EvalJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j.snapshot(include_results=False) for j in reversed(jobs)]
+
+    def cancel(self, job_id: str) -> Optional[EvalJob]:
+        job = self.get(job_id)
+        if job:
+            job.cancel()
+        return job
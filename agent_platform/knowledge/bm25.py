@@ -0,0 +1,334 @@
+"""
+BM25 检索引擎：块压缩倒排索引 + MaxScore / block-max 动态剪枝
+
+索引目录（tools/build_kb_index.py 与 TF-IDF 索引一同生成，默认 knowledge/bm25_index）：
+
+    manifest.json          格式版本、k1 / b / avgdl、块大小、分词参数
+    vocab.json             词表，下标即词号
+    meta.json / meta.*.npy 按列存放的紧凑切片元数据（同 TF-IDF 索引，见 chunk_meta）
+    idf.npy                float64，BM25 idf
+    df.npy                 int64，各词的文档频率（postings 长度）
+    doclen.npy             int32，各切片的词项数
+    term_blocks.npy        int64，词 t 的块为 [term_blocks[t], term_blocks[t+1])
+    term_max.npy           float64，词 t 单项得分上界（各块上界的最大值）
+    block_base.npy         int64，块内第一个切片号的差分基准（上一块最后一个切片号，词的第一块为 0）
+    block_last.npy         int64，块内最后一个切片号（跳块用）
+    block_max.npy          float64，块内最高单项得分（block-max 上界）
+    block_doc_off.npy      int64，块的切片号字节区间（VByte 差分编码）
+    block_tf_off.npy       int64，块的词频字节区间（VByte 编码）
+    docs.npy / tfs.npy     uint8，所有块的 VByte 字节流
+
+检索按词项上界从大到小逐词累加（term-at-a-time）：
+- 还能产生新候选时完整解码该词的全部块；
+- 一旦剩余词项的上界之和 < 当前第 k 名得分，后续词只更新已有候选，
+  且只解码包含候选、并且 候选得分 + 块上界 + 其余上界 >= 第 k 名 的块，其余块直接跳过；
+结果与不剪枝的全量打分完全一致（含并列时行号小者优先）
+"""
+import os
+import threading
+
+import numpy as np
+
+from agent_platform.knowledge.index_store import save_index_dir, read_manifest, read_json
+from agent_platform.knowledge.chunk_meta import ChunkMeta, encode_meta
+from agent_platform.knowledge.retriever import ROOT, FilterIndex, top_k, pool_documents, document_hits
+from agent_platform.knowledge.vectorizer import build_analyzer
+
+BM25_INDEX_PATH = os.path.join(ROOT, "knowledge/bm25_index")
+FORMAT = "hr-bm25"
+FORMAT_VERSION = 2
+BLOCK_SIZE = 128
+K1 = 1.2
+B = 0.75
+
+
+def vbyte_lengths(values: np.ndarray) -> np.ndarray:
+    """各值 VByte 编码后的字节数"""
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for shift in (7, 14, 21, 28, 35):
+        nbytes += values >= np.uint64(1 << shift)
+    return nbytes
+
+
+def vbyte_encode(values: np.ndarray) -> np.ndarray:
+    """非负整数 -> VByte 字节流：每字节低 7 位存数值，最高位为 1 表示后面还有字节"""
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = vbyte_lengths(values)
+    starts = np.concatenate([[0], np.cumsum(nbytes)[:-1]])
+    out = np.zeros(int(nbytes.sum()), dtype=np.uint8)
+    for i in range(int(nbytes.max()) if len(values) else 0):
+        sel = nbytes > i
+        byte = (values[sel] >> np.uint64(7 * i)) & np.uint64(0x7F)
+        more = (nbytes[sel] - 1 > i).astype(np.uint64) << np.uint64(7)
+        out[starts[sel] + i] = (byte | more).astype(np.uint8)
+    return out
+
+
+def vbyte_decode(buf: np.ndarray) -> np.ndarray:
+    """VByte 字节流 -> int64 数组（向量化解码）"""
+    if len(buf) == 0:
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(buf < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    group = np.repeat(np.arange(len(ends)), ends - starts + 1)
+    shift = (np.arange(len(buf)) - starts[group]) * 7
+    parts = (buf & 0x7F).astype(np.int64) << shift
+    return np.add.reduceat(parts, starts)
+
+
+def build_bm25_index(path: str, chunks, analyzer_params: dict, k1: float = K1, b: float = B,
+                     block_size: int = BLOCK_SIZE, extra: dict = None) -> dict:
+    """按切片文本构建 BM25 块压缩倒排索引并写入 path"""
+    analyze = build_analyzer(analyzer_params)
+    vocab, term_ids, doc_ids = {}, [], []
+    for d, c in enumerate(chunks):
+        for t in analyze(c["text"]):
+            term_ids.append(vocab.setdefault(t, len(vocab)))
+            doc_ids.append(d)
+    n_docs, n_terms = len(chunks), len(vocab)
+    term_ids = np.asarray(term_ids, dtype=np.int64)
+    doc_ids = np.asarray(doc_ids, dtype=np.int64)
+
+    doclen = np.bincount(doc_ids, minlength=n_docs).astype(np.int32)
+    avgdl = float(doclen.mean()) if n_docs else 0.0
+    # (词, 切片) 去重计数 -> 按词、再按切片号排序的 postings
+    keys, tf = np.unique(term_ids * max(n_docs, 1) + doc_ids, return_counts=True)
+    p_term, p_doc = keys // max(n_docs, 1), keys % max(n_docs, 1)
+    df = np.bincount(p_term, minlength=n_terms)
+    idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+    norm = k1 * (1.0 - b + b * doclen / avgdl) if avgdl else np.full(n_docs, k1)
+    scores = idf[p_term] * (tf * (k1 + 1)) / (tf + norm[p_doc])
+
+    # 每个词的 postings 按 block_size 切块
+    term_start = np.concatenate([[0], np.cumsum(df)])
+    pos = np.arange(len(p_term)) - term_start[p_term]
+    term_nblocks = (df + block_size - 1) // block_size
+    term_blocks = np.concatenate([[0], np.cumsum(term_nblocks)]).astype(np.int64)
+    block = term_blocks[p_term] + pos // block_size
+    n_blocks = int(term_blocks[-1])
+    first = np.ones(len(block), dtype=bool)
+    first[1:] = block[1:] != block[:-1]
+    last = np.ones(len(block), dtype=bool)
+    last[:-1] = block[:-1] != block[1:]
+
+    block_last = p_doc[last]
+    # 差分基准：同一个词的上一块的最后一个切片号；词的第一块为 0
+    block_base = np.zeros(n_blocks, dtype=np.int64)
+    cont = np.flatnonzero(np.isin(np.arange(n_blocks), term_blocks[:-1], invert=True))
+    block_base[cont] = block_last[cont - 1]
+    deltas = p_doc - np.where(first, block_base[block], np.concatenate([[0], p_doc[:-1]]))
+    block_max = np.full(n_blocks, -np.inf)
+    np.maximum.at(block_max, block, scores)
+    term_max = np.zeros(n_terms)
+    np.maximum.at(term_max, p_term, scores)
+
+    docs_buf, tfs_buf = vbyte_encode(deltas), vbyte_encode(tf)
+    doc_nbytes = np.bincount(block, weights=vbyte_lengths(deltas), minlength=n_blocks)
+    tf_nbytes = np.bincount(block, weights=vbyte_lengths(tf), minlength=n_blocks)
+    arrays = {
+        "idf": idf,
+        "df": df.astype(np.int64),
+        "doclen": doclen,
+        "term_blocks": term_blocks,
+        "term_max": term_max,
+        "block_base": block_base,
+        "block_last": block_last.astype(np.int64),
+        "block_max": block_max,
+        "block_doc_off": np.concatenate([[0], np.cumsum(doc_nbytes)]).astype(np.int64),
+        "block_tf_off": np.concatenate([[0], np.cumsum(tf_nbytes)]).astype(np.int64),
+        "docs": docs_buf,
+        "tfs": tfs_buf,
+    }
+    meta_arrays, meta_info = encode_meta(chunks)
+    arrays.update(meta_arrays)
+    vocab_list = [None] * n_terms
+    for t, i in vocab.items():
+        vocab_list[i] = t
+    return save_index_dir(path, arrays, {"vocab": vocab_list, "meta": meta_info}, {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "n_chunks": n_docs,
+        "n_terms": n_terms,
+        "n_postings": int(len(p_term)),
+        "n_blocks": n_blocks,
+        "block_size": block_size,
+        "k1": k1,
+        "b": b,
+        "avgdl": avgdl,
+        "analyzer": analyzer_params,
+        "compressed_bytes": int(len(docs_buf) + len(tfs_buf)),
+        **(extra or {}),
+    })
+
+
+def _merge_add(docs_a, scores_a, docs_b, scores_b):
+    """
+    合并两组按切片号升序、各自无重复的 (切片号, 得分)，同一切片的得分相加（a 在前，累加顺序固定）；
+    两段已排好序，稳定排序（timsort）只需线性时间
+    """
+    if len(docs_a) == 0:
+        return docs_b, scores_b
+    if len(docs_b) == 0:
+        return docs_a, scores_a
+    docs = np.concatenate([docs_a, docs_b])
+    order = np.argsort(docs, kind="stable")
+    docs, scores = docs[order], np.concatenate([scores_a, scores_b])[order]
+    starts = np.flatnonzero(np.concatenate([[True], docs[1:] != docs[:-1]]))
+    return docs[starts], np.add.reduceat(scores, starts)
+
+
+class BM25RAG:
+    """
+    BM25 检索，search() / search_many() 的参数与返回与 TfidfRAG 相同
+    prune=False 时对查询词的全部 postings 打分（用于对照验证）
+    stats 累计解码的 postings 数与查询词 postings 总数，touched_ratio 即剪枝后实际访问的比例
+    """
+
+    def __init__(self, index_path: str = BM25_INDEX_PATH, prune: bool = True):
+        self.index_path = index_path
+        self.prune = prune
+        self.manifest = read_manifest(index_path, FORMAT, FORMAT_VERSION)
+        self.index_id = self.manifest["index_id"]
+        load = lambda name: np.load(os.path.join(index_path, f"{name}.npy"), mmap_mode="r")
+        for name in ("idf", "df", "doclen", "term_blocks", "term_max", "block_base", "block_last", "block_max",
+                     "block_doc_off", "block_tf_off", "docs", "tfs"):
+            setattr(self, name, load(name))
+        self.vocabulary = {t: i for i, t in enumerate(read_json(index_path, "vocab"))}
+        self.meta = ChunkMeta.load(index_path)
+        self.filters = FilterIndex(self.meta)
+        self.analyze = build_analyzer(self.manifest["analyzer"])
+        k1, b, avgdl = self.manifest["k1"], self.manifest["b"], self.manifest["avgdl"]
+        self.k1 = k1
+        self.norm = k1 * (1.0 - b + b * np.asarray(self.doclen) / avgdl) if avgdl else np.full(len(self.doclen), k1)
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "postings_total": 0, "postings_decoded": 0, "blocks_total": 0,
+                      "blocks_decoded": 0}
+
+    def warm(self):
+        """把压缩 postings 读入 page cache"""
+        int(self.docs.sum())
+        int(self.tfs.sum())
+
+    @staticmethod
+    def _gather(buf, off, blocks):
+        """取出若干块的字节并解码，返回 (值, 各块的值个数)"""
+        lo, hi = off[blocks], off[blocks + 1]
+        if len(blocks) == 1 or (len(blocks) and hi[-1] - lo[0] == (hi - lo).sum()):
+            raw = np.asarray(buf[lo[0]:hi[-1]])
+        else:
+            lens = hi - lo
+            starts = np.concatenate([[0], np.cumsum(lens)[:-1]])
+            raw = np.asarray(buf)[np.repeat(lo - starts, lens) + np.arange(int(lens.sum()))]
+        ends = raw < 0x80
+        counts = np.add.reduceat(ends, np.concatenate([[0], np.cumsum(hi - lo)[:-1]])) if len(raw) else \
+            np.zeros(len(blocks), dtype=np.int64)
+        return vbyte_decode(raw), counts
+
+    def _term_blocks(self, t: int, blocks):
+        """解码词 t 的若干块（块号升序），返回 (切片号, 单项得分)"""
+        blocks = np.asarray(blocks, dtype=np.int64)
+        if len(blocks) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        deltas, counts = self._gather(self.docs, self.block_doc_off, blocks)
+        tf, _ = self._gather(self.tfs, self.block_tf_off, blocks)
+        # 块内差分还原：整体 cumsum 后减去块起点之前的累计值，再加块的基准
+        csum = np.cumsum(deltas)
+        first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        before = np.where(first > 0, csum[np.maximum(first - 1, 0)], 0)
+        docs = csum - np.repeat(before - self.block_base[blocks], counts)
+        return docs, self.idf[t] * (tf * (self.k1 + 1)) / (tf + self.norm[docs])
+
+    def _search_ids(self, query: str, k: int, mask=None):
+        terms = sorted({self.vocabulary[t] for t in self.analyze(query) if t in self.vocabulary})
+        # 按上界从大到小处理；上界相同时按词号，保证累加顺序固定
+        terms.sort(key=lambda t: -self.term_max[t])
+        stats = {"postings_total": 0, "postings_decoded": 0, "blocks_total": 0, "blocks_decoded": 0}
+        for t in terms:
+            lo, hi = self.term_blocks[t], self.term_blocks[t + 1]
+            stats["blocks_total"] += int(hi - lo)
+            stats["postings_total"] += int(self.df[t])
+
+        cand = np.empty(0, dtype=np.int64)
+        acc = np.empty(0)
+        remaining = float(sum(self.term_max[t] for t in terms))
+        growing = True
+        for t in terms:
+            lo, hi = int(self.term_blocks[t]), int(self.term_blocks[t + 1])
+            theta = np.partition(acc, len(acc) - k)[len(acc) - k] if self.prune and k and len(acc) >= k else -np.inf
+            if growing and remaining < theta:
+                # 剩余词项的上界之和已不足以让新切片进入 top-k：此后只更新已有候选
+                growing = False
+            rest = remaining - self.term_max[t]
+            if growing:
+                blocks = np.arange(lo, hi)
+            else:
+                keep = acc + remaining >= theta
+                cand, acc = cand[keep], acc[keep]
+                # 候选所在的块；候选得分 + 块上界 + 其余上界仍不足第 k 名的候选直接淘汰
+                blk = lo + np.searchsorted(self.block_last[lo:hi], cand)
+                inside = blk < hi
+                bound = acc + rest + np.where(inside, self.block_max[np.minimum(blk, hi - 1)], 0.0)
+                keep = bound >= theta
+                cand, acc, blk, inside = cand[keep], acc[keep], blk[keep], inside[keep]
+                blocks = np.unique(blk[inside])
+            docs, scores = self._term_blocks(t, blocks)
+            stats["blocks_decoded"] += len(blocks)
+            stats["postings_decoded"] += len(docs)
+            if mask is not None and len(docs):
+                allowed = mask[docs]
+                docs, scores = docs[allowed], scores[allowed]
+            if growing:
+                cand, acc = _merge_add(cand, acc, docs, scores)
+            elif len(docs):
+                pos = np.searchsorted(cand, docs)
+                hit = (pos < len(cand)) & (cand[np.minimum(pos, len(cand) - 1)] == docs)
+                acc[pos[hit]] += scores[hit]
+            remaining = rest
+
+        with self._lock:
+            self.stats["queries"] += 1
+            for key, value in stats.items():
+                self.stats[key] += value
+        # k 为 None 时返回全部命中切片（此时不剪枝），供文档级聚合
+        rows, scores = (cand, acc) if k is None else top_k(cand, acc, k)
+        return rows, scores, stats
+
+    def _hit(self, i: int, score: float):
+        m = self.meta[i]
+        return {
+            "title": m["title"],
+            "doc_id": m["doc_id"],
+            "category": m["category"],
+            "effective_date": m["effective_date"],
+            "applicable": m["applicable"],
+            "text": m["text"],
+            "score": float(score)
+        }
+
+    def search_with_stats(self, query: str, k: int = 3, filters: dict = None):
+        """检索并返回本次查询的 postings / 块访问统计"""
+        rows, scores, stats = self._search_ids(query, k, self.filters.mask(filters))
+        return [self._hit(i, s) for i, s in zip(rows, scores)], stats
+
+    def search(self, query: str, k: int = 3, filters: dict = None):
+        return self.search_with_stats(query, k, filters)[0]
+
+    def search_documents(self, query: str, k: int = 3, filters: dict = None, pooling: str = "max",
+                         top_n: int = 2, passages: int = 2):
+        """文档级检索，参数与返回同 TfidfRAG.search_documents；需要全部命中切片的得分，因此不做剪枝"""
+        rows, scores, _ = self._search_ids(query, None, self.filters.mask(filters))
+        return document_hits(self.meta, pool_documents(rows, scores, self.meta.chunk_doc, k, pooling, top_n,
+                                                       passages))
+
+    def search_many(self, queries, k: int = 3, filters: dict = None):
+        mask = self.filters.mask(filters)
+        results = []
+        for q in queries:
+            rows, scores, _ = self._search_ids(q, k, mask)
+            results.append([self._hit(i, s) for i, s in zip(rows, scores)])
+        return results
+
+    def touched_ratio(self) -> float:
+        with self._lock:
+            return self.stats["postings_decoded"] / max(1, self.stats["postings_total"])
@@ -0,0 +1,143 @@
+"""
+紧凑的按列切片元数据（TF-IDF / BM25 索引共用）：
+
+    meta.json                   各类别字段的字典 {"n_docs": N, "dicts": {"category": [...], ...}}
+    meta.chunk_doc.npy          int32，切片 -> 文档行（同一文档的切片共享一行文档元数据）
+    meta.text.offsets.npy       切片文本在 meta.text.bytes 中的 UTF-8 字节区间（长度 n_chunks + 1）
+    meta.text.bytes.npy         uint8，全部切片文本依次拼接
+    meta.doc_id.* / meta.title.*       文档级字符串，同样为 offsets + bytes
+    meta.category.codes.npy 等          文档级类别字段（category / applicable / effective_date）的字典编码
+
+数组与索引一起 mmap 打开，不再为每个切片常驻一组 Python 字符串；
+只有检索返回的 k 个结果才解码拼成 dict
+"""
+import os
+import json
+from typing import Dict, List
+
+import numpy as np
+
+DOC_FIELDS = ["doc_id", "title", "category", "applicable", "effective_date"]
+# 文档级字段中取值很少、做字典编码的字段，其余（doc_id / title）存为字符串
+CATEGORICAL = ["category", "applicable", "effective_date"]
+STRINGS = ["doc_id", "title"]
+
+
+def _code_dtype(n_values: int) -> type:
+    if n_values <= np.iinfo(np.uint8).max + 1:
+        return np.uint8
+    if n_values <= np.iinfo(np.uint16).max + 1:
+        return np.uint16
+    return np.int32
+
+
+def encode_strings(values: List[str]):
+    """字符串列表 -> (offsets, bytes)：第 i 个字符串为 bytes[offsets[i]:offsets[i+1]]"""
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    if offsets[-1] < np.iinfo(np.int32).max:
+        offsets = offsets.astype(np.int32)
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def encode_meta(chunks: List[Dict]):
+    """
+    切片 dict 列表 -> (arrays, dicts)：arrays 以 "meta." 为前缀，与索引数组一起写入；
+    dicts 写入 meta.json。文档字段完全相同的切片共享同一文档行
+    """
+    doc_rows, docs = {}, []
+    chunk_doc = np.empty(len(chunks), dtype=np.int32)
+    for i, c in enumerate(chunks):
+        key = tuple(str(c.get(field, "")) for field in DOC_FIELDS)
+        if key not in doc_rows:
+            doc_rows[key] = len(docs)
+            docs.append(key)
+        chunk_doc[i] = doc_rows[key]
+
+    arrays = {"meta.chunk_doc": chunk_doc}
+    offsets, blob = encode_strings([c.get("text", "") for c in chunks])
+    arrays["meta.text.offsets"], arrays["meta.text.bytes"] = offsets, blob
+    dicts = {}
+    for j, field in enumerate(DOC_FIELDS):
+        column = [doc[j] for doc in docs]
+        if field in CATEGORICAL:
+            values = sorted(set(column))
+            lookup = {v: code for code, v in enumerate(values)}
+            arrays[f"meta.{field}.codes"] = np.array([lookup[v] for v in column], dtype=_code_dtype(len(values)))
+            dicts[field] = values
+        else:
+            arrays[f"meta.{field}.offsets"], arrays[f"meta.{field}.bytes"] = encode_strings(column)
+    return arrays, {"n_docs": len(docs), "dicts": dicts}
+
+
+class ChunkMeta:
+    """
+    按列存放的切片元数据：len(meta) 为切片数，meta[i] 按需解码出第 i 个切片的 dict
+    （字段同原切片：doc_id / title / category / applicable / effective_date / text）；
+    过滤用 chunk_codes(field) 与 values(field) 直接在编码上计算，不解码字符串
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], info: Dict):
+        self.arrays = arrays
+        self.dicts = info["dicts"]
+        self.n_docs = info["n_docs"]
+        self.chunk_doc = arrays["meta.chunk_doc"]
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict]) -> "ChunkMeta":
+        arrays, info = encode_meta(chunks)
+        return cls(arrays, info)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, list]) -> "ChunkMeta":
+        """旧版 meta.json（{"doc_id": [...], "title": [...], ...}）"""
+        fields = list(columns)
+        n = len(columns[fields[0]]) if fields else 0
+        return cls.from_chunks([{field: columns[field][i] for field in fields} for i in range(n)])
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "ChunkMeta":
+        """从索引目录读取；兼容旧版只有 meta.json 的索引"""
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            info = json.load(f)
+        if "dicts" not in info:
+            return cls.from_columns(info)
+        mode = "r" if mmap else None
+        arrays = {}
+        for name in os.listdir(path):
+            if name.startswith("meta.") and name.endswith(".npy"):
+                arrays[name[:-4]] = np.load(os.path.join(path, name), mmap_mode=mode)
+        return cls(arrays, info)
+
+    def __len__(self):
+        return len(self.chunk_doc)
+
+    def _string(self, field: str, i: int) -> str:
+        offsets = self.arrays[f"meta.{field}.offsets"]
+        return self.arrays[f"meta.{field}.bytes"][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def values(self, field: str) -> List[str]:
+        """类别字段的字典（编码 -> 取值）"""
+        return self.dicts[field]
+
+    def chunk_codes(self, field: str) -> np.ndarray:
+        """类别字段在每个切片上的编码（长度 n_chunks）"""
+        return np.asarray(self.arrays[f"meta.{field}.codes"])[self.chunk_doc]
+
+    def text(self, i: int) -> str:
+        return self._string("text", int(i))
+
+    def __getitem__(self, i: int) -> dict:
+        i = int(i)
+        doc = int(self.chunk_doc[i])
+        m = {field: self._string(field, doc) for field in STRINGS}
+        for field in CATEGORICAL:
+            m[field] = self.dicts[field][int(self.arrays[f"meta.{field}.codes"][doc])]
+        m["text"] = self.text(i)
+        return m
+
+    @property
+    def nbytes(self) -> int:
+        """各数组的字节数（mmap 时为磁盘上的大小，按需进入 page cache）"""
+        return int(sum(a.nbytes for a in self.arrays.values()))
@@ -0,0 +1,168 @@
+"""
+TF-IDF 索引的磁盘格式（目录，无 pickle）：
+
+    manifest.json            格式版本、索引 id、形状、dtype、向量化参数
+    postings.data.npy        float32，按词组织的 CSR（即切片矩阵的转置）：第 t 行是词 t 的 postings
+    postings.indices.npy     int32/int64，切片行号
+    postings.indptr.npy      int32/int64，每个词的 postings 起止
+                             分片索引（--shards N）按切片行号连续切成 N 段，各段写为 postings-{i}.*.npy，
+                             段内行号从 0 开始，manifest["shards"] 记录各段的起始行号
+    idf.npy                  float64，各词的 idf（与 sklearn 的 idf_ 相同精度，查询向量与 sklearn 逐位一致）
+    vocab.json               词表，下标即列号
+    meta.json / meta.*.npy   按列存放的紧凑切片元数据（见 chunk_meta）
+
+所有 .npy 以 mmap 方式打开：多个 worker 共享同一份 page cache，启动时无需反序列化
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+from typing import Dict, List
+
+import numpy as np
+import scipy.sparse as sp
+
+from agent_platform.knowledge.chunk_meta import ChunkMeta, encode_meta
+
+FORMAT = "hr-tfidf"
+FORMAT_VERSION = 3
+
+
+def _index_dtype(*sizes) -> type:
+    return np.int32 if max(sizes) < np.iinfo(np.int32).max else np.int64
+
+
+def shard_bounds(n_chunks: int, shards: int) -> List[tuple]:
+    """把 [0, n_chunks) 均分为 shards 段连续区间"""
+    shards = max(1, min(shards, n_chunks or 1))
+    edges = [n_chunks * i // shards for i in range(shards + 1)]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def merge_shards(shards: List[tuple]) -> sp.csr_matrix:
+    """把 [(起始行号, 分片 postings)] 拼回完整的 (n_features, n_chunks) postings（多段时会复制）"""
+    if len(shards) == 1:
+        return shards[0][1]
+    return sp.hstack([p for _, p in shards], format="csr", dtype=np.float32)
+
+
+def save_index_dir(path: str, arrays: Dict[str, np.ndarray], files: Dict[str, object], manifest: Dict) -> Dict:
+    """
+    通用的索引目录写入：arrays 存为 {name}.npy，files 存为 {name}.json，manifest 补上 index_id / created_at；
+    先写到临时目录，再整体替换 path，读者不会看到写了一半的索引
+    """
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    digest = hashlib.sha1()
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), arr)
+        digest.update(arr.tobytes())
+    for name, obj in files.items():
+        text = json.dumps(obj, ensure_ascii=False)
+        with open(os.path.join(tmp, f"{name}.json"), "w", encoding="utf-8") as f:
+            f.write(text)
+        digest.update(text.encode("utf-8"))
+
+    manifest = {
+        "format": manifest.pop("format"),
+        "format_version": manifest.pop("format_version"),
+        "index_id": digest.hexdigest()[:16],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **manifest,
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # 替换旧索引：已 mmap 旧文件的进程不受影响（文件被删除后映射仍有效）
+    old = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old)
+    os.rename(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def write_index(path: str, postings: sp.csr_matrix, vocab: List[str], idf: np.ndarray,
+                vectorizer: Dict, chunks: List[Dict], extra: Dict = None, shards: int = 1) -> Dict:
+    """
+    写入 TF-IDF 索引目录
+    postings 为 (n_features, n_chunks) 的按词 CSR 矩阵；extra 合并进 manifest（如文档哈希、构建信息）
+    shards > 1 时按切片行号切成多段分别存放，词表 / idf / 元数据各段共享
+    """
+    postings = sp.csr_matrix(postings, dtype=np.float32)
+    postings.sort_indices()
+    n_features, n_chunks = postings.shape
+    idx_dtype = _index_dtype(postings.nnz, n_chunks)
+
+    arrays = {"idf": np.asarray(idf, dtype=np.float64)}
+    bounds = shard_bounds(n_chunks, shards)
+    shard_info = []
+    for i, (lo, hi) in enumerate(bounds):
+        name = "postings" if len(bounds) == 1 else f"postings-{i}"
+        part = postings[:, lo:hi].tocsr() if len(bounds) > 1 else postings
+        part.sort_indices()
+        arrays[f"{name}.data"] = part.data.astype(np.float32)
+        arrays[f"{name}.indices"] = part.indices.astype(idx_dtype)
+        arrays[f"{name}.indptr"] = part.indptr.astype(idx_dtype)
+        shard_info.append({"name": name, "offset": lo, "n_chunks": hi - lo, "nnz": int(part.nnz)})
+
+    meta_arrays, meta_info = encode_meta(chunks)
+    arrays.update(meta_arrays)
+    return save_index_dir(path, arrays, {"vocab": list(vocab), "meta": meta_info}, {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "n_chunks": n_chunks,
+        "n_features": n_features,
+        "nnz": int(postings.nnz),
+        "dtype": "float32",
+        "index_dtype": np.dtype(idx_dtype).name,
+        "vectorizer": vectorizer,
+        "shards": shard_info,
+        **(extra or {}),
+    })
+
+
+def read_manifest(path: str, fmt: str = FORMAT, version: int = FORMAT_VERSION) -> Dict:
+    with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != fmt:
+        raise ValueError(f"不是有效的 {fmt} 索引目录: {path}")
+    if manifest.get("format_version", 0) > version:
+        raise ValueError(f"索引格式版本 {manifest.get('format_version')} 高于当前支持的 {version}，请升级代码")
+    return manifest
+
+
+def read_json(path: str, name: str):
+    with open(os.path.join(path, f"{name}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_index(path: str, mmap: bool = True) -> Dict:
+    """
+    读取索引目录，返回 manifest / shards / idf / vocab / meta；数组默认 mmap 只读打开
+    shards 为 [(起始行号, 分片 postings)]，需要完整矩阵时用 merge_shards 拼接；meta 为 ChunkMeta
+    """
+    manifest = read_manifest(path)
+    mode = "r" if mmap else None
+    load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+
+    # format_version 1 没有 shards 字段，即单个 postings
+    shard_info = manifest.get("shards") or [{"name": "postings", "offset": 0, "n_chunks": manifest["n_chunks"]}]
+    shards = []
+    for info in shard_info:
+        name = info["name"]
+        shards.append((info["offset"], sp.csr_matrix(
+            (load(f"{name}.data"), load(f"{name}.indices"), load(f"{name}.indptr")),
+            shape=(manifest["n_features"], info["n_chunks"]),
+            copy=False
+        )))
+    return {
+        "manifest": manifest,
+        "shards": shards,
+        "idf": load("idf"),
+        "vocab": read_json(path, "vocab"),
+        "meta": ChunkMeta.load(path, mmap),
+    }
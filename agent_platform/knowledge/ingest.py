@@ -0,0 +1,320 @@
+"""
+知识库流式导入：从多个来源逐篇读取政策文档，规范化为知识库字段，在多个进程中并行切片，
+切片边产出边写入 JSONL，整个过程不在内存中保留全部文档
+
+支持的来源（按路径判断）：
+- *.json：文档数组 [{...}, ...]，用 JSONDecoder.raw_decode 逐个解析，不整体 json.load；空文件视为没有文档
+- *.jsonl：每行一篇文档
+- 目录：递归读取其中的 .txt / .md，每个文件一篇文档；文件开头可用 --- 包围的 key: value 头部
+  指定 id / title / category / applicable / effective_date，缺省时 id 为相对路径，
+  title 取第一个 Markdown 标题或文件名，category 取所在子目录名
+
+知识库字段：id / title / category / applicable / effective_date / content；
+也接受常见别名（doc_id、name、text、body 等），没有正文的条目跳过
+"""
+import os
+import re
+import json
+import hashlib
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List
+
+ALL_STAFF = "全体员工"
+DEFAULT_CATEGORY = "general"
+TEXT_EXTS = (".txt", ".md")
+FIELD_ALIASES = {
+    "id": ("id", "doc_id", "policy_id"),
+    "title": ("title", "name", "subject"),
+    "content": ("content", "text", "body"),
+}
+
+
+# json.dumps(ensure_ascii=False) 每次调用都会新建编码器，批量序列化时复用
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+_encode_sorted = json.JSONEncoder(ensure_ascii=False, sort_keys=True).encode
+
+
+def doc_hash(entry) -> str:
+    return hashlib.sha1(_encode_sorted(entry).encode("utf-8")).hexdigest()
+
+
+def clean(t: str) -> str:
+    return re.sub(r"\s+", " ", t).strip()
+
+
+def make_chunks(entry):
+    parts = [entry["title"]]
+    if entry.get("applicable"):
+        parts.append(f"适用对象：{entry['applicable']}")
+    if entry.get("effective_date"):
+        parts.append(f"生效日期：{entry['effective_date']}")
+    text = clean("。".join(parts) + f"。{entry['content']}")
+    # 简单句段切片
+    chunks = []
+    for p in re.split(r"[。！？]\s*", text):
+        if not p: continue
+        chunks.append({
+            "doc_id": entry["id"],
+            "title": entry["title"],
+            "category": entry["category"],
+            "applicable": entry["applicable"],
+            "effective_date": entry["effective_date"],
+            "text": p
+        })
+    return chunks
+
+
+# ========== 来源 ==========
+def iter_json_array(path: str, read_size: int = 1 << 20) -> Iterator:
+    """逐个产出 JSON 数组的元素；每次只读入 read_size 个字符，已解析的部分随即丢弃"""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buf, pos, eof
+            data = f.read(read_size)
+            eof = not data
+            buf, pos = buf[pos:] + data, 0
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        skip(" \t\r\n\ufeff")
+        if pos >= len(buf):
+            return  # 空文件
+        if buf[pos] != "[":
+            raise ValueError(f"{path} 不是 JSON 数组")
+        pos += 1
+        while True:
+            skip(" \t\r\n,")
+            if pos >= len(buf):
+                raise ValueError(f"{path} 的 JSON 数组没有结束")
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()  # 元素跨过了读入边界
+                continue
+            if end == len(buf) and not eof and not isinstance(obj, (dict, list)):
+                fill()  # 数字 / 字面量可能被读入边界截断，读完整再解析
+                continue
+            yield obj
+            pos = end
+
+
+def iter_jsonl(path: str) -> Iterator:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_text_doc(path: str, root: str) -> Dict:
+    """文本 / Markdown 文件 -> 原始文档（可选 --- 头部）"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().lstrip("\ufeff")
+    entry = {}
+    if text.startswith("---"):
+        head, sep, body = text[3:].partition("\n---")
+        if sep:
+            for line in head.splitlines():
+                key, colon, value = line.partition(":")
+                if colon and key.strip():
+                    entry[key.strip()] = value.strip()
+            text = body.split("\n", 1)[1] if "\n" in body else ""
+    rel = os.path.relpath(path, root)
+    entry.setdefault("id", os.path.splitext(rel)[0].replace(os.sep, "/"))
+    if "title" not in entry:
+        heading = re.search(r"^#+\s*(.+)$", text, re.M)
+        entry["title"] = heading.group(1).strip() if heading else os.path.splitext(os.path.basename(path))[0]
+    if "category" not in entry and os.path.dirname(rel):
+        entry["category"] = os.path.dirname(rel).split(os.sep)[0]
+    # 去掉 Markdown 标题标记与强调符号，保留正文
+    entry["content"] = re.sub(r"^#+\s*", "", text, flags=re.M).replace("**", "")
+    return entry
+
+
+def iter_text_dir(root: str, exts=TEXT_EXTS) -> Iterator[Dict]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(exts):
+                yield read_text_doc(os.path.join(dirpath, name), root)
+
+
+def iter_source(path: str) -> Iterator:
+    """按路径类型选择读取方式，逐篇产出原始文档"""
+    if os.path.isdir(path):
+        return iter_text_dir(path)
+    if path.endswith(".jsonl"):
+        return iter_jsonl(path)
+    if path.endswith(".json"):
+        return iter_json_array(path)
+    raise ValueError(f"不支持的知识库来源: {path}（可用 .json / .jsonl / 目录）")
+
+
+# ========== 规范化与切片 ==========
+def _first(entry: Dict, field: str):
+    for key in FIELD_ALIASES[field]:
+        value = entry.get(key)
+        if value not in (None, "", []):
+            return value
+    return None
+
+
+def normalize(entry) -> Dict:
+    """原始文档 -> 知识库字段；不是对象或没有正文时返回 None"""
+    if not isinstance(entry, dict):
+        return None
+    content = _first(entry, "content")
+    if isinstance(content, list):
+        content = "\n".join(str(p) for p in content)
+    if not content or not str(content).strip():
+        return None
+    content = str(content)
+    title = str(_first(entry, "title") or clean(content)[:30]).strip()
+    doc_id = _first(entry, "id")
+    if doc_id is None:
+        doc_id = "doc_" + hashlib.sha1(f"{title}\n{content}".encode("utf-8")).hexdigest()[:12]
+    return {
+        "id": str(doc_id),
+        "title": title,
+        "category": str(entry.get("category") or DEFAULT_CATEGORY),
+        "applicable": str(entry.get("applicable") or ALL_STAFF),
+        "effective_date": str(entry.get("effective_date") or ""),
+        "content": content,
+    }
+
+
+def chunk_lines(doc: Dict):
+    """规范化后的文档 -> (切片 JSONL 文本, 切片数)"""
+    chunks = make_chunks(doc)
+    lines = ""
+    if chunks:
+        # 同一文档的切片只有 text 不同（且 text 是最后一个字段）：其余字段只编码一次，
+        # 结果与逐个 json.dumps(chunk, ensure_ascii=False) 相同
+        head = _encode({k: v for k, v in chunks[0].items() if k != "text"})[:-1]
+        lines = "".join(f'{head}, "text": {_encode(c["text"])}}}\n' for c in chunks)
+    return lines, len(chunks)
+
+
+def process_entry(entry):
+    """
+    子进程内执行：规范化 + 哈希 + 切片 + 序列化，返回 (doc_id, 哈希, 切片 JSONL 文本, 切片数)；
+    无效条目返回 None。切片在子进程里就序列化好，主进程只需按顺序写入
+    """
+    doc = normalize(entry)
+    if doc is None:
+        return None
+    lines, n_chunks = chunk_lines(doc)
+    return doc["id"], doc_hash(doc), lines, n_chunks
+
+
+def iter_entries(sources: Iterable[str]) -> Iterator:
+    for path in sources:
+        yield from iter_source(path)
+
+
+def iter_docs(sources: Iterable[str], stats: Dict = None) -> Iterator[Dict]:
+    """逐篇产出规范化后的文档（不切片），无效条目跳过并计入 stats["skipped"]"""
+    stats = {} if stats is None else stats
+    stats.setdefault("skipped", 0)
+    for entry in iter_entries(sources):
+        doc = normalize(entry)
+        if doc is None:
+            stats["skipped"] += 1
+            continue
+        yield doc
+
+
+def process_batch(entries):
+    return [process_entry(e) for e in entries]
+
+
+def iter_chunked(sources: Iterable[str], workers: int = None, batch_size: int = 64, stats: Dict = None) -> Iterator:
+    """
+    逐篇产出 process_entry 的结果，顺序与来源中的顺序一致；无效条目跳过并计入 stats["skipped"]
+    workers > 1 时按 batch_size 篇一批提交到进程池并行切片；同时在途的批次不超过 workers * 2，
+    读取来源的速度受切片进度约束（Pool.imap 会一次性读完输入），内存有界
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = {} if stats is None else stats
+    stats.setdefault("skipped", 0)
+    entries = iter_entries(sources)
+    batches = iter(lambda: list(islice(entries, batch_size)), [])
+
+    def results():
+        if workers <= 1:
+            for batch in batches:
+                yield from process_batch(batch)
+            return
+        with Pool(workers) as pool:
+            pending = deque()
+            for batch in batches:
+                pending.append(pool.apply_async(process_batch, (batch,)))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().get()
+            while pending:
+                yield from pending.popleft().get()
+
+    for result in results():
+        if result is None:
+            stats["skipped"] += 1
+            continue
+        yield result
+
+
+def ingest(sources: List[str], chunk_path: str, workers: int = None) -> Dict:
+    """
+    把各来源的文档切片后写入 chunk_path（JSONL，先写临时文件再替换）；
+    doc_id 重复时保留先出现的一篇。返回 {"docs": {doc_id: 哈希}（按出现顺序）, "chunks", "skipped", "duplicates"}
+    """
+    docs, report = {}, {"chunks": 0, "skipped": 0, "duplicates": 0}
+    tmp = f"{chunk_path}.tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for doc_id, h, lines, n_chunks in iter_chunked(sources, workers, stats=report):
+            if doc_id in docs:
+                report["duplicates"] += 1
+                continue
+            docs[doc_id] = h
+            f.write(lines)
+            report["chunks"] += n_chunks
+    os.replace(tmp, chunk_path)
+    report["docs"] = docs
+    return report
+
+
+class ChunkFile:
+    """切片 JSONL 的只读视图：每次迭代都从磁盘流式读取，len() 为切片数；可多次遍历（如 BM25 构建）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._len = None
+
+    def __iter__(self) -> Iterator[Dict]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def __len__(self):
+        if self._len is None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._len = sum(1 for line in f if line.strip())
+        return self._len
+
+    def texts(self) -> Iterator[str]:
+        for c in self:
+            yield c["text"]
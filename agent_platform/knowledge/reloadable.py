@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+
+from agent_platform.knowledge.retriever import TfidfRAG, INDEX_PATH
+
+
+def retriever_backend(name: str):
+    """检索后端名 -> (检索器类, 默认索引目录)；可选 tfidf / bm25"""
+    if name == "tfidf":
+        return TfidfRAG, INDEX_PATH
+    if name == "bm25":
+        from agent_platform.knowledge.bm25 import BM25RAG, BM25_INDEX_PATH
+        return BM25RAG, BM25_INDEX_PATH
+    raise ValueError(f"未知的检索后端: {name}，可选: tfidf, bm25")
+
+
+class ReloadableRAG:
+    """
+    可热替换的检索器句柄：
+    - get() 返回当前生效的检索器；请求内拿到的引用在整个请求期间保持不变
+    - 每隔 check_interval 秒检查一次索引 manifest 的 mtime，变化时在后台线程加载新索引，
+      加载与预热完成后原子替换引用；加载期间请求继续使用旧索引，不阻塞、无延迟尖峰
+    - reload() 供管理接口主动触发；加载失败时保留旧索引并记录错误
+    - 替换后对旧检索器调用 close()（如有），释放其分片打分线程池
+    """
+
+    def __init__(self, index_path: str = INDEX_PATH, loader=TfidfRAG, check_interval: float = 2.0):
+        self.index_path = index_path
+        self.loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._current = None
+        self._mtime = None
+        self._failed_mtime = None
+        self._next_check = 0.0
+        self._loading = None
+        self.backend = getattr(loader, "__name__", str(loader))
+        self.stats = {"loads": 0, "failures": 0, "loaded_at": None, "load_ms": None, "last_error": None}
+        self._load()
+
+    @classmethod
+    def for_backend(cls, backend: str = "tfidf", index_path: str = None, **kwargs):
+        """按后端名创建句柄（见 retriever_backend），index_path 为空时用该后端的默认索引目录"""
+        loader, default_path = retriever_backend(backend)
+        return cls(index_path or default_path, loader=loader, **kwargs)
+
+    def _manifest_mtime(self):
+        try:
+            return os.stat(os.path.join(self.index_path, "manifest.json")).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self):
+        """加载并预热新索引，成功后替换当前引用；返回是否成功"""
+        mtime = self._manifest_mtime()
+        start = time.perf_counter()
+        try:
+            rag = self.loader(self.index_path)
+            # 预热：把 postings 页读入 page cache，避免替换后的首批请求触发缺页
+            if hasattr(rag, "warm"):
+                rag.warm()
+        except Exception as e:
+            with self._lock:
+                self._failed_mtime = mtime
+                self.stats["failures"] += 1
+                self.stats["last_error"] = str(e)
+            print(f"[RAG] 索引加载失败，继续使用当前索引: {e}")
+            return False
+        with self._lock:
+            old, self._current = self._current, rag
+            self._mtime = mtime
+            self.stats["loads"] += 1
+            self.stats["loaded_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            self.stats["load_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self.stats["last_error"] = None
+        # 仍持有旧实例的请求照常完成（close 后在当前线程打分）
+        if old is not None and hasattr(old, "close"):
+            old.close()
+        return True
+
+    def _reload_in_background(self):
+        with self._lock:
+            if self._loading is not None and self._loading.is_alive():
+                return self._loading
+            self._loading = threading.Thread(target=self._load, name="rag-reload", daemon=True)
+            self._loading.start()
+            return self._loading
+
+    def get(self):
+        """返回当前检索器（可能为 None）；到达检查周期且索引已变化时触发后台加载"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            mtime = self._manifest_mtime()
+            # 同一版本加载失败过就不再自动重试，等待索引再次变化或手动 reload()
+            if mtime is not None and mtime != self._mtime and mtime != self._failed_mtime:
+                self._reload_in_background()
+        return self._current
+
+    def reload(self, wait: bool = True, timeout: float = 60.0):
+        """主动重新加载索引；wait 时等待加载完成，返回 status()"""
+        thread = self._reload_in_background()
+        if wait:
+            thread.join(timeout)
+        return self.status()
+
+    @property
+    def version(self):
+        rag = self._current
+        return getattr(rag, "index_id", None) if rag is not None else None
+
+    def status(self):
+        rag = self._current
+        with self._lock:
+            loading = self._loading is not None and self._loading.is_alive()
+            return {
+                "index_version": self.version,
+                "backend": self.backend,
+                "index_path": self.index_path,
+                "n_chunks": len(rag.meta) if rag is not None else 0,
+                "loading": loading,
+                **self.stats,
+            }
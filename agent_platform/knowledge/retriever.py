@@ -1,32 +1,395 @@
-import os, json, joblib
+import os, json, threading, heapq
+from itertools import islice
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse as sp
+
+from agent_platform.knowledge.index_store import read_index, merge_shards
+from agent_platform.knowledge.chunk_meta import ChunkMeta
+from agent_platform.knowledge.vectorizer import QueryVectorizer
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
-INDEX_PATH = os.path.join(ROOT, "knowledge/tfidf_index.pkl")
+INDEX_PATH = os.path.join(ROOT, "knowledge/tfidf_index")
 CHUNK_PATH = os.path.join(ROOT, "knowledge/kb_chunks.jsonl")
+# applicable 为该值的切片对任何适用对象都生效
+ALL_STAFF = "全体员工"
+
+
+def top_k(rows: np.ndarray, scores: np.ndarray, k: int):
+    """
+    从候选 (rows, scores) 中取分数最高的 k 个，返回 (rows, scores)，按分数降序、行号升序排列
+    - 用 argpartition 做 O(n) 选择，只对选出的 k 个排序
+    - 分数并列时行号小者优先，保证结果确定（与分片 / 批量检索一致）
+    """
+    if k <= 0 or len(scores) == 0:
+        return rows[:0], scores[:0]
+    if len(scores) > k:
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)
+        ties = ties[np.argsort(rows[ties], kind="stable")][: k - len(above)]
+        sel = np.concatenate([above, ties])
+        rows, scores = rows[sel], scores[sel]
+    order = np.lexsort((rows, -scores))
+    return rows[order], scores[order]
+
+
+def merge_top_k(parts, k: int):
+    """
+    合并各分片的 top-k：parts 为 [(rows, scores)]，各自已按分数降序、行号升序排列（行号为全局行号）；
+    用堆做 k 路归并，排序规则与 top_k 相同，因此结果与不分片检索完全一致
+    """
+    if len(parts) == 1:
+        return parts[0]
+    merged = list(islice(heapq.merge(*[zip(-s, r) for r, s in parts]), k))
+    return (np.array([r for _, r in merged], dtype=np.int64),
+            np.array([-s for s, _ in merged], dtype=np.float64))
+
+
+POOLING = ("max", "sum", "mean_topn")
+
+
+def pool_documents(rows: np.ndarray, scores: np.ndarray, chunk_doc: np.ndarray, k: int,
+                   pooling: str = "max", top_n: int = 2, passages: int = 2):
+    """
+    把命中切片的得分按文档聚合，返回得分最高的 k 篇文档 [(文档得分, [(切片行号, 切片得分), ...])]
+    - 命中切片按 (文档行, 得分降序, 行号升序) 排好后，每篇文档是一段连续区间，
+      聚合用 reduceat / bincount 对所有文档一次算完
+    - pooling：max 取最高切片分；sum 求和；mean_topn 取最高 top_n 个切片分之和 / top_n（不足 top_n 个按 0 计）
+    - 每篇文档附带得分最高的 passages 个切片；文档得分并列时文档行小者优先
+    """
+    if pooling not in POOLING:
+        raise ValueError(f"不支持的 pooling: {pooling}，可选: {', '.join(POOLING)}")
+    if k <= 0 or len(rows) == 0:
+        return []
+    docs = np.asarray(chunk_doc)[rows]
+    order = np.lexsort((rows, -scores, docs))
+    docs, rows, scores = docs[order], rows[order], scores[order]
+    starts = np.flatnonzero(np.concatenate([[True], docs[1:] != docs[:-1]]))
+    if pooling == "max":
+        pooled = scores[starts]
+    elif pooling == "sum":
+        pooled = np.add.reduceat(scores, starts)
+    else:
+        group = np.cumsum(np.concatenate([[False], docs[1:] != docs[:-1]]))
+        rank = np.arange(len(docs)) - starts[group]
+        top = rank < top_n
+        pooled = np.bincount(group[top], weights=scores[top], minlength=len(starts)) / top_n
+    # 分组按文档行升序排列，组号即并列时的先后
+    groups, pooled = top_k(np.arange(len(starts)), pooled, k)
+    ends = np.concatenate([starts[1:], [len(docs)]])
+    results = []
+    for g, score in zip(groups, pooled):
+        lo, hi = starts[g], min(ends[g], starts[g] + passages)
+        results.append((float(score), [(int(r), float(s)) for r, s in zip(rows[lo:hi], scores[lo:hi])]))
+    return results
+
+
+def document_hits(meta, pooled):
+    """pool_documents 的结果 -> 与切片检索结果同结构的 dict，text 为最佳段落，passages 为各段落"""
+    hits = []
+    for score, passages in pooled:
+        m = meta[passages[0][0]]
+        hits.append({
+            "title": m["title"],
+            "doc_id": m["doc_id"],
+            "category": m["category"],
+            "effective_date": m["effective_date"],
+            "applicable": m["applicable"],
+            "text": m["text"],
+            "score": score,
+            "passages": [{"text": meta.text(r), "score": s} for r, s in passages],
+        })
+    return hits
+
+
+def build_vectorizer(vocab, idf, params: dict):
+    """按索引里保存的词表、idf 与参数还原查询向量化器（纯 NumPy 实现，只做 transform，不依赖 sklearn）"""
+    return QueryVectorizer(vocab, idf, params)
+
+
+def _date_key(value) -> int:
+    """'2024-01-01' / date -> 20240101；空值或无法解析时为 0（视为一直有效）"""
+    if isinstance(value, date):
+        return value.year * 10000 + value.month * 100 + value.day
+    try:
+        y, m, d = str(value).strip()[:10].split("-")
+        return int(y) * 10000 + int(m) * 100 + int(d)
+    except (ValueError, AttributeError):
+        return 0
+
+
+def parse_date(value) -> date:
+    """过滤条件中的日期：'YYYY-MM-DD' 或 date；无法解析（如 '2024-13-99'、'abc'）时抛出 ValueError"""
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        raise ValueError(f"effective_on 不是有效日期（YYYY-MM-DD）: {value}") from None
+
+
+class FilterIndex:
+    """
+    元数据过滤索引，直接在 ChunkMeta 的字典编码上计算，不解码字符串：
+    - category / applicable / effective_date：每个切片的编码（uint8/uint16）
+    - 过滤时先在字典上算出允许的编码，再用编码查表得到切片位图
+    filters 支持的键：
+    - category：str 或 str 列表，等值匹配（列表为任一）
+    - applicable：str 或 str 列表，匹配该适用对象或“全体员工”
+    - effective_on：'YYYY-MM-DD' 或 date，生效日期 <= X 的切片
+    """
+
+    KEYS = ("category", "applicable", "effective_on")
+
+    def __init__(self, meta: ChunkMeta):
+        self.n = len(meta)
+        self.codes = {field: meta.chunk_codes(field) for field in ("category", "applicable", "effective_date")}
+        self.values = {field: {v: code for code, v in enumerate(meta.values(field))}
+                       for field in ("category", "applicable")}
+        self.date_keys = np.array([_date_key(v) for v in meta.values("effective_date")], dtype=np.int64)
+
+    def _any_of(self, field, values):
+        if isinstance(values, str):
+            values = [values]
+        allowed = np.zeros(len(self.values[field]), dtype=bool)
+        for v in values:
+            if v in self.values[field]:
+                allowed[self.values[field][v]] = True
+        return allowed[self.codes[field]]
+
+    @classmethod
+    def validate(cls, filters: dict) -> dict:
+        """去掉空值并校验过滤条件，返回校验后的 filters；不支持的键或无效日期抛出 ValueError"""
+        filters = {k: v for k, v in (filters or {}).items() if v not in (None, "", [])}
+        unknown = set(filters) - set(cls.KEYS)
+        if unknown:
+            raise ValueError(f"不支持的过滤条件: {', '.join(sorted(unknown))}，可选: {', '.join(cls.KEYS)}")
+        if "effective_on" in filters:
+            parse_date(filters["effective_on"])
+        return filters
+
+    def mask(self, filters: dict):
+        """返回允许的切片位图；filters 为空时返回 None（不过滤）"""
+        filters = self.validate(filters)
+        if not filters:
+            return None
+        mask = np.ones(self.n, dtype=bool)
+        if "category" in filters:
+            mask &= self._any_of("category", filters["category"])
+        if "applicable" in filters:
+            values = [filters["applicable"]] if isinstance(filters["applicable"], str) else list(filters["applicable"])
+            mask &= self._any_of("applicable", values + [ALL_STAFF])
+        if "effective_on" in filters:
+            mask &= (self.date_keys <= _date_key(parse_date(filters["effective_on"])))[self.codes["effective_date"]]
+        return mask
+
+    @staticmethod
+    def key(filters: dict):
+        """过滤条件的规范化 key，用于缓存按条件裁剪后的 postings"""
+        items = []
+        for k, v in sorted((filters or {}).items()):
+            if v in (None, "", []):
+                continue
+            items.append((k, tuple(sorted(v)) if isinstance(v, (list, tuple, set)) else str(v)))
+        return tuple(items)
+
 
 class TfidfRAG:
-    def __init__(self, index_path: str = INDEX_PATH):
+    """
+    TF-IDF 检索，索引为 tools/build_kb_index.py 生成的目录（见 index_store）：
+    postings / idf 以 mmap 只读打开，多 worker 共享同一份 page cache；
+    仍兼容旧版 joblib pickle 索引（index_path 以 .pkl 结尾时）
+    search(filters=...) 先按元数据位图裁剪 postings 再打分，裁剪结果按过滤条件做 LRU 缓存，
+    过滤后的检索只访问满足条件的切片
+    分片索引（build_kb_index.py --shards N）的检索在线程池中并行打分各分片（scipy 稀疏乘法不持有 GIL），
+    再用堆合并各分片的 top-k，结果与不分片时相同
+    search_documents() 按 doc_id 聚合切片得分，返回文档及其最佳段落
+    close() 关闭分片打分的线程池（热替换后由 ReloadableRAG 对旧实例调用）
+    """
+
+    FILTER_CACHE_SIZE = 16
+
+    def __init__(self, index_path: str = INDEX_PATH, workers: int = None):
+        self.index_path = index_path
+        if index_path.endswith(".pkl"):
+            self._load_pickle(index_path)
+        else:
+            self._load_index(index_path)
+        self.filters = FilterIndex(self.meta)
+        self._filtered = OrderedDict()
+        self._filtered_lock = threading.Lock()
+        self._merged = None
+        self.workers = workers or min(len(self.shards), os.cpu_count() or 1)
+        self._pool = None
+        self._closed = False
+
+    def _load_index(self, index_path: str):
+        index = read_index(index_path)
+        self.manifest = index["manifest"]
+        self.index_id = self.manifest["index_id"]
+        # 倒排形式（词 -> 命中的切片），检索只访问查询词的 postings；[(起始行号, 分片 postings)]
+        self.shards = index["shards"]
+        self.meta = index["meta"]
+        self.vectorizer = build_vectorizer(index["vocab"], index["idf"], self.manifest["vectorizer"])
+
+    def _load_pickle(self, index_path: str):
+        import joblib
+
         blob = joblib.load(index_path)
-        self.pipe = blob["pipeline"]
-        self.X = blob["matrix"]
-        self.meta = blob["meta"]
-
-    def search(self, query: str, k: int = 3):
-        qv = self.pipe.transform([query])
-        sims = cosine_similarity(qv, self.X)[0]
-        idx = np.argsort(-sims)[:k]
+        self.manifest = {}
+        self.index_id = "legacy"
+        self.shards = [(0, sp.csr_matrix(blob["matrix"].T))]
+        self.meta = ChunkMeta.from_chunks(blob["meta"])
+        self.vectorizer = blob["pipeline"]
+
+    def warm(self):
+        """把各分片的 postings 读入 page cache"""
+        for _, postings in self.shards:
+            float(postings.data.sum())
+
+    @property
+    def postings(self):
+        """完整的 (n_features, n_chunks) postings；分片索引首次访问时拼接（会复制）"""
+        if self._merged is None:
+            self._merged = merge_shards(self.shards)
+        return self._merged
+
+    def _map(self, fn, shards):
+        """在各分片上执行 fn；单分片或已 close() 时直接在当前线程执行"""
+        if len(shards) == 1 or self.workers <= 1 or self._closed:
+            return [fn(shard) for shard in shards]
+        if self._pool is None:
+            with self._filtered_lock:
+                if self._pool is None and not self._closed:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rag-shard")
+        pool = self._pool
+        try:
+            if pool is None:
+                raise RuntimeError("closed")
+            futures = [pool.submit(fn, shard) for shard in shards]
+        except RuntimeError:
+            # 热替换前拿到旧实例的请求可能赶上 close()：线程池已关闭，退回当前线程执行
+            return [fn(shard) for shard in shards]
+        return [f.result() for f in futures]
+
+    def close(self):
+        """关闭线程池（不等待进行中的打分）；之后的检索在当前线程执行，可重复调用"""
+        with self._filtered_lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _shards_for(self, filters=None):
+        """按过滤条件裁剪后的各分片 postings（保持分片内行号），无过滤时即原分片"""
+        key = FilterIndex.key(filters)
+        if not key:
+            self.filters.mask(filters)  # 校验过滤条件
+            return self.shards
+        with self._filtered_lock:
+            if key in self._filtered:
+                self._filtered.move_to_end(key)
+                return self._filtered[key]
+        mask = self.filters.mask(filters)
+        shards = []
+        for offset, postings in self.shards:
+            keep = mask[offset:offset + postings.shape[1]][postings.indices]
+            # 保留的条目在各词 postings 中的前缀计数，即裁剪后的 indptr
+            indptr = np.concatenate([[0], np.cumsum(keep)])[postings.indptr].astype(postings.indptr.dtype)
+            shards.append((offset, sp.csr_matrix((postings.data[keep], postings.indices[keep], indptr),
+                                                 shape=postings.shape)))
+        with self._filtered_lock:
+            self._filtered[key] = shards
+            while len(self._filtered) > self.FILTER_CACHE_SIZE:
+                self._filtered.popitem(last=False)
+        return shards
+
+    def _score(self, qv, postings):
+        """
+        稀疏点积打分：向量已做 L2 归一，点积即余弦相似度；
+        只累加查询词的 postings，未命中任何查询词的切片不参与打分
+        """
+        terms = qv.indices
+        if len(terms) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        weights = sp.csr_matrix((qv.data, np.arange(len(terms)), [0, len(terms)]), shape=(1, len(terms)))
+        s = (weights @ postings[terms]).tocsr()
+        return s.indices.astype(np.int64), s.data
+
+    def _hit(self, i: int, score: float):
+        m = self.meta[i]
+        return {
+            "title": m["title"],
+            "doc_id": m["doc_id"],
+            "category": m["category"],
+            "effective_date": m["effective_date"],
+            "applicable": m["applicable"],
+            "text": m["text"],
+            "score": float(score)
+        }
+
+    def search(self, query: str, k: int = 3, filters: dict = None):
+        """
+        检索与 query 最相关的 k 个切片；filters 见 FilterIndex，例如
+        {"category": "travel", "applicable": "正式员工", "effective_on": "2024-06-01"}
+        """
+        shards = self._shards_for(filters)
+        qv = self.vectorizer.transform([query]).tocsr()
+
+        def run(shard):
+            offset, postings = shard
+            rows, scores = top_k(*self._score(qv, postings), k)
+            return rows + offset, scores
+
+        rows, scores = merge_top_k(self._map(run, shards), k)
+        return [self._hit(i, s) for i, s in zip(rows, scores)]
+
+    def search_documents(self, query: str, k: int = 3, filters: dict = None, pooling: str = "max",
+                         top_n: int = 2, passages: int = 2):
+        """
+        文档级检索：对全部命中切片打分后按 doc_id 聚合（见 pool_documents），返回最相关的 k 篇文档，
+        每篇附带得分最高的 passages 个段落；同一文档的多个切片不会挤占其他文档的名额
+        """
+        shards = self._shards_for(filters)
+        qv = self.vectorizer.transform([query]).tocsr()
+
+        def run(shard):
+            offset, postings = shard
+            rows, scores = self._score(qv, postings)
+            return rows + offset, scores
+
+        parts = self._map(run, shards)
+        rows, scores = np.concatenate([r for r, _ in parts]), np.concatenate([s for _, s in parts])
+        return document_hits(self.meta, pool_documents(rows, scores, self.meta.chunk_doc, k, pooling, top_n,
+                                                       passages))
+
+    def search_many(self, queries, k: int = 3, filters: dict = None):
+        """
+        批量检索：所有 query 一次向量化为稀疏矩阵，与倒排矩阵做一次稀疏矩阵乘，
+        再逐行取 top-k；返回与 queries 等长的结果列表，每项与 search() 的返回一致
+        """
+        queries = list(queries)
+        shards = self._shards_for(filters)
+        if not queries:
+            return []
+        Q = self.vectorizer.transform(queries).tocsr()
+
+        def run(shard):
+            offset, postings = shard
+            S = (Q @ postings).tocsr()
+            tops = []
+            for qi in range(len(queries)):
+                lo, hi = S.indptr[qi], S.indptr[qi + 1]
+                rows, scores = top_k(S.indices[lo:hi].astype(np.int64), S.data[lo:hi], k)
+                tops.append((rows + offset, scores))
+            return tops
+
+        per_shard = self._map(run, shards)
         results = []
-        for i in idx:
-            m = self.meta[i]
-            results.append({
-                "title": m["title"],
-                "doc_id": m["doc_id"],
-                "category": m["category"],
-                "effective_date": m["effective_date"],
-                "applicable": m["applicable"],
-                "text": m["text"],
-                "score": float(sims[i])
-            })
+        for qi in range(len(queries)):
+            rows, scores = merge_top_k([tops[qi] for tops in per_shard], k)
+            results.append([self._hit(i, s) for i, s in zip(rows, scores)])
         return results
@@ -0,0 +1,122 @@
+"""
+纯 NumPy / SciPy 的查询向量化器：按索引 manifest 中导出的词表、idf 与分词参数，
+复现 sklearn TfidfVectorizer(analyzer="word").transform（及其后的 L2 Normalizer），
+检索服务因此无需导入 sklearn
+"""
+import re
+import unicodedata
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def strip_accents_unicode(s: str) -> str:
+    try:
+        s.encode("ASCII", errors="strict")
+        return s
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", s)
+        return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def strip_accents_ascii(s: str) -> str:
+    return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
+
+
+STRIP_ACCENTS = {None: None, "unicode": strip_accents_unicode, "ascii": strip_accents_ascii}
+
+
+def word_ngrams(tokens, min_n: int, max_n: int):
+    """与 sklearn 的 _word_ngrams 顺序一致：先 unigram（min_n == 1 时），再按 n 递增"""
+    if max_n == 1:
+        return tokens
+    n_tokens = len(tokens)
+    out = list(tokens) if min_n == 1 else []
+    if min_n == 1:
+        min_n += 1
+    for n in range(min_n, min(max_n + 1, n_tokens + 1)):
+        for i in range(n_tokens - n + 1):
+            out.append(" ".join(tokens[i:i + n]))
+    return out
+
+
+def build_analyzer(params: dict):
+    """按 manifest 中的分词参数构造 analyzer：文本 -> 词项列表（lowercase -> strip_accents -> token_pattern -> n-gram）"""
+    if params.get("analyzer", "word") != "word":
+        raise ValueError(f"只支持 analyzer='word'，索引使用的是 {params.get('analyzer')}")
+    if params.get("strip_accents") not in STRIP_ACCENTS:
+        raise ValueError(f"不支持的 strip_accents: {params.get('strip_accents')}")
+    lowercase = params.get("lowercase", True)
+    strip_accents = STRIP_ACCENTS[params.get("strip_accents")]
+    token_re = re.compile(params.get("token_pattern", r"(?u)\b\w\w+\b"))
+    if token_re.groups > 1:
+        raise ValueError("token_pattern 最多只能有一个捕获组")
+    min_n, max_n = params.get("ngram_range", (1, 1))
+
+    def analyze(doc: str):
+        if lowercase:
+            doc = doc.lower()
+        if strip_accents is not None:
+            doc = strip_accents(doc)
+        return word_ngrams(token_re.findall(doc), min_n, max_n)
+
+    return analyze
+
+
+class QueryVectorizer:
+    """
+    只做 transform 的 TF-IDF 向量化器，接口与 sklearn 保持一致：
+    transform(docs) -> CSR (n_docs, n_features)，build_analyzer()，vocabulary_
+    params 即 manifest["vectorizer"]：lowercase / strip_accents / analyzer / token_pattern / ngram_range /
+    norm / use_idf / sublinear_tf / binary
+    """
+
+    def __init__(self, vocab, idf, params: dict):
+        if params.get("norm", "l2") not in (None, "l1", "l2"):
+            raise ValueError(f"不支持的 norm: {params.get('norm')}")
+        self.analyze = build_analyzer(params)
+        self.vocabulary_ = {t: i for i, t in enumerate(vocab)}
+        self.idf_ = None if idf is None else np.asarray(idf, dtype=np.float64)
+        self.norm = params.get("norm", "l2")
+        self.use_idf = params.get("use_idf", True)
+        self.sublinear_tf = params.get("sublinear_tf", False)
+        self.binary = params.get("binary", False)
+
+    def build_analyzer(self):
+        return self.analyze
+
+    def transform(self, docs) -> sp.csr_matrix:
+        vocab = self.vocabulary_
+        indices, data, indptr = [], [], [0]
+        for doc in docs:
+            counts = {}
+            for term in self.analyze(doc):
+                j = vocab.get(term)
+                if j is not None:
+                    counts[j] = counts.get(j, 0) + 1
+            for j in sorted(counts):
+                indices.append(j)
+                data.append(counts[j])
+            indptr.append(len(indices))
+
+        n_docs = len(indptr) - 1
+        data = np.asarray(data, dtype=np.float64)
+        indices = np.asarray(indices, dtype=np.int32)
+        if self.binary:
+            data[:] = 1.0
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1
+        if self.use_idf and self.idf_ is not None:
+            data *= self.idf_[indices]
+        if self.norm is not None and len(data):
+            rows = np.repeat(np.arange(n_docs), np.diff(indptr))
+            # bincount 按顺序逐项累加，与 sklearn 的逐行归一化结果一致
+            weights = data * data if self.norm == "l2" else np.abs(data)
+            norms = np.bincount(rows, weights=weights, minlength=n_docs)
+            if self.norm == "l2":
+                norms = np.sqrt(norms)
+            norms[norms == 0] = 1.0
+            data /= norms[rows]
+        return sp.csr_matrix((data, indices, np.asarray(indptr, dtype=np.int32)),
+                             shape=(n_docs, len(vocab)))
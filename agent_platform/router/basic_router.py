@@ -1,81 +1,132 @@
+import os
+import json
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from agent_platform.core.data_types import RouteDecision
+from agent_platform.router.keyword_automaton import KeywordAutomaton
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), "basic_rules.json")
+
+
 class BasicRouter:
-    def plan(self, query: str):
-        q = query.lower().replace(" ", "")
-
-        # === 请假类 ===
-        if any(k in q for k in ["请假", "休假", "年假", "病假", "婚假", "产假"]):
-            if any(k in q for k in ["还有", "剩", "几天", "多少", "余额"]):
-                return "/hr/leave/balance"
-            elif any(k in q for k in ["申请", "帮我", "请", "休", "从", "到"]):
-                return "/hr/leave/apply"
-            else:
-                return "/hr/policy"
-
-        # === 政策类 ===
-        if any(k in q for k in ["政策", "制度", "规定", "标准"]):
-            if "差旅" in q:
-                return "/hr/travel/policy"
-            return "/hr/policy"
-
-        # === 福利 ===
-        if any(k in q for k in ["福利", "补贴", "礼金", "礼品", "餐补", "交通补"]):
-            if any(k in q for k in ["申请", "领取", "拿", "发"]):
-                return "/hr/benefits/apply"
-            elif any(k in q for k in ["有哪些", "包含", "清单", "明细"]):
-                return "/hr/benefits/list"
-            else:
-                return "/hr/policy"
-
-        # === 报销 / 差旅 ===
-        if any(k in q for k in ["报销", "差旅", "出差", "住宿", "机票", "交通费", "餐费"]):
-            if any(k in q for k in ["申请", "帮我", "提交", "费用", "金额", "元"]):
-                if "出差" in q:
-                    return "/hr/travel/apply"
-                return "/hr/expense/submit"
-            else:
-                return "/hr/travel/policy"
-
-        # === 考勤 ===
-        if any(k in q for k in ["打卡", "签到", "上班", "出勤"]):
-            if any(k in q for k in ["查", "查看", "看下", "记录", "出勤状态"]):
-                return "/hr/attendance/status"
-            elif any(k in q for k in ["打卡", "签到", "上班"]):
-                return "/hr/attendance/checkin"
-
-        # === 工资 / 税务 ===
-        if any(k in q for k in ["工资", "薪资", "发薪", "到账"]):
-            return "/hr/payroll/info"
-        if any(k in q for k in ["个税", "社保", "五险一金", "扣税"]):
-            return "/hr/payroll/tax"
-
-        # === 档案 ===
-        if any(k in q for k in ["档案", "部门", "岗位", "入职"]):
-            if any(k in q for k in ["修改", "更新", "变更"]):
-                return "/hr/profile/update"
-            else:
-                return "/hr/profile/view"
-
-        # === 培训 ===
-        if any(k in q for k in ["培训", "课程", "学习"]):
-            if any(k in q for k in ["报名", "申请", "参加"]):
-                return "/hr/training/apply"
-            else:
-                return "/hr/training/list"
-
-        # === 招聘 ===
-        if any(k in q for k in ["招聘", "岗位", "职位", "在招"]):
-            return "/hr/recruitment/openings"
-        if any(k in q for k in ["内推", "推荐", "候选人"]):
-            return "/hr/recruitment/referral"
-
-        # === 合同 ===
-        if any(k in q for k in ["合同", "续签", "签约"]):
-            if any(k in q for k in ["查看", "查", "到期", "什么时候到期"]):
-                return "/hr/contract/view"
-            elif any(k in q for k in ["续签", "延长", "续"]):
-                return "/hr/contract/renew"
-            else:
-                return "/hr/contract/view"
+    """
+    规则路由器（LLM 前的低成本预筛）：
+    - 关键词规则表放在 basic_rules.json 中，按顺序匹配，先命中者优先
+    - 每条规则：any（触发关键词）、branches（有序子规则）、api（子规则都未命中时的结果，可为空表示继续匹配下一条）
+    - 所有关键词在初始化时编译进一个 Aho-Corasick 自动机，每个 query 只扫描一遍
+    - decide() 额外给出置信度：命中到具体子规则的比只命中规则默认结果的高，
+      其他规则指向不同 API 的命中（冲突）按比例压低置信度，走兜底时为 0
+    """
+
+    name = "basic"
+    # 命中到子规则 / 只命中规则默认结果时的基础置信度
+    BRANCH_CONFIDENCE = 0.9
+    DEFAULT_CONFIDENCE = 0.6
+
+    def __init__(self, rules_path: str = RULES_PATH):
+        with open(rules_path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+
+        self.fallback = spec.get("fallback", "/hr/policy")
+        keywords = []
+        self._collect_keywords(spec["rules"], keywords)
+        self.automaton = KeywordAutomaton(keywords)
+        self.rules = [self._compile(r) for r in spec["rules"]]
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return (query or "").lower().replace(" ", "")
+
+    def _collect_keywords(self, rules, keywords: List[str]):
+        for r in rules:
+            keywords.extend(self._normalize(k) for k in r.get("any", []))
+            self._collect_keywords(r.get("branches", []), keywords)
 
+    def _compile(self, rule: Dict) -> Dict:
+        """把规则里的关键词替换为自动机中的关键词编号集合"""
+        ids = frozenset(self.automaton.id_of(self._normalize(k)) for k in rule.get("any", []) if k)
+        return {
+            "name": rule.get("name", ""),
+            "ids": ids,
+            "branches": [self._compile(b) for b in rule.get("branches", [])],
+            "api": rule.get("api"),
+        }
+
+    def _resolve(self, rule: Dict, hits: FrozenSet[int]) -> Optional[str]:
+        for b in rule["branches"]:
+            if b["ids"].isdisjoint(hits):
+                continue
+            api = self._resolve(b, hits)
+            if api:
+                return api
+        return rule["api"]
+
+    def _route(self, hits: FrozenSet[int]) -> str:
+        for rule in self.rules:
+            if rule["ids"].isdisjoint(hits):
+                continue
+            api = self._resolve(rule, hits)
+            if api:
+                return api
         # === 兜底 ===
-        return "/hr/policy"
+        return self.fallback
+
+    def _resolve_scored(self, rule: Dict, hits: FrozenSet[int]) -> Tuple[Optional[str], int]:
+        """同 _resolve，另外返回所经子规则上命中的关键词数（0 表示用的是规则自身的默认结果）"""
+        for b in rule["branches"]:
+            n = len(b["ids"] & hits)
+            if not n:
+                continue
+            api, deeper = self._resolve_scored(b, hits)
+            if api:
+                return api, n + deeper
+        return rule["api"], 0
+
+    def _decide(self, hits: FrozenSet[int]) -> RouteDecision:
+        resolved = []  # (API, 规则名, 命中关键词数, 是否命中子规则)
+        for rule in self.rules:
+            n = len(rule["ids"] & hits)
+            if not n:
+                continue
+            api, branch_hits = self._resolve_scored(rule, hits)
+            if api:
+                resolved.append((api, rule["name"], n + branch_hits, branch_hits > 0))
+        if not resolved:
+            return RouteDecision(self.fallback, 0.0, tier=self.name, reason="fallback")
+
+        api, name, _, specific = resolved[0]
+        support = sum(r[2] for r in resolved if r[0] == api)
+        conflicts = sum(r[2] for r in resolved if r[0] != api)
+        base = self.BRANCH_CONFIDENCE if specific else self.DEFAULT_CONFIDENCE
+        candidates = {}
+        for r in resolved:
+            candidates[r[0]] = candidates.get(r[0], 0) + r[2]
+        return RouteDecision(
+            api,
+            round(base * support / (support + conflicts), 3),
+            tier=self.name,
+            reason=name,
+            candidates=sorted(((a, round(n / (support + conflicts), 3)) for a, n in candidates.items()),
+                              key=lambda c: -c[1]),
+        )
+
+    def plan(self, query: str):
+        return self._route(self.automaton.find_ids(self._normalize(query)))
+
+    def decide(self, query: str) -> RouteDecision:
+        """路由并给出置信度（0~1），供级联路由判断是否需要交给 LLM"""
+        return self._decide(self.automaton.find_ids(self._normalize(query)))
+
+    def plan_many(self, queries: List[str]) -> List[str]:
+        """
+        批量路由：复用同一个自动机，重复 query 只计算一次，结果顺序与输入一致
+        """
+        memo: Dict[str, str] = {}
+        results = []
+        for query in queries:
+            q = self._normalize(query)
+            api = memo.get(q)
+            if api is None:
+                api = memo[q] = self._route(self.automaton.find_ids(q))
+            results.append(api)
+        return results
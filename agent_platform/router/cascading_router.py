@@ -0,0 +1,101 @@
+import threading
+from typing import Any, Dict, List
+
+from agent_platform.core.data_types import RouteDecision
+from agent_platform.utils.config import Config
+
+
+class CascadingRouter:
+    """
+    级联路由器：按顺序询问各层（如 BasicRouter -> LLMRouter），
+    某层给出的置信度达到阈值即采用，不再询问后面的层；大部分意图明确的 query 不会走到 LLM
+    - 每层需提供 name 与 decide(query) -> RouteDecision
+    - 所有层都未达到阈值时：采用置信度最高的结果（同分取靠前的层）；最后一层出错时同样回退到已有结果
+    - stats() 给出各层最终处理的请求占比、各层把请求交给下一层的次数，以及各层自身的统计（detail）
+    """
+
+    name = "cascade"
+
+    def __init__(self, tiers: List[Any], threshold: float = Config.ROUTER_CONFIDENCE_THRESHOLD):
+        if not tiers:
+            raise ValueError("CascadingRouter 至少需要一层路由")
+        self.tiers = tiers
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.total = 0
+        self.handled = {t.name: 0 for t in self.tiers}
+        self.escalated = {t.name: 0 for t in self.tiers}
+        self.errors = {t.name: 0 for t in self.tiers}
+
+    def _record(self, decision: RouteDecision, asked: List[str], failed: List[str]):
+        with self._lock:
+            self.total += 1
+            self.handled[decision.tier] += 1
+            for name in asked[:-1]:
+                self.escalated[name] += 1
+            for name in failed:
+                self.errors[name] += 1
+
+    def decide(self, query: str) -> RouteDecision:
+        best, asked, failed = None, [], []
+        for i, tier in enumerate(self.tiers):
+            asked.append(tier.name)
+            try:
+                decision = tier.decide(query)
+            except Exception:
+                # 只有前面已经有结果时才吞掉异常（通常是 LLM 调用失败）
+                if best is None or i == 0:
+                    raise
+                failed.append(tier.name)
+                continue
+            decision.tier = tier.name
+            if decision.confidence >= self.threshold:
+                best = decision
+                break
+            if best is None or decision.confidence > best.confidence:
+                best = decision
+        self._record(best, asked, failed)
+        return best
+
+    def plan(self, query: str):
+        return self.decide(query).api
+
+    def reload_registry(self):
+        for tier in self.tiers:
+            if hasattr(tier, "reload_registry"):
+                tier.reload_registry()
+
+    def cache_stats(self):
+        for tier in self.tiers:
+            if hasattr(tier, "cache_stats"):
+                return tier.cache_stats()
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.total
+            result = {
+                "threshold": self.threshold,
+                "total": total,
+                "tiers": {
+                    name: {
+                        "handled": self.handled[name],
+                        "share": round(self.handled[name] / total, 4) if total else 0.0,
+                        "escalated": self.escalated[name],
+                        "errors": self.errors[name],
+                    }
+                    for name in self.handled
+                },
+            }
+        # 各层自身的统计（如 LLM 路由的缓存命中与 prompt token 节省）
+        for tier in self.tiers:
+            if hasattr(tier, "stats"):
+                result["tiers"][tier.name]["detail"] = tier.stats()
+        return result
+
+    def reset_stats(self):
+        with self._lock:
+            self._reset_counters()
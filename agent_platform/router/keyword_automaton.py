@@ -0,0 +1,75 @@
+from typing import Dict, FrozenSet, Iterable, List
+
+
+class KeywordAutomaton:
+    """
+    多模式关键词匹配自动机（Aho-Corasick）：
+    - 构建时把所有关键词编译成一张确定性状态转移表
+    - 匹配时对文本只扫描一遍，返回命中的全部关键词编号（含重叠匹配）
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for k in keywords:
+            if k and k not in self._ids:
+                self._ids[k] = len(self.keywords)
+                self.keywords.append(k)
+        self._build()
+
+    def id_of(self, keyword: str) -> int:
+        return self._ids[keyword]
+
+    def _build(self):
+        # 1) 构建 trie
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for kid, word in enumerate(self.keywords):
+            s = 0
+            for ch in word:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[s][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                s = nxt
+            out[s].append(kid)
+
+        # 2) BFS 计算失败指针，同时把 trie 补全为 DFA，匹配时无需回溯
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(g) for g in goto]
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            s = queue[head]
+            head += 1
+            out[s].extend(out[fail[s]])
+            for ch, t in goto[s].items():
+                f = fail[s]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[t] = goto[f].get(ch, 0)
+                queue.append(t)
+            # 继承失败状态上的转移（失败状态更浅，已先处理完毕）
+            if s:
+                for ch, t in delta[fail[s]].items():
+                    delta[s].setdefault(ch, t)
+
+        self._delta = delta
+        self._out = [frozenset(o) for o in out]
+
+    def find_ids(self, text: str) -> FrozenSet[int]:
+        """一次扫描返回 text 中出现过的所有关键词编号"""
+        delta, out = self._delta, self._out
+        s = 0
+        hits = set()
+        for ch in text:
+            s = delta[s].get(ch, 0)
+            if out[s]:
+                hits |= out[s]
+        return frozenset(hits)
+
+    def find(self, text: str) -> List[str]:
+        """返回 text 中出现过的关键词（按编号顺序）"""
+        return [self.keywords[i] for i in sorted(self.find_ids(text))]
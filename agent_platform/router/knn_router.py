@@ -0,0 +1,155 @@
+import os
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from agent_platform.core.data_types import RouteDecision
+from agent_platform.utils.text import normalize_query
+
+REGISTRY_PATH = os.path.join(os.path.dirname(__file__), "../injection/api_registry.json")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = (1, 3)) -> Dict[str, int]:
+    """规范化后的字符 n-gram 词频（中文不分词，直接按字切）"""
+    t = _NON_WORD.sub("", normalize_query(text))
+    counts: Dict[str, int] = {}
+    lo, hi = ngram_range
+    for n in range(lo, hi + 1):
+        for i in range(len(t) - n + 1):
+            g = t[i:i + n]
+            counts[g] = counts.get(g, 0) + 1
+    return counts
+
+
+@dataclass(frozen=True)
+class _KNNIndex:
+    """fit 的结果；整体替换，检索时只读取一份快照，热加载不会混用新旧状态"""
+    apis: List[Dict]
+    api_names: List[str]
+    idf: Dict[str, float]
+    unseen_idf: float
+    postings: Dict[str, List[Tuple[int, float]]]
+    n_rows: int
+    positive_rows: List[List[int]]
+    negative_rows: List[List[int]]
+
+
+class KNNRouter:
+    """
+    本地近邻路由器：用 api_registry.json 中的示例训练，不访问网络
+    - 启动时把每个 API 的 positive 示例（以及 purpose 描述）向量化为字符 n-gram TF-IDF（L2 归一），
+      建成 n-gram -> [(示例行, 权重)] 的倒排表；查询只累加与示例共有的 n-gram，计算余弦相似度
+    - API 得分 = 与其 positive 示例最相似的 k 个的平均相似度 - negative_weight * 与其 negative 示例的最大相似度
+      （negative 示例是“看起来像但不属于该 API”的问题）
+    - decide() 的置信度 = 第一名领先第二名的比例 (top - second) / top，
+      第一名得分低于 min_similarity 时再按比例压低：与示例几乎相同时接近 1，两个 API 难分或都不像时接近 0
+    """
+
+    name = "knn"
+
+    def __init__(self, registry_path: str = REGISTRY_PATH, apis: List[Dict] = None, ngram_range=(1, 3),
+                 k: int = 1, negative_weight: float = 0.5, top_n: int = 3, min_similarity: float = 0.2):
+        self.registry_path = registry_path
+        self.ngram_range = tuple(ngram_range)
+        self.k = k
+        self.negative_weight = negative_weight
+        self.top_n = top_n
+        self.min_similarity = min_similarity
+        if apis is None:
+            with open(registry_path, "r", encoding="utf-8") as f:
+                apis = json.load(f)
+        self.fit(apis)
+
+    def fit(self, apis: List[Dict]):
+        """由注册表构建倒排表；构建完成后整体替换，可在服务中途调用"""
+        self._index = self._build_index(apis)
+
+    @property
+    def apis(self) -> List[Dict]:
+        return self._index.apis
+
+    @property
+    def api_names(self) -> List[str]:
+        return self._index.api_names
+
+    def _build_index(self, apis: List[Dict]) -> _KNNIndex:
+        names, rows = [], []  # rows: (API 序号, 是否 negative, 文本)
+        for i, api in enumerate(apis):
+            names.append(api["api"])
+            examples = api.get("examples", {})
+            for text in [api.get("purpose", "")] + list(examples.get("positive", [])):
+                if text:
+                    rows.append((i, False, text))
+            for text in examples.get("negative", []):
+                rows.append((i, True, text))
+
+        grams = [char_ngrams(text, self.ngram_range) for _, _, text in rows]
+        df: Dict[str, int] = {}
+        for g in grams:
+            for t in g:
+                df[t] = df.get(t, 0) + 1
+        n = len(rows)
+        # 与 sklearn 的 smooth_idf 相同；示例中没出现过的 n-gram 取最大 idf（只影响查询向量的范数）
+        idf = {t: math.log((1 + n) / (1 + d)) + 1 for t, d in df.items()}
+        unseen_idf = math.log(1 + n) + 1
+
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        for row, g in enumerate(grams):
+            vec = {t: c * idf[t] for t, c in g.items()}
+            norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+            for t, w in vec.items():
+                postings.setdefault(t, []).append((row, w / norm))
+
+        positive_rows = [[] for _ in names]
+        negative_rows = [[] for _ in names]
+        for row, (i, negative, _) in enumerate(rows):
+            (negative_rows if negative else positive_rows)[i].append(row)
+
+        return _KNNIndex(apis, names, idf, unseen_idf, postings, n, positive_rows, negative_rows)
+
+    def reload_registry(self):
+        with open(self.registry_path, "r", encoding="utf-8") as f:
+            self.fit(json.load(f))
+
+    def _similarities(self, index: _KNNIndex, query: str) -> List[float]:
+        grams = char_ngrams(query, self.ngram_range)
+        idf, unseen, postings = index.idf, index.unseen_idf, index.postings
+        vec = {t: c * idf.get(t, unseen) for t, c in grams.items()}
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        sims = [0.0] * index.n_rows
+        for t, w in vec.items():
+            for row, ew in postings.get(t, ()):
+                sims[row] += w * ew
+        return [s / norm for s in sims]
+
+    def rank(self, query: str) -> List[Tuple[str, float]]:
+        """所有 API 按得分降序排列：[(API 路径, 得分)]"""
+        index = self._index
+        sims = self._similarities(index, query)
+        k = self.k
+        scored = []
+        for name, pos, neg in zip(index.api_names, index.positive_rows, index.negative_rows):
+            best = sorted((sims[r] for r in pos), reverse=True)[:k]
+            score = sum(best) / len(best) if best else 0.0
+            if neg:
+                score -= self.negative_weight * max(sims[r] for r in neg)
+            scored.append((name, round(score, 4)))
+        scored.sort(key=lambda s: -s[1])
+        return scored
+
+    def plan(self, query: str):
+        return self.rank(query)[0][0]
+
+    def decide(self, query: str) -> RouteDecision:
+        ranked = self.rank(query)
+        top = ranked[0][1]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        if top <= 0:
+            confidence = 0.0
+        else:
+            confidence = (top - max(second, 0.0)) / top * min(1.0, top / self.min_similarity)
+        return RouteDecision(ranked[0][0], round(confidence, 3), tier=self.name,
+                             candidates=ranked[:self.top_n])
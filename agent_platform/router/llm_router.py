@@ -3,10 +3,112 @@ import json
 from openai import OpenAI
 from dotenv import load_dotenv
 import time
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from agent_platform.core.data_types import RouteDecision
+from agent_platform.router.knn_router import KNNRouter
+from agent_platform.router.route_cache import RouteCache, registry_fingerprint
+from agent_platform.utils.config import Config
+from agent_platform.utils.text import estimate_tokens, normalize_query
 load_dotenv()
 
+SYSTEM_PROMPT = "你是一个精确的 API 分类助手。"
+SYSTEM_TOKENS = estimate_tokens(SYSTEM_PROMPT)
+FALLBACK_API = "/hr/policy"
+# prompt = PROMPT_HEAD + API 说明行 + PROMPT_MIDDLE + “用户问题” + PROMPT_TAIL
+PROMPT_HEAD = """
+你是一个智能HR系统的路由规划器（API Router）。
+下面是可用的API及其功能：
+"""
+PROMPT_MIDDLE = """
+
+请根据用户的输入，选择最合适的API路径（只输出路径字符串，不解释）。
+
+用户问题：
+"""
+PROMPT_TAIL = """
+
+输出格式：
+仅输出一个API路径，例如：
+/hr/leave/balance
+"""
+# 批量路由：prompt = PROMPT_HEAD + API 说明行 + BATCH_PROMPT_MIDDLE + 编号问题 + BATCH_PROMPT_TAIL
+BATCH_PROMPT_MIDDLE = """
+
+下面有多个编号的用户问题，请为每个问题分别选择最合适的API路径。
+
+用户问题：
+"""
+BATCH_PROMPT_TAIL = """
+
+输出格式：
+只输出一个 JSON 对象，键为问题编号，值为API路径，不要解释，例如：
+{"1": "/hr/leave/balance", "2": "/hr/policy"}
+"""
+
+
+def clean_path(text: str) -> str:
+    """去掉 LLM 输出中 API 路径两侧的格式符号"""
+    parts = (text or "").strip().split()
+    return parts[0].strip("`'\"，。 ") if parts else ""
+
+
+def parse_batch_answer(text: str, n: int) -> Dict[int, str]:
+    """
+    解析批量路由的输出：{"1": "/hr/...", ...}（也接受按顺序排列的路径数组），可带 ```json 代码块；
+    返回 {编号: 路径}，只保留编号在 1..n 内、值像 API 路径的项，无法解析时返回空字典
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    items = enumerate(data, 1) if isinstance(data, list) else data.items()
+    answers = {}
+    for key, value in items:
+        try:
+            i = int(key)
+        except (TypeError, ValueError):
+            continue
+        path = clean_path(value) if isinstance(value, str) else ""
+        if 1 <= i <= n and path.startswith("/"):
+            answers[i] = path
+    return answers
+
+
+@dataclass(frozen=True)
+class _RegistryState:
+    """
+    由注册表派生的全部状态（预选器、prompt 片段、缓存 fingerprint）；
+    reload_registry 先构建完整的新状态再一次赋值替换，每次路由只读取同一份快照
+    """
+    apis: List[Dict]
+    preselector: Optional[KNNRouter]
+    prompt_parts: Dict
+    fingerprint: str
+
+
 class LLMRouter:
-    def __init__(self, model="moonshot-v1-8k", registry_path="agent_platform/injection/api_registry.json"):
+    """
+    LLM 路由器：
+    - candidates > 0 时先用本地近邻路由（KNNRouter）选出最可能的 candidates 个 API（另加兜底的 /hr/policy），
+      prompt 中只列出这些候选，prompt 长度不再随注册表线性增长；candidates = 0 时列出全部 API
+    - 每个 API 的说明行与列出全部 API 时的 prompt 前缀按注册表版本预先生成，reload_registry 时重建
+      （与预选器、缓存 fingerprint 一起整体替换，并发路由不会混用新旧注册表）
+    - prompt_stats() 统计实际发送的 prompt token 数，以及相对列出全部 API 节省的 token 数（按 estimate_tokens 估算）
+    - plan_batch() 把多条问题编号后放进同一个 prompt，一次调用得到 JSON 形式的全部结果，
+      API 列表只出现一次；解析失败或结果无效的条目再逐条调用 plan 重试
+    """
+    name = "llm"
+
+    def __init__(self, model="moonshot-v1-8k", registry_path="agent_platform/injection/api_registry.json",
+                 cache: RouteCache = None, use_cache: bool = Config.ROUTE_CACHE_ENABLED,
+                 candidates: int = Config.ROUTER_LLM_CANDIDATES):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("请先设置环境变量 OPENAI_API_KEY")
@@ -18,43 +120,233 @@ class LLMRouter:
         )
 
         self.model = model
+        self.registry_path = registry_path
+        self.candidates = candidates
         with open(registry_path, "r", encoding="utf-8") as f:
-            self.apis = json.load(f)
+            self._registry = self._build_registry(json.load(f))
+        self._reload_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._prompt_counts = {"requests": 0, "prompt_tokens": 0, "full_prompt_tokens": 0, "saved_tokens": 0,
+                               "off_candidates": 0, "batch_calls": 0, "batch_queries": 0, "batch_retries": 0}
+
+        # 路由缓存：规范化 query -> API 路径；模型或注册表变化时自动失效
+        fingerprint = self._registry.fingerprint
+        if cache is not None:
+            cache.set_fingerprint(fingerprint)
+        elif use_cache:
+            cache = RouteCache(
+                Config.ROUTE_CACHE_PATH,
+                fingerprint,
+                max_size=Config.ROUTE_CACHE_SIZE,
+                ttl=Config.ROUTE_CACHE_TTL
+            )
+        self.cache = cache
+
+    @property
+    def apis(self) -> List[Dict]:
+        return self._registry.apis
+
+    @property
+    def preselector(self) -> Optional[KNNRouter]:
+        return self._registry.preselector
+
+    @property
+    def _prompt_parts(self) -> Dict:
+        return self._registry.prompt_parts
+
+    def reload_registry(self):
+        """重新读取 API 注册表；内容变化时路由缓存随之失效"""
+        with open(self.registry_path, "r", encoding="utf-8") as f:
+            state = self._build_registry(json.load(f))
+        with self._reload_lock:
+            self._registry = state
+            if self.cache is not None:
+                self.cache.set_fingerprint(state.fingerprint)
+
+    def _build_registry(self, apis: List[Dict]) -> _RegistryState:
+        """按注册表构建预选器，并预先生成每个 API 的说明行与列出全部 API 的 prompt 前缀"""
+        lines = {api["api"]: f"{api['api']}：{api['purpose']}" for api in apis}
+        full_prefix = PROMPT_HEAD + "\n".join(lines.values()) + PROMPT_MIDDLE
+        prompt_parts = {
+            "lines": lines,
+            "line_tokens": {api: estimate_tokens(line) for api, line in lines.items()},
+            "full_prefix": full_prefix,
+            "full_prefix_tokens": estimate_tokens(full_prefix),
+        }
+        preselector = KNNRouter(self.registry_path, apis=apis) if self.candidates > 0 else None
+        return _RegistryState(apis, preselector, prompt_parts, registry_fingerprint(self.model, apis))
+
+    def _candidate_apis(self, query: str, state: _RegistryState = None):
+        """近邻路由得分最高的 candidates 个 API，外加兜底 API；不做预选时返回 None"""
+        state = state or self._registry
+        lines = state.prompt_parts["lines"]
+        if state.preselector is None or self.candidates >= len(lines):
+            return None
+        picked = [api for api, _ in state.preselector.rank(query)[:self.candidates]]
+        if FALLBACK_API in lines and FALLBACK_API not in picked:
+            picked.append(FALLBACK_API)
+        return picked
+
+    @staticmethod
+    def _full_tokens(state: _RegistryState, suffix: str) -> int:
+        return state.prompt_parts["full_prefix_tokens"] + estimate_tokens(suffix) + SYSTEM_TOKENS
+
+    def build_prompt(self, query: str, state: _RegistryState = None):
+        """返回 (prompt, 候选 API 列表或 None, 实际 prompt token 数, 列出全部 API 时的 token 数)，token 数含 system prompt"""
+        state = state or self._registry
+        parts = state.prompt_parts
+        suffix = f"“{query}”{PROMPT_TAIL}"
+        full_tokens = self._full_tokens(state, suffix)
+        picked = self._candidate_apis(query, state)
+        if picked is None:
+            return parts["full_prefix"] + suffix, None, full_tokens, full_tokens
+        prompt = PROMPT_HEAD + "\n".join(parts["lines"][api] for api in picked) + PROMPT_MIDDLE + suffix
+        saved = sum(parts["line_tokens"].values()) - sum(parts["line_tokens"][api] for api in picked)
+        return prompt, picked, full_tokens - saved, full_tokens
+
+    def build_batch_prompt(self, queries: List[str], state: _RegistryState = None):
+        """
+        多条问题的 prompt：候选 API 取各条问题候选的并集（按注册表顺序）；
+        返回 (prompt, 候选 API 列表或 None, 实际 prompt token 数, 逐条列出全部 API 调用时的 token 总数)
+        """
+        state = state or self._registry
+        lines = state.prompt_parts["lines"]
+        questions = [" ".join(q.split()) for q in queries]
+        numbered = "\n".join(f"{i}. {q}" for i, q in enumerate(questions, 1))
+        picked = None
+        if state.preselector is not None:
+            union = set()
+            for q in questions:
+                union.update(self._candidate_apis(q, state) or lines)
+            if len(union) < len(lines):
+                picked = [api for api in lines if api in union]
+        options = "\n".join(lines[api] for api in picked) if picked else "\n".join(lines.values())
+        prompt = PROMPT_HEAD + options + BATCH_PROMPT_MIDDLE + numbered + BATCH_PROMPT_TAIL
+        full_tokens = sum(self._full_tokens(state, f"“{q}”{PROMPT_TAIL}") for q in questions)
+        return prompt, picked, estimate_tokens(prompt) + SYSTEM_TOKENS, full_tokens
+
+    def _record_batch(self, n_queries: int, retries: int):
+        with self._stats_lock:
+            c = self._prompt_counts
+            c["batch_calls"] += 1
+            c["batch_queries"] += n_queries
+            c["batch_retries"] += retries
+
+    def _record_prompt(self, tokens: int, full_tokens: int, off_candidates: bool):
+        with self._stats_lock:
+            c = self._prompt_counts
+            c["requests"] += 1
+            c["prompt_tokens"] += tokens
+            c["full_prompt_tokens"] += full_tokens
+            c["saved_tokens"] += full_tokens - tokens
+            c["off_candidates"] += int(off_candidates)
+
+    def prompt_stats(self):
+        """实际调用 LLM 的次数、prompt token 数（估算）及预选节省的 token 数"""
+        with self._stats_lock:
+            c = dict(self._prompt_counts)
+        n = c["requests"]
+        c["candidates"] = self.candidates
+        c["saved_per_request"] = round(c["saved_tokens"] / n, 1) if n else 0.0
+        c["saved_ratio"] = round(c["saved_tokens"] / c["full_prompt_tokens"], 4) if c["full_prompt_tokens"] else 0.0
+        c["queries_per_batch"] = round(c["batch_queries"] / c["batch_calls"], 1) if c["batch_calls"] else 0.0
+        return c
+
+    def stats(self):
+        return {"cache": self.cache_stats(), "prompt": self.prompt_stats()}
+
+    def cache_stats(self):
+        return self.cache.stats() if self.cache else None
+
+    def decide(self, query: str) -> RouteDecision:
+        """LLM 给出的路径在注册表中时置信度为 1，否则为 0（级联路由会回退到前面各层的结果）"""
+        state = self._registry
+        api = self._plan(query, state)
+        known = api in state.prompt_parts["lines"]
+        return RouteDecision(api, 1.0 if known else 0.0, tier=self.name)
 
     def plan(self, query: str):
-        # 构造选项列表（简化且结构化）
-        options = "\n".join(
-            [f"{api['api']}：{api['purpose']}" for api in self.apis]
-        )
+        return self._plan(query, self._registry)
 
-        prompt = f"""
-你是一个智能HR系统的路由规划器（API Router）。
-下面是所有可用的API及其功能：
-{options}
+    def _plan(self, query: str, state: _RegistryState):
+        # 缓存读写都带上本次使用的注册表版本，热加载前后的结果不会串到另一版缓存里
+        if self.cache is None:
+            return self._plan_llm(query, state)
 
-请根据用户的输入，选择最合适的API路径（只输出路径字符串，不解释）。
+        key = normalize_query(query)
+        cached = self.cache.get(key, state.fingerprint)
+        if cached is not None:
+            return cached
 
-用户问题：
-“{query}”
+        text = self._plan_llm(query, state)
+        # 只缓存注册表中存在的 API：幻觉出的路径不能在 TTL 内被反复重放
+        if text in state.prompt_parts["lines"]:
+            self.cache.put(key, text, state.fingerprint)
+        return text
 
-输出格式：
-仅输出一个API路径，例如：
-/hr/leave/balance
-"""
+    def plan_batch(self, queries: List[str], batch_size: int = Config.ROUTER_BATCH_SIZE) -> List[str]:
+        """
+        批量路由：结果顺序与输入一致；规范化后相同的问题只路由一次，已缓存的不再调用 LLM，
+        其余每 batch_size 条合并为一次调用；批量结果中缺失或无效的条目逐条重试
+        """
+        state = self._registry
+        results: List[str] = [None] * len(queries)
+        pending: Dict[str, List[int]] = {}
+        for i, query in enumerate(queries):
+            key = normalize_query(query)
+            cached = self.cache.get(key, state.fingerprint) if self.cache is not None and key not in pending else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(key, []).append(i)
+
+        keys = list(pending)
+        for start in range(0, len(keys), max(1, batch_size)):
+            chunk = keys[start:start + max(1, batch_size)]
+            texts = [queries[pending[k][0]] for k in chunk]
+            answers = self._plan_llm_batch(texts, state) if len(chunk) > 1 else {}
+            retries = 0
+            for j, key in enumerate(chunk, 1):
+                api = answers.get(j)
+                if api is None:
+                    api = self._plan_llm(texts[j - 1], state)
+                    retries += len(chunk) > 1
+                if api in state.prompt_parts["lines"] and self.cache is not None:
+                    self.cache.put(key, api, state.fingerprint)
+                for i in pending[key]:
+                    results[i] = api
+            if len(chunk) > 1:
+                self._record_batch(len(chunk), retries)
+        return results
 
+    def _chat(self, prompt: str) -> str:
         # 使用 responses.create（新 SDK 写法）
         resp = self.client.chat.completions.create(
             model=self.model,
             messages=[
-                {"role": "system", "content": "你是一个精确的 API 分类助手。"},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
             ],
             temperature=0,
         )
         # time.sleep(20)  # 移除不必要的延迟
+        return resp.choices[0].message.content.strip()
+
+    def _plan_llm_batch(self, queries: List[str], state: _RegistryState) -> Dict[int, str]:
+        """一次调用路由多条问题，返回 {编号(从 1 开始): 路径}；注册表中没有的路径视为无效，交给逐条重试"""
+        prompt, _, tokens, full_tokens = self.build_batch_prompt(queries, state)
+        try:
+            text = self._chat(prompt)
+        except Exception as e:
+            print(f"[LLMRouter] 批量路由调用失败，改为逐条路由: {e}")
+            return {}
+        self._record_prompt(tokens, full_tokens, False)
+        known = state.prompt_parts["lines"]
+        return {i: api for i, api in parse_batch_answer(text, len(queries)).items() if api in known}
 
-        # 提取 LLM 输出结果
-        text = resp.choices[0].message.content.strip()
-        # 清理格式符号
-        text = text.split()[0].strip("`'\"，。 ")
+    def _plan_llm(self, query: str, state: _RegistryState = None):
+        prompt, picked, tokens, full_tokens = self.build_prompt(query, state)
+        # 提取 LLM 输出结果并清理格式符号
+        text = clean_path(self._chat(prompt))
+        self._record_prompt(tokens, full_tokens, picked is not None and text not in picked)
         return text
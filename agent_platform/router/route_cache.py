@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def registry_fingerprint(model: str, apis: Any) -> str:
+    """模型名 + 注册表内容的摘要；任一变化都会让旧缓存失效"""
+    payload = json.dumps({"model": model, "apis": apis}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class RouteCache:
+    """
+    路由结果缓存（规范化 query -> API 路径）：
+    - 内存中用 OrderedDict 做 LRU，命中只走字典查找
+    - 写穿到本地 SQLite，进程重启后自动加载
+    - 支持 TTL（秒，<=0 表示不过期）
+    - fingerprint 与库中记录不一致时（换模型 / 改注册表）整体清空
+    - get / put 可带上调用方使用的 fingerprint：与当前不一致（注册表刚热加载）时视为未命中 / 不写入
+    """
+
+    def __init__(self, path: str, fingerprint: str, max_size: int = 10000, ttl: float = 86400):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS routes ("
+            "key TEXT PRIMARY KEY, api TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        self.set_fingerprint(fingerprint)
+
+    def set_fingerprint(self, fingerprint: str):
+        """切换 fingerprint；与持久化的不一致时清空缓存，否则加载已有条目"""
+        with self._lock:
+            if fingerprint == getattr(self, "fingerprint", None):
+                return
+            self.fingerprint = fingerprint
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+            if not row or row[0] != fingerprint:
+                self._conn.execute("DELETE FROM routes")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('fingerprint', ?)", (fingerprint,)
+                )
+                self._conn.commit()
+            self._load()
+
+    def _load(self):
+        self._entries.clear()
+        self._touched.clear()
+        rows = self._conn.execute(
+            "SELECT key, api, created_at FROM routes ORDER BY accessed_at DESC LIMIT ?", (self.max_size,)
+        ).fetchall()
+        now = time.time()
+        for key, api, created_at in reversed(rows):
+            if not self._expired(created_at, now):
+                self._entries[key] = (api, created_at)
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - created_at > self.ttl
+
+    def get(self, key: str, fingerprint: str = None) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key) if fingerprint in (None, self.fingerprint) else None
+            if entry is not None:
+                now = time.time()
+                if not self._expired(entry[1], now):
+                    self._entries.move_to_end(key)
+                    self._touched[key] = now
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+                self._touched.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, api: str, fingerprint: str = None):
+        now = time.time()
+        with self._lock:
+            if fingerprint not in (None, self.fingerprint):
+                return
+            self._entries[key] = (api, now)
+            self._entries.move_to_end(key)
+            self._touched.pop(key, None)
+            evicted = []
+            while len(self._entries) > self.max_size:
+                old_key, _ = self._entries.popitem(last=False)
+                self._touched.pop(old_key, None)
+                evicted.append((old_key,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO routes (key, api, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, api, now, now),
+            )
+            if evicted:
+                self._conn.executemany("DELETE FROM routes WHERE key = ?", evicted)
+            self._flush_touched()
+            self._conn.commit()
+
+    def _flush_touched(self):
+        # 命中时只记内存，写入时再批量落盘访问时间，保证命中路径不碰磁盘
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE routes SET accessed_at = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def flush(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._touched.clear()
+            self._conn.execute("DELETE FROM routes")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        self.flush()
+        self._conn.close()
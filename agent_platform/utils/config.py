@@ -10,7 +10,50 @@ class Config:
     LANGFUSE_SECRET_KEY = os.getenv("LANGFUSE_SECRET_KEY", "")
     LANGFUSE_HOST = os.getenv("LANGFUSE_HOST", "http://localhost:3000")
     USE_LANGFUSE = bool(LANGFUSE_PUBLIC_KEY and LANGFUSE_SECRET_KEY)
-    
+
+    # LLM 路由缓存配置
+    ROUTE_CACHE_ENABLED = os.getenv("ROUTE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    ROUTE_CACHE_PATH = os.getenv(
+        "ROUTE_CACHE_PATH",
+        os.path.join(os.path.dirname(__file__), "../../.cache/route_cache.sqlite3")
+    )
+    ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", 10000))
+    ROUTE_CACHE_TTL = float(os.getenv("ROUTE_CACHE_TTL", 7 * 24 * 3600))
+    # 路由方式：llm（每个 query 都调用 LLM）或 cascade（规则路由置信度低于阈值时才调用 LLM）
+    ROUTER_MODE = os.getenv("ROUTER_MODE", "llm").lower()
+    ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", 0.7))
+    # cascade 模式下依次询问的层：basic（规则）/ knn（注册表示例近邻）/ llm
+    ROUTER_TIERS = os.getenv("ROUTER_TIERS", "basic,knn,llm")
+    # LLM 路由 prompt 中列出的候选 API 数（由本地近邻路由预选，0 表示列出全部 API）
+    ROUTER_LLM_CANDIDATES = int(os.getenv("ROUTER_LLM_CANDIDATES", 8))
+    # LLMRouter.plan_batch 每次调用合并的问题数
+    ROUTER_BATCH_SIZE = int(os.getenv("ROUTER_BATCH_SIZE", 20))
+
+    # 评估引擎并发配置
+    EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", 8))
+    EVAL_PROVIDER_LIMITS = os.getenv("EVAL_PROVIDER_LIMITS", "moonshot=4,hr_api=8")
+    EVAL_CASE_TIMEOUT = float(os.getenv("EVAL_CASE_TIMEOUT", 120))
+    # /eval/jobs 同时运行的评估任务数
+    EVAL_JOB_WORKERS = int(os.getenv("EVAL_JOB_WORKERS", 2))
+
+    # Executor 后端：inprocess（进程内分发给 Flask app）或 http（请求 EXECUTOR_BASE_URL）
+    EXECUTOR_BACKEND = os.getenv("EXECUTOR_BACKEND", "inprocess").lower()
+    EXECUTOR_BASE_URL = os.getenv("EXECUTOR_BASE_URL", "http://127.0.0.1:8000")
+    # Executor HTTP 后端配置（秒）
+    EXECUTOR_CONNECT_TIMEOUT = float(os.getenv("EXECUTOR_CONNECT_TIMEOUT", 3))
+    EXECUTOR_READ_TIMEOUT = float(os.getenv("EXECUTOR_READ_TIMEOUT", 30))
+    EXECUTOR_MAX_RETRIES = int(os.getenv("EXECUTOR_MAX_RETRIES", 2))
+    EXECUTOR_BACKOFF = float(os.getenv("EXECUTOR_BACKOFF", 0.2))
+
+    # 知识库检索：后端（tfidf / bm25），索引热加载时检查 manifest 变化的间隔（秒）
+    RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "tfidf").lower()
+    RAG_CHECK_INTERVAL = float(os.getenv("RAG_CHECK_INTERVAL", 2))
+    # 政策接口的响应缓存条数；Cache-Control 的 max-age（秒，0 表示客户端每次都用 ETag 重新验证）
+    POLICY_CACHE_SIZE = int(os.getenv("POLICY_CACHE_SIZE", 256))
+    POLICY_CACHE_MAX_AGE = int(os.getenv("POLICY_CACHE_MAX_AGE", 0))
+    # 管理接口（/admin/*）令牌；为空时管理接口只允许本机回环地址访问
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
     # MySQL数据库配置
     MYSQL_HOST = os.getenv("MYSQL_HOST", "localhost")
     MYSQL_PORT = int(os.getenv("MYSQL_PORT", 3306))
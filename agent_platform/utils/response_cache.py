@@ -0,0 +1,62 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    已序列化响应的 LRU 缓存（键 -> (响应体 bytes, ETag)）：
+    - 键由调用方组装，应包含索引版本，索引热替换后旧条目自然不再命中，随 LRU 淘汰
+    - 命中时直接返回缓存的响应体，不再检索、不再序列化
+    - ETag 为响应体的摘要（作为弱 ETag 发送），客户端可用 If-None-Match 重新验证并得到 304
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, str]]" = OrderedDict()
+
+    @staticmethod
+    def etag_for(body: bytes) -> str:
+        return hashlib.sha1(body).hexdigest()[:20]
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, body: bytes) -> Tuple[bytes, str]:
+        entry = (body, self.etag_for(body))
+        if self.max_size <= 0:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Optional[bytes]]) -> Optional[Tuple[bytes, str]]:
+        """命中则返回缓存；否则调用 build() 生成响应体并缓存（build 返回 None 时不缓存）"""
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        body = build()
+        return None if body is None else self.put(key, body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits,
+                    "misses": self.misses}
@@ -0,0 +1,35 @@
+import re
+import unicodedata
+
+_SPACES = re.compile(r"\s+")
+_CJK = re.compile(r"[\u3000-\u9fff\uff00-\uffef]")
+_EDGE_PUNCT = "？?。！!，,.、；;：:~～…\"'“”‘’「」"
+
+
+def normalize_query(text: str) -> str:
+    """
+    规范化用户问题，用作缓存键：
+    - NFKC 归一（全角转半角）、转小写、去掉所有空白
+    - 去掉首尾标点，例如 “年假还剩几天？” 与 “年假还剩几天” 视为同一问题
+    """
+    t = unicodedata.normalize("NFKC", text or "").lower()
+    t = _SPACES.sub("", t)
+    return t.strip(_EDGE_PUNCT)
+
+
+def normalize_topic(text: str) -> str:
+    """
+    规范化政策检索的主题，用作响应缓存键；只做不改变检索结果的变换：
+    - 转小写、合并连续空白、去掉首尾空白与标点（检索分词同样忽略大小写与标点）
+    - 与 normalize_query 不同，保留词间空格：分词按空白切词，“适用对象 全体员工”与“适用对象全体员工”结果不同
+    """
+    return " ".join((text or "").lower().split()).strip(_EDGE_PUNCT + " ")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 prompt 的 token 数（不依赖具体模型的分词器）：
+    中日韩字符与全角标点按每字 1 个 token，其余字符按每 4 个 1 个 token
+    """
+    cjk = len(_CJK.findall(text or ""))
+    return cjk + (len(text or "") - cjk + 3) // 4
@@ -9,6 +9,37 @@ const api = axios.create({
   },
 });
 
+// 政策类 GET 请求的 ETag 缓存：再次请求时带 If-None-Match 重新验证，
+// 服务端返回 304 时直接复用上次的响应数据（LRU，最多 ETAG_CACHE_SIZE 条）
+const ETAG_CACHE_SIZE = 100;
+const etagCache = new Map();
+
+const rememberETag = (key, entry) => {
+  etagCache.delete(key);
+  etagCache.set(key, entry);
+  if (etagCache.size > ETAG_CACHE_SIZE) {
+    etagCache.delete(etagCache.keys().next().value);
+  }
+};
+
+const getWithETag = async (url, params) => {
+  const key = `${url}?${new URLSearchParams(params).toString()}`;
+  const cached = etagCache.get(key);
+  const response = await api.get(url, {
+    params,
+    headers: cached ? { 'If-None-Match': cached.etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || (!!cached && status === 304),
+  });
+  if (response.status === 304) {
+    rememberETag(key, cached);
+    return { ...response, status: 200, data: cached.data };
+  }
+  if (response.headers?.etag) {
+    rememberETag(key, { etag: response.headers.etag, data: response.data });
+  }
+  return response;
+};
+
 // 请假相关API
 export const leaveAPI = {
   getBalance: (employeeId = 'E12345') => 
@@ -45,7 +76,7 @@ export const payrollAPI = {
 // 政策相关API
 export const policyAPI = {
   getPolicy: (topic) => 
-    api.get('/hr/policy', { params: { topic } }),
+    getWithETag('/hr/policy', { topic }),
 };
 
 // 福利相关API
@@ -60,7 +91,7 @@ export const benefitsAPI = {
 // 差旅相关API
 export const travelAPI = {
   getPolicy: (topic) => 
-    api.get('/hr/travel/policy', { params: { topic } }),
+    getWithETag('/hr/travel/policy', { topic }),
   
   apply: (data) => 
     api.post('/hr/travel/apply', data),
@@ -72,19 +103,54 @@ export const expenseAPI = {
     api.post('/hr/expense/submit', data),
 };
 
+// 轮询后台评估任务直到结束，拼装成 { data: { results, ...metrics } } 返回
+const JOB_POLL_INTERVAL = 1000;
+
+const waitForJob = async (response, onProgress) => {
+  if (response.status !== 202 || !response.data?.job_id) {
+    return response;
+  }
+  const jobId = response.data.job_id;
+  const results = [];
+  for (;;) {
+    const { data: job } = await api.get(`/eval/jobs/${jobId}`, { params: { offset: results.length } });
+    results.push(...(job.results || []));
+    if (onProgress) {
+      onProgress({ jobId, status: job.status, completed: job.completed, total: job.total });
+    }
+    if (job.status === 'failed') {
+      const error = new Error(job.error || '评估任务失败');
+      error.response = { data: { error: job.error || '评估任务失败' } };
+      throw error;
+    }
+    if (job.status === 'succeeded' || job.status === 'cancelled') {
+      return { ...response, data: { ...job.metrics, results, job_id: jobId, status: job.status } };
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL));
+  }
+};
+
 // 评估和LLM测试相关API
 export const evalAPI = {
   // LLM路由测试
   testRoute: (query) => 
     api.post('/eval/llm/route', { query }),
   
-  // 运行评估（基础）
-  runEvaluation: (data) => 
-    api.post('/eval/run', data),
+  // 运行评估（基础）；完整测试以后台任务执行，完成后返回与单条测试相同结构的结果
+  runEvaluation: (data, onProgress) => 
+    api.post('/eval/run', data).then((res) => waitForJob(res, onProgress)),
   
   // 运行综合评估（路由 + 返回数据 + 幻觉检测）
-  runComprehensiveEvaluation: (data) => 
-    api.post('/eval/comprehensive', data),
+  runComprehensiveEvaluation: (data, onProgress) => 
+    api.post('/eval/comprehensive', data).then((res) => waitForJob(res, onProgress)),
+  
+  // 查询评估任务进度（offset：只取第 offset 条之后的新结果）
+  getJob: (jobId, offset = 0) => 
+    api.get(`/eval/jobs/${jobId}`, { params: { offset } }),
+  
+  // 取消评估任务
+  cancelJob: (jobId) => 
+    api.delete(`/eval/jobs/${jobId}`),
   
   // 获取测试用例
   getTestCases: () => 
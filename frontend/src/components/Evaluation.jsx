@@ -9,6 +9,7 @@ function Evaluation() {
   const [comprehensiveResults, setComprehensiveResults] = useState(null);
   const [testCases, setTestCases] = useState([]);
   const [error, setError] = useState(null);
+  const [progress, setProgress] = useState(null);
 
   useEffect(() => {
     loadTestCases();
@@ -48,13 +49,14 @@ function Evaluation() {
     setError(null);
     setEvaluationResults(null);
     setComprehensiveResults(null);
+    setProgress(null);
 
     try {
       const data = type === 'single' 
         ? { type: 'single', query: testQuery }
         : { type: 'full' };
       
-      const response = await evalAPI.runEvaluation(data);
+      const response = await evalAPI.runEvaluation(data, setProgress);
       setEvaluationResults(response.data);
     } catch (err) {
       setError(err.response?.data?.error || '评估运行失败');
@@ -68,13 +70,14 @@ function Evaluation() {
     setError(null);
     setEvaluationResults(null);
     setComprehensiveResults(null);
+    setProgress(null);
 
     try {
       const data = type === 'single' 
         ? { type: 'single', query: testQuery }
         : { type: 'full' };
       
-      const response = await evalAPI.runComprehensiveEvaluation(data);
+      const response = await evalAPI.runComprehensiveEvaluation(data, setProgress);
       setComprehensiveResults(response.data);
     } catch (err) {
       setError(err.response?.data?.error || '综合评估运行失败');
@@ -83,6 +86,10 @@ function Evaluation() {
     }
   };
 
+  const runningLabel = progress
+    ? `运行中 ${progress.completed}/${progress.total}...`
+    : '运行中...';
+
   return (
     <div className="space-y-6">
       {/* LLM路由测试 */}
@@ -171,7 +178,7 @@ function Evaluation() {
               disabled={loading}
               className="px-6 py-2 bg-purple-600 text-white rounded-md hover:bg-purple-700 disabled:opacity-50 disabled:cursor-not-allowed"
             >
-              {loading ? '运行中...' : '完整评估（前10条）'}
+              {loading ? runningLabel : '完整评估'}
             </button>
           </div>
 
@@ -264,7 +271,7 @@ function Evaluation() {
               disabled={loading}
               className="px-6 py-2 bg-indigo-600 text-white rounded-md hover:bg-indigo-700 disabled:opacity-50 disabled:cursor-not-allowed"
             >
-              {loading ? '运行中...' : '完整综合评估（前10条）'}
+              {loading ? runningLabel : '完整综合评估'}
             </button>
           </div>
 
@@ -1,7 +1,7 @@
 import os
 import sys
 from datetime import datetime, date, timedelta
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 
 # 添加项目根目录到路径（确保在开头，优先级最高）
@@ -16,7 +16,13 @@ if os.getenv("DEBUG", "").lower() in ("1", "true", "yes"):
     print(f"[DEBUG] agent_platform 存在: {os.path.exists(os.path.join(_project_root, 'agent_platform'))}")
 
 try:
-    from agent_platform.knowledge.retriever import TfidfRAG
+    from agent_platform.knowledge.reloadable import ReloadableRAG
+    from agent_platform.knowledge.retriever import POOLING, FilterIndex
+    from agent_platform.utils.response_cache import ResponseCache
+    from agent_platform.utils.text import normalize_topic
+    from agent_platform.core.components import ComponentRegistry
+    from agent_platform.core.jobs import JobManager
+    from agent_platform.core.eval_engine import EvaluationEngine, case_error
     from agent_platform.utils.config import Config
     from poc.hr.models import db, Employee, LeaveBalance, Leave, Attendance, Expense, Payroll, Travel, Contract
 except ImportError as e:
@@ -26,12 +32,15 @@ except ImportError as e:
     print(f"[错误] 请确保在项目根目录运行，或使用启动脚本: scripts/start_flask_api.sh")
     raise
 from dotenv import load_dotenv
+import json
+import hmac
 import uuid
+from functools import partial
 
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app)  # 允许跨域请求
+CORS(app, expose_headers=["ETag"])  # 允许跨域请求；前端需要读取 ETag 做重新验证
 
 # 配置数据库
 config = Config()
@@ -45,12 +54,22 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
 # 初始化数据库
 db.init_app(app)
 
-# 初始化RAG（如果需要）
-try:
-    rag = TfidfRAG()  # 读取本地索引
-except Exception as e:
-    print(f"警告: RAG初始化失败: {e}")
-    rag = None
+# 初始化RAG：索引重建后自动在后台加载并原子替换，无需重启（也可 POST /admin/rag/reload）
+# 检索后端由 RETRIEVER_BACKEND 选择（tfidf / bm25）
+rag_index = ReloadableRAG.for_backend(Config.RETRIEVER_BACKEND, check_interval=Config.RAG_CHECK_INTERVAL)
+if rag_index.get() is None:
+    print(f"警告: RAG初始化失败: {rag_index.stats['last_error']}")
+# 政策接口的响应缓存（键含索引版本，索引替换后自动失效）
+policy_cache = ResponseCache(Config.POLICY_CACHE_SIZE)
+
+# 评估组件（LLMRouter / Executor / Evaluator）每个 worker 只创建一次，注册表变更时热加载
+# Executor 默认在进程内直接分发到本 app（EXECUTOR_BACKEND=http 时走 HTTP 回环）
+def _executor_kwargs():
+    """按当前 Config 生成 Executor 参数"""
+    return {"backend": Config.EXECUTOR_BACKEND, "base_url": Config.EXECUTOR_BASE_URL, "app": app}
+
+
+components = ComponentRegistry(executor_kwargs=_executor_kwargs())
 
 # 数据库连接状态
 USE_DB = True
@@ -192,22 +211,72 @@ def leave_apply():
 
 
 # ========== 政策相关 ==========
+def _policy_filters(**fixed):
+    """
+    从请求参数读取知识库检索的过滤条件（category / applicable / effective_on），fixed 覆盖请求参数；
+    条件无效（如 effective_on 不是合法日期）时抛出 ValueError
+    """
+    filters = {key: request.args.get(key) for key in ("category", "applicable", "effective_on")}
+    filters.update(fixed)
+    return FilterIndex.validate(filters)
+
+
+def _policy_response(endpoint: str, topic: str, filters: dict, search, params=(), **fields):
+    """
+    知识库政策检索，响应按 (接口, 规范化主题, 检索参数, 过滤条件, 索引版本) 缓存：
+    重复的查询直接返回缓存的响应体，跳过向量化、检索与序列化；
+    响应带 ETag 与 Cache-Control，If-None-Match 匹配时返回 304。知识库不可用或无结果时返回 None
+    """
+    # 整个请求使用同一个索引版本
+    rag = rag_index.get()
+    if not rag:
+        return None
+
+    def build():
+        hits = search(rag)
+        # 知识库中没有与主题共享词项的切片时，回退到默认策略（不缓存）
+        if not hits:
+            return None
+        payload = {"snippets": hits, "source": "KB+RAG", "index_version": rag.index_id, **fields}
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    key = (endpoint, normalize_topic(topic), tuple(params), FilterIndex.key(filters), rag.index_id)
+    try:
+        entry = policy_cache.get_or_build(key, build)
+    except Exception as e:
+        print(f"RAG检索失败，使用默认策略: {e}")
+        return None
+    if entry is None:
+        return None
+    body, etag = entry
+    # 缓存的是不含 topic 的响应体，这里原样回显请求中的 topic（规范化后相同的主题共用缓存）
+    resp = app.response_class(b'{"topic": ' + json.dumps(topic, ensure_ascii=False).encode("utf-8") + b", "
+                              + body[1:], mimetype="application/json")
+    resp.set_etag(etag, weak=True)
+    max_age = Config.POLICY_CACHE_MAX_AGE
+    resp.headers["Cache-Control"] = f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+    return resp.make_conditional(request)
+
+
 @app.route("/hr/policy", methods=["GET"])
 def policy():
     topic = request.args.get("topic", "婚假")
-    
+    # 按文档聚合切片得分（max / sum / mean_topn），每篇政策只占一个结果
+    pooling = request.args.get("pooling", "max")
+    if pooling not in POOLING:
+        return jsonify({"error": f"pooling 只能是 {', '.join(POOLING)}"}), 400
+    try:
+        filters = _policy_filters()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     # 如果RAG可用，使用RAG检索
-    if rag:
-        try:
-            hits = rag.search(topic, k=3)
-            return jsonify({
-                "topic": topic,
-                "snippets": hits,
-                "source": "KB+RAG",
-                "note": "结果来自本地知识库切片检索"
-            })
-        except Exception as e:
-            print(f"RAG检索失败，使用默认策略: {e}")
+    resp = _policy_response(
+        "policy", topic, filters,
+        lambda rag: rag.search_documents(topic, k=3, filters=filters, pooling=pooling),
+        params=(3, pooling), note="结果来自本地知识库文档检索，passages 为各文档中最相关的段落")
+    if resp is not None:
+        return resp
     
     # 默认策略
     policies = {
@@ -251,17 +320,15 @@ def benefits_apply():
 def travel_policy():
     topic = request.args.get("topic", "差旅标准")
     
-    # 如果RAG可用，使用RAG检索
-    if rag:
-        try:
-            hits = rag.search(topic, k=3)
-            return jsonify({
-                "topic": topic,
-                "snippets": hits,
-                "source": "KB+RAG"
-            })
-        except Exception as e:
-            print(f"RAG检索失败，使用默认策略: {e}")
+    # 如果RAG可用，使用RAG检索（只检索差旅类政策）
+    try:
+        filters = _policy_filters(category="travel")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    resp = _policy_response("travel_policy", topic, filters,
+                            lambda rag: rag.search(topic, k=3, filters=filters), params=(3,))
+    if resp is not None:
+        return resp
     
     return jsonify({
         "topic": topic,
@@ -662,6 +729,188 @@ def contract_renew():
 
 
 # ========== 评估和LLM测试 ==========
+TESTCASES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../tests/testcases.json"))
+RESPONSE_SPECS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../tests/response_specs.json"))
+
+# 评估引擎：用例并发执行，按 provider 限流（moonshot：路由与错误分析，hr_api：执行API）
+eval_engine = EvaluationEngine()
+
+# 后台评估任务（完整测试套件不再占用请求线程）
+eval_jobs = JobManager(max_workers=Config.EVAL_JOB_WORKERS, engine=eval_engine)
+
+
+def _load_testcases():
+    with open(TESTCASES_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_response_specs():
+    """加载返回规范：case_id -> spec"""
+    spec_map = {}
+    if os.path.exists(RESPONSE_SPECS_PATH):
+        with open(RESPONSE_SPECS_PATH, "r", encoding="utf-8") as f:
+            specs = json.load(f)
+            for item in specs:
+                cid = item.get("id")
+                if cid:
+                    spec_map[cid] = item.get("spec", {})
+    return spec_map
+
+
+def _single_case(data, cases):
+    """单条测试：如果没有提供expected_api，尝试从测试用例中查找"""
+    query = data.get("query")
+    expected_api = data.get("expected_api", "")
+    if not expected_api:
+        for case_item in cases:
+            if case_item.get("query") == query:
+                expected_api = case_item.get("expected_api", "")
+                break
+    return {"id": "test", "query": query, "expected_api": expected_api}
+
+
+def _case_error(case, idx, error_msg, **extra):
+    return {**case_error(case, idx, error_msg), **extra}
+
+
+def _comprehensive_case_error(case, idx, error_msg):
+    return _case_error(case, idx, error_msg, json_score=0, hallucination_score=0)
+
+
+def _run_basic_case(case, idx):
+    """基础评估单条用例：路由 + 比对"""
+    try:
+        # 确保case有必要的字段
+        if not case.get("query"):
+            return _case_error(case, idx, "测试用例缺少query字段")
+        with eval_engine.limit("moonshot"):
+            predicted_api = components.router().plan(case["query"])
+        with eval_engine.limit("moonshot"):
+            return components.evaluator().evaluate(case, predicted_api)
+    except Exception as e:
+        return _case_error(case, idx, str(e))
+
+
+def _summarize_basic(results):
+    passed = sum(1 for r in results if r.get("pass", False))
+    return {
+        "total": len(results),
+        "passed": passed,
+        "failed": len(results) - passed,
+        "accuracy": round(passed / len(results) * 100, 2) if results else 0
+    }
+
+
+def _run_comprehensive_case(case, idx, spec_map):
+    """综合评估单条用例：路由 + 执行API + JSON结构评估 + 幻觉检测"""
+    from agent_platform.core.deepeval_metrics import JSONResponseMetric, HallucinationRuleMetric
+    from deepeval.test_case import LLMTestCase
+
+    try:
+        cid = case.get("id", f"case_{idx}")
+        query = case.get("query")
+        if not query:
+            return _comprehensive_case_error(case, idx, "测试用例缺少query字段")
+
+        with eval_engine.limit("moonshot"):
+            predicted_api = components.router().plan(query)
+        with eval_engine.limit("moonshot"):
+            eval_result = components.evaluator().evaluate(case, predicted_api)
+
+        # 执行API调用
+        response_json = None
+        try:
+            with eval_engine.limit("hr_api"):
+                resp, _latency = components.executor().execute(case_id=cid, query=query, route_plan=predicted_api)
+            response_json = resp
+        except Exception as e:
+            response_json = {"__error__": str(e)}
+
+        # JSON结构评估 - 对所有有效响应都进行检测
+        response_spec = spec_map.get(cid, {})
+        json_score = None  # None 表示未测试
+
+        if response_json and not response_json.get("__error__"):
+            # 如果有规范配置，进行完整JSON结构评估
+            if response_spec and (response_spec.get("has_keys") or response_spec.get("equals")):
+                json_metric = JSONResponseMetric()
+                test_case = LLMTestCase(
+                    input=query,
+                    actual_output=json.dumps(response_json, ensure_ascii=False),
+                    expected_output=json.dumps({
+                        "has_keys": response_spec.get("has_keys", []),
+                        "equals": response_spec.get("equals", {})
+                    }, ensure_ascii=False)
+                )
+                json_score = json_metric.measure(test_case)
+            # 如果没有规范，但响应是有效的JSON，进行基础检查
+            elif isinstance(response_json, dict) and len(response_json) > 0:
+                # 基础检查：至少应该是一个有效的JSON对象
+                json_score = 1.0  # 基础通过
+
+        # 幻觉检测 - 对所有有效响应都进行检测
+        hallucination_score = None  # None 表示未测试
+
+        if response_json and not response_json.get("__error__"):
+            # 查询类API（可能返回不确定信息）与有明确配置的用例都使用严格检测；
+            # 其他API也统一使用严格检测（检查是否有明显编造）
+            behavior_type = "should_not_hallucinate"
+
+            hallucination_metric = HallucinationRuleMetric()
+            test_case = LLMTestCase(
+                input=query,
+                actual_output=json.dumps(response_json, ensure_ascii=False),
+                expected_output=json.dumps({"behavior": behavior_type}, ensure_ascii=False)
+            )
+            hallucination_score = hallucination_metric.measure(test_case)
+
+        return {
+            **eval_result,
+            "json_score": json_score if json_score is not None else -1,  # -1 表示未测试
+            "hallucination_score": hallucination_score if hallucination_score is not None else -1,  # -1 表示未测试
+            "response": response_json
+        }
+    except Exception as e:
+        return _comprehensive_case_error(case, idx, str(e))
+
+
+def _summarize_comprehensive(results):
+    # 只统计实际执行过检测的用例（有 response 且分数不为 -1）
+    json_scores = [r["json_score"] for r in results if "response" in r and r.get("json_score", -1) >= 0]
+    hallucination_scores = [
+        r["hallucination_score"] for r in results if "response" in r and r.get("hallucination_score", -1) >= 0
+    ]
+    avg_json_score = sum(json_scores) / len(json_scores) * 100 if json_scores else 0
+    avg_hallucination_score = sum(hallucination_scores) / len(hallucination_scores) * 100 if hallucination_scores else 0
+    return {
+        **_summarize_basic(results),
+        "json_quality": round(avg_json_score, 2),
+        "hallucination_rate": round(avg_hallucination_score, 2),
+        "json_tested": len(json_scores),
+        "hallucination_tested": len(hallucination_scores)
+    }
+
+
+def _suite_cases(data, cases):
+    """完整测试套件；可选 limit 参数只跑前 N 条"""
+    limit = data.get("limit")
+    if isinstance(limit, int) and limit > 0:
+        return cases[:limit]
+    return cases
+
+
+def _submit_job(kind, cases, run_case, summarize, make_error=None):
+    job = eval_jobs.submit(kind, cases, run_case, summarize, make_error=make_error)
+    return jsonify({
+        "job_id": job.id,
+        "kind": kind,
+        "status": job.status,
+        "total": job.total,
+        "status_url": f"/eval/jobs/{job.id}",
+        "events_url": f"/eval/jobs/{job.id}/events"
+    }), 202
+
+
 @app.route("/eval/llm/route", methods=["POST"])
 def llm_route_test():
     """LLM路由测试：输入用户查询，返回路由结果"""
@@ -672,13 +921,14 @@ def llm_route_test():
         return jsonify({"error": "缺少query参数"}), 400
     
     try:
-        from agent_platform.router.llm_router import LLMRouter
-        router = LLMRouter()
-        predicted_api = router.plan(query)
+        router = components.router()
+        decision = router.decide(query)
         
         return jsonify({
             "query": query,
-            "predicted_api": predicted_api,
+            "predicted_api": decision.api,
+            "confidence": decision.confidence,
+            "tier": decision.tier,
             "status": "success"
         })
     except Exception as e:
@@ -690,94 +940,30 @@ def llm_route_test():
 
 @app.route("/eval/run", methods=["POST"])
 def run_evaluation():
-    """运行评估测试"""
+    """
+    运行评估测试
+    - type=single：同步返回单条结果
+    - 其他：提交后台任务，返回 202 + job_id，通过 /eval/jobs/<job_id> 轮询或 /events 订阅进度；
+      传入 "async": false 时在请求内同步执行
+    """
     data = request.get_json() if request.is_json else {}
     test_type = data.get("type", "full")  # full, single
     
     try:
-        from agent_platform.router.llm_router import LLMRouter
-        from agent_platform.core.executor import Executor
-        from agent_platform.core.evaluator import Evaluator
-        import json
-        import os
-        
-        router = LLMRouter()
-        executor = Executor()
-        evaluator = Evaluator()
-        
-        # 加载测试用例
-        # flask_server.py 在 poc/hr/apis/，需要向上一级到 poc/hr/，然后进入 tests/
-        testcases_path = os.path.join(os.path.dirname(__file__), "../tests/testcases.json")
-        testcases_path = os.path.abspath(testcases_path)  # 转换为绝对路径
-        with open(testcases_path, "r", encoding="utf-8") as f:
-            cases = json.load(f)
+        cases = _load_testcases()
         
         if test_type == "single" and "query" in data:
-            # 单条测试
-            query = data.get("query")
-            expected_api = data.get("expected_api", "")
-            
-            # 如果没有提供expected_api，尝试从测试用例中查找
-            if not expected_api:
-                for case_item in cases:
-                    if case_item.get("query") == query:
-                        expected_api = case_item.get("expected_api", "")
-                        break
-            
-            case = {"id": "test", "query": query, "expected_api": expected_api}
-            predicted_api = router.plan(query)
-            eval_result = evaluator.evaluate(case, predicted_api)
-            return jsonify({
-                "results": [eval_result],
-                "total": 1,
-                "passed": 1 if eval_result.get("pass") else 0,
-                "failed": 0 if eval_result.get("pass") else 1
-            })
-        else:
-            # 完整测试套件
-            results = []
-            for idx, case in enumerate(cases[:10], 1):  # 限制前10条，避免超时
-                try:
-                    # 确保case有必要的字段
-                    if not case.get("query"):
-                        results.append({
-                            "id": case.get("id", f"case_{idx}"),
-                            "query": "",
-                            "expected": case.get("expected_api", ""),
-                            "predicted": "",
-                            "error": "测试用例缺少query字段",
-                            "pass": False
-                        })
-                        continue
-                    
-                    predicted_api = router.plan(case["query"])
-                    eval_result = evaluator.evaluate(case, predicted_api)
-                    results.append(eval_result)
-                except Exception as e:
-                    import traceback
-                    error_msg = f"{str(e)}"
-                    # 截断过长的错误信息
-                    if len(error_msg) > 500:
-                        error_msg = error_msg[:500] + "..."
-                    results.append({
-                        "id": case.get("id", f"case_{idx}"),
-                        "query": case.get("query", ""),
-                        "expected": case.get("expected_api", ""),
-                        "predicted": "",
-                        "error": error_msg,
-                        "pass": False
-                    })
-            
-            passed = sum(1 for r in results if r.get("pass", False))
-            failed = len(results) - passed
-            
-            return jsonify({
-                "results": results,
-                "total": len(results),
-                "passed": passed,
-                "failed": failed,
-                "accuracy": round(passed / len(results) * 100, 2) if results else 0
-            })
+            case = _single_case(data, cases)
+            eval_result = _run_basic_case(case, 1)
+            return jsonify({"results": [eval_result], **_summarize_basic([eval_result])})
+
+        # 完整测试套件
+        suite = _suite_cases(data, cases)
+        if data.get("async", True):
+            return _submit_job("run", suite, _run_basic_case, _summarize_basic)
+
+        results = eval_engine.run(suite, _run_basic_case)
+        return jsonify({"results": results, **_summarize_basic(results)})
     except Exception as e:
         return jsonify({
             "error": str(e),
@@ -789,13 +975,7 @@ def run_evaluation():
 def get_testcases():
     """获取测试用例列表"""
     try:
-        import json
-        import os
-        # flask_server.py 在 poc/hr/apis/，需要向上一级到 poc/hr/，然后进入 tests/
-        testcases_path = os.path.join(os.path.dirname(__file__), "../tests/testcases.json")
-        testcases_path = os.path.abspath(testcases_path)  # 转换为绝对路径
-        with open(testcases_path, "r", encoding="utf-8") as f:
-            cases = json.load(f)
+        cases = _load_testcases()
         
         # 只返回前50条，避免数据过大
         return jsonify({
@@ -811,274 +991,32 @@ def get_testcases():
 
 @app.route("/eval/comprehensive", methods=["POST"])
 def run_comprehensive_evaluation():
-    """运行综合评估（路由 + 返回数据 + 幻觉检测）"""
+    """
+    运行综合评估（路由 + 返回数据 + 幻觉检测）
+    - type=single：同步返回单条结果
+    - 其他：提交后台任务（同 /eval/run）
+    """
     data = request.get_json() if request.is_json else {}
     test_type = data.get("type", "full")  # full, single
     
     try:
-        from agent_platform.router.llm_router import LLMRouter
-        from agent_platform.core.executor import Executor
-        from agent_platform.core.evaluator import Evaluator
-        from agent_platform.core.deepeval_metrics import (
-            RouterAccuracyMetric,
-            JSONResponseMetric,
-            HallucinationRuleMetric
-        )
-        import json
-        import os
-        
-        router = LLMRouter()
-        executor = Executor()
-        evaluator = Evaluator()
-        
-        # 加载测试用例和返回规范
-        testcases_path = os.path.join(os.path.dirname(__file__), "../tests/testcases.json")
-        testcases_path = os.path.abspath(testcases_path)
-        
-        response_specs_path = os.path.join(os.path.dirname(__file__), "../tests/response_specs.json")
-        response_specs_path = os.path.abspath(response_specs_path)
-        
-        with open(testcases_path, "r", encoding="utf-8") as f:
-            cases = json.load(f)
-        
-        # 加载返回规范
-        spec_map = {}
-        if os.path.exists(response_specs_path):
-            with open(response_specs_path, "r", encoding="utf-8") as f:
-                specs = json.load(f)
-                for item in specs:
-                    cid = item.get("id")
-                    if cid:
-                        spec_map[cid] = item.get("spec", {})
+        cases = _load_testcases()
+        spec_map = _load_response_specs()
+        run_case = partial(_run_comprehensive_case, spec_map=spec_map)
         
         if test_type == "single" and "query" in data:
-            # 单条测试
-            query = data.get("query")
-            expected_api = data.get("expected_api", "")
-            
-            # 如果没有提供expected_api，尝试从测试用例中查找
-            if not expected_api:
-                for case_item in cases:
-                    if case_item.get("query") == query:
-                        expected_api = case_item.get("expected_api", "")
-                        break
-            
-            case = {"id": "test", "query": query, "expected_api": expected_api}
-            predicted_api = router.plan(query)
-            
-            # 执行API调用
-            response_json = None
-            try:
-                resp, _latency = executor.execute(case_id="test", query=query, route_plan=predicted_api)
-                response_json = resp
-            except Exception as e:
-                response_json = {"__error__": str(e)}
-            
-            # 评估
-            eval_result = evaluator.evaluate(case, predicted_api)
-            
-            # JSON结构评估 - 对所有有效响应都进行检测
-            response_spec = spec_map.get("test", {})
-            json_score = None
-            
-            if response_json and not response_json.get("__error__"):
-                # 如果有规范配置，进行完整JSON结构评估
-                if response_spec and (response_spec.get("has_keys") or response_spec.get("equals")):
-                    json_metric = JSONResponseMetric()
-                    from deepeval.test_case import LLMTestCase
-                    from json import dumps
-                    test_case = LLMTestCase(
-                        input=query,
-                        actual_output=dumps(response_json, ensure_ascii=False),
-                        expected_output=dumps({
-                            "has_keys": response_spec.get("has_keys", []),
-                            "equals": response_spec.get("equals", {})
-                        }, ensure_ascii=False)
-                    )
-                    json_score = json_metric.measure(test_case)
-                # 如果没有规范，但响应是有效的JSON，进行基础检查
-                elif isinstance(response_json, dict) and len(response_json) > 0:
-                    json_score = 1.0  # 基础通过
-            
-            # 幻觉检测 - 对所有有效响应都进行检测
-            hallucination_score = None
-            
-            if response_json and not response_json.get("__error__"):
-                # 确定幻觉检测的行为类型
-                query_apis = ["/hr/policy", "/hr/travel/policy"]
-                is_query_api = predicted_api in query_apis
-                
-                # 如果有明确的幻觉检测配置，使用配置
-                if response_spec.get("behavior") == "should_not_hallucinate":
-                    behavior_type = "should_not_hallucinate"
-                # 对于查询类API，自动进行严格幻觉检测
-                elif is_query_api:
-                    behavior_type = "should_not_hallucinate"
-                # 对于其他API，也进行基础幻觉检测
-                else:
-                    behavior_type = "should_not_hallucinate"  # 统一使用严格检测
-                
-                # 对所有响应都进行幻觉检测
-                hallucination_metric = HallucinationRuleMetric()
-                from deepeval.test_case import LLMTestCase
-                from json import dumps
-                test_case = LLMTestCase(
-                    input=query,
-                    actual_output=dumps(response_json, ensure_ascii=False),
-                    expected_output=dumps({"behavior": behavior_type}, ensure_ascii=False)
-                )
-                hallucination_score = hallucination_metric.measure(test_case)
-            
-            return jsonify({
-                "results": [{
-                    **eval_result,
-                    "json_score": json_score if json_score is not None else -1,
-                    "hallucination_score": hallucination_score if hallucination_score is not None else -1,
-                    "response": response_json
-                }],
-                "total": 1,
-                "passed": 1 if eval_result.get("pass") else 0,
-                "failed": 0 if eval_result.get("pass") else 1,
-                "json_quality": round(json_score * 100, 2) if json_score is not None else 0,
-                "hallucination_rate": round(hallucination_score * 100, 2) if hallucination_score is not None else 0,
-                "json_tested": 1 if json_score is not None else 0,
-                "hallucination_tested": 1 if hallucination_score is not None else 0
-            })
-        else:
-            # 完整测试套件（限制前10条）
-            results = []
-            json_scores = []
-            hallucination_scores = []
-            
-            for idx, case in enumerate(cases[:10], 1):
-                try:
-                    # 确保case有必要的字段
-                    cid = case.get("id", f"case_{idx}")
-                    query = case.get("query")
-                    if not query:
-                        results.append({
-                            "id": cid,
-                            "query": "",
-                            "expected": case.get("expected_api", ""),
-                            "predicted": "",
-                            "error": "测试用例缺少query字段",
-                            "pass": False,
-                            "json_score": 0,
-                            "hallucination_score": 0
-                        })
-                        continue
-                    
-                    predicted_api = router.plan(query)
-                    eval_result = evaluator.evaluate(case, predicted_api)
-                    
-                    # 执行API调用
-                    response_json = None
-                    try:
-                        resp, _latency = executor.execute(case_id=cid, query=query, route_plan=predicted_api)
-                        response_json = resp
-                    except Exception as e:
-                        response_json = {"__error__": str(e)}
-                    
-                    # JSON结构评估 - 对所有有效响应都进行检测
-                    response_spec = spec_map.get(cid, {})
-                    json_score = None  # None 表示未测试
-                    
-                    if response_json and not response_json.get("__error__"):
-                        # 如果有规范配置，进行完整JSON结构评估
-                        if response_spec and (response_spec.get("has_keys") or response_spec.get("equals")):
-                            json_metric = JSONResponseMetric()
-                            from deepeval.test_case import LLMTestCase
-                            from json import dumps
-                            test_case = LLMTestCase(
-                                input=query,
-                                actual_output=dumps(response_json, ensure_ascii=False),
-                                expected_output=dumps({
-                                    "has_keys": response_spec.get("has_keys", []),
-                                    "equals": response_spec.get("equals", {})
-                                }, ensure_ascii=False)
-                            )
-                            json_score = json_metric.measure(test_case)
-                        # 如果没有规范，但响应是有效的JSON，进行基础检查
-                        elif isinstance(response_json, dict) and len(response_json) > 0:
-                            # 基础检查：至少应该是一个有效的JSON对象
-                            json_score = 1.0  # 基础通过
-                        
-                        # 记录所有测试的分数（包括基础检查）
-                        if json_score is not None:
-                            json_scores.append(json_score)
-                    
-                    # 幻觉检测 - 对所有有效响应都进行检测
-                    hallucination_score = None  # None 表示未测试
-                    
-                    if response_json and not response_json.get("__error__"):
-                        # 确定幻觉检测的行为类型
-                        # 对于查询类API（可能返回不确定信息），使用严格检测
-                        query_apis = ["/hr/policy", "/hr/travel/policy"]
-                        is_query_api = predicted_api in query_apis
-                        
-                        # 如果有明确的幻觉检测配置，使用配置
-                        if response_spec.get("behavior") == "should_not_hallucinate":
-                            behavior_type = "should_not_hallucinate"
-                        # 对于查询类API，自动进行严格幻觉检测
-                        elif is_query_api:
-                            behavior_type = "should_not_hallucinate"
-                        # 对于其他API，也进行基础幻觉检测（检查是否有明显编造）
-                        else:
-                            # 对于非查询类API，也进行检测，但使用宽松模式
-                            # 检查是否在响应中出现了大量具体数字但没有安全词
-                            behavior_type = "should_not_hallucinate"  # 统一使用严格检测
-                        
-                        # 对所有响应都进行幻觉检测
-                        hallucination_metric = HallucinationRuleMetric()
-                        from deepeval.test_case import LLMTestCase
-                        from json import dumps
-                        test_case = LLMTestCase(
-                            input=query,
-                            actual_output=dumps(response_json, ensure_ascii=False),
-                            expected_output=dumps({"behavior": behavior_type}, ensure_ascii=False)
-                        )
-                        hallucination_score = hallucination_metric.measure(test_case)
-                        hallucination_scores.append(hallucination_score)
-                    
-                    results.append({
-                        **eval_result,
-                        "json_score": json_score if json_score is not None else -1,  # -1 表示未测试
-                        "hallucination_score": hallucination_score if hallucination_score is not None else -1,  # -1 表示未测试
-                        "response": response_json
-                    })
-                except Exception as e:
-                    import traceback
-                    error_msg = f"{str(e)}"
-                    # 截断过长的错误信息
-                    if len(error_msg) > 500:
-                        error_msg = error_msg[:500] + "..."
-                    results.append({
-                        "id": case.get("id", f"case_{idx}"),
-                        "query": case.get("query", ""),
-                        "expected": case.get("expected_api", ""),
-                        "predicted": "",
-                        "error": error_msg,
-                        "pass": False,
-                        "json_score": 0,
-                        "hallucination_score": 0
-                    })
-            
-            passed = sum(1 for r in results if r.get("pass", False))
-            failed = len(results) - passed
-            avg_json_score = sum(json_scores) / len(json_scores) * 100 if json_scores else 0
-            avg_hallucination_score = sum(hallucination_scores) / len(hallucination_scores) * 100 if hallucination_scores else 0
-            
-            return jsonify({
-                "results": results,
-                "total": len(results),
-                "passed": passed,
-                "failed": failed,
-                "accuracy": round(passed / len(results) * 100, 2) if results else 0,
-                "json_quality": round(avg_json_score, 2),
-                "hallucination_rate": round(avg_hallucination_score, 2),
-                "json_tested": len(json_scores),
-                "hallucination_tested": len(hallucination_scores)
-            })
+            case = _single_case(data, cases)
+            result = run_case(case, 1)
+            return jsonify({"results": [result], **_summarize_comprehensive([result])})
+
+        # 完整测试套件
+        suite = _suite_cases(data, cases)
+        if data.get("async", True):
+            return _submit_job("comprehensive", suite, run_case, _summarize_comprehensive,
+                               make_error=_comprehensive_case_error)
+
+        results = eval_engine.run(suite, run_case, make_error=_comprehensive_case_error)
+        return jsonify({"results": results, **_summarize_comprehensive(results)})
     except Exception as e:
         import traceback
         return jsonify({
@@ -1088,14 +1026,97 @@ def run_comprehensive_evaluation():
         }), 500
 
 
+@app.route("/eval/jobs", methods=["GET"])
+def list_eval_jobs():
+    """列出最近的评估任务"""
+    return jsonify({"jobs": eval_jobs.list()})
+
+
+@app.route("/eval/jobs/<job_id>", methods=["GET"])
+def get_eval_job(job_id):
+    """查询评估任务进度；offset 参数只返回第 offset 条之后的新结果"""
+    job = eval_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "任务不存在", "job_id": job_id}), 404
+    offset = request.args.get("offset", 0, type=int)
+    return jsonify(job.snapshot(offset=max(offset, 0)))
+
+
+@app.route("/eval/jobs/<job_id>", methods=["DELETE"])
+def cancel_eval_job(job_id):
+    """取消评估任务（当前用例完成后停止）"""
+    job = eval_jobs.cancel(job_id)
+    if not job:
+        return jsonify({"error": "任务不存在", "job_id": job_id}), 404
+    return jsonify(job.snapshot(include_results=False))
+
+
+@app.route("/eval/jobs/<job_id>/events", methods=["GET"])
+def stream_eval_job(job_id):
+    """通过 Server-Sent Events 推送评估进度、逐条结果与最终指标"""
+    job = eval_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "任务不存在", "job_id": job_id}), 404
+    offset = request.args.get("offset", 0, type=int)
+
+    def generate():
+        for event, payload in job.events(offset=max(offset, 0)):
+            yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ========== 知识库管理 ==========
+LOOPBACK_ADDRS = ("127.0.0.1", "::1")
+
+
+def _admin_denied():
+    """
+    管理接口鉴权：配置了 ADMIN_TOKEN 时要求请求头 X-Admin-Token（或 Authorization: Bearer）与之一致，
+    未配置时只允许本机回环地址访问。通过时返回 None，否则返回错误响应
+    """
+    token = Config.ADMIN_TOKEN
+    if token:
+        auth = request.headers.get("Authorization", "")
+        given = request.headers.get("X-Admin-Token") or (auth[7:] if auth.startswith("Bearer ") else "")
+        if not hmac.compare_digest(given.encode("utf-8"), token.encode("utf-8")):
+            return jsonify({"error": "缺少或错误的管理令牌"}), 401
+        return None
+    if request.remote_addr not in LOOPBACK_ADDRS:
+        return jsonify({"error": "未配置 ADMIN_TOKEN 时管理接口只允许本机访问"}), 403
+    return None
+
+
+@app.route("/admin/rag/reload", methods=["POST"])
+def admin_rag_reload():
+    """
+    重新加载知识库索引（在后台加载、完成后原子替换，加载期间请求继续使用旧索引）
+    需要管理令牌（见 _admin_denied）；请求体（可选）：{"wait": true}，为 false 时立即返回 202
+    """
+    denied = _admin_denied()
+    if denied is not None:
+        return denied
+    data = request.get_json(silent=True) or {}
+    wait = data.get("wait", True)
+    status = rag_index.reload(wait=wait)
+    if not wait:
+        return jsonify(status), 202
+    return jsonify(status), (500 if status["last_error"] else 200)
+
+
 # ========== 健康检查 ==========
 @app.route("/health", methods=["GET"])
 def health():
     db_status = "connected" if USE_DB else "disconnected"
+    rag_index.get()
     return jsonify({
         "status": "ok",
         "service": "HR Flask API",
-        "database": db_status
+        "database": db_status,
+        "rag": rag_index.status(),
+        "policy_cache": policy_cache.stats(),
+        "router": components.router_stats()
     })
 
 
@@ -1,6 +1,8 @@
 import os
 import sys
 import json
+import time
+import argparse
 
 # 确保可以从任意工作目录运行：把项目根目录加入 sys.path
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
@@ -13,19 +15,46 @@ from agent_platform.core.executor import Executor
 from agent_platform.core.evaluator import Evaluator
 from agent_platform.core.debugger import analyze_failures
 from agent_platform.core.reporter import save_json, generate_html_report
+from agent_platform.core.eval_engine import EvaluationEngine
+from agent_platform.utils.config import Config
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="运行 HR 路由评测")
+    parser.add_argument("--concurrency", type=int, default=Config.EVAL_CONCURRENCY, help="并发用例数")
+    parser.add_argument("--case-timeout", type=float, default=Config.EVAL_CASE_TIMEOUT, help="单条用例超时（秒）")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="大于 1 时先用 LLMRouter.plan_batch 每次路由这么多条问题，再并发评估")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     router = LLMRouter()
     executor = Executor()
     evaluator = Evaluator()
+    engine = EvaluationEngine(max_workers=args.concurrency, case_timeout=args.case_timeout)
 
     with open("poc/hr/tests/testcases.json", "r", encoding="utf-8") as f:
         cases = json.load(f)
 
-    results = []
-    for case in cases:
-        predicted_api = router.plan(case["query"])
-        eval_result = evaluator.evaluate(case, predicted_api)
-        results.append(eval_result)
+    start = time.time()
+    routed = {}
+    if args.batch_size > 1:
+        queries = [case["query"] for case in cases]
+        routed = dict(zip(queries, router.plan_batch(queries, batch_size=args.batch_size)))
+        print(f" 批量路由 {len(queries)} 条，耗时 {time.time() - start:.1f}s，{router.prompt_stats()}")
+
+    def run_case(case, idx):
+        predicted_api = routed.get(case["query"])
+        if predicted_api is None:
+            with engine.limit("moonshot"):
+                predicted_api = router.plan(case["query"])
+        with engine.limit("moonshot"):
+            return evaluator.evaluate(case, predicted_api)
+
+    results = engine.run(cases, run_case)
+    print(f" 并发度 {args.concurrency}，耗时 {time.time() - start:.1f}s")
 
     errors = analyze_failures(results)
     save_json(results, "poc/hr/tests/report.json")
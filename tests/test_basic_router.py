@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+BasicRouter 规则路由测试（无需启动后端）
+
+使用方法：
+    pytest tests/test_basic_router.py -v
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.router.basic_router import BasicRouter
+from agent_platform.router.keyword_automaton import KeywordAutomaton
+
+
+class TestKeywordAutomaton:
+    """关键词自动机测试"""
+
+    def test_overlapping_matches(self):
+        """重叠、嵌套的关键词在一次扫描中全部命中"""
+        ac = KeywordAutomaton(["出勤", "出勤状态", "勤状", "状态"])
+        assert ac.find("查看出勤状态") == ["出勤", "出勤状态", "勤状", "状态"]
+
+    def test_no_match(self):
+        ac = KeywordAutomaton(["年假", "病假"])
+        assert ac.find("今天天气不错") == []
+        assert ac.find("") == []
+
+
+class TestBasicRouter:
+    """规则路由测试"""
+
+    @classmethod
+    def setup_class(cls):
+        cls.router = BasicRouter()
+
+    def test_plan(self):
+        cases = {
+            "我今年年假还剩几天？": "/hr/leave/balance",
+            "帮我申请明天一天病假": "/hr/leave/apply",
+            "差旅政策是什么": "/hr/travel/policy",
+            "帮我报销住宿费用500元": "/hr/expense/submit",
+            "我下周出差，帮我提交申请": "/hr/travel/apply",
+            "查看我的出勤记录": "/hr/attendance/status",
+            "我要修改部门信息": "/hr/profile/update",
+            "我的合同什么时候到期": "/hr/contract/view",
+            "随便问问": "/hr/policy",
+        }
+        for query, expected in cases.items():
+            assert self.router.plan(query) == expected, query
+
+    def test_fall_through(self):
+        """考勤规则未命中任何子规则时继续匹配后续规则"""
+        assert self.router.plan("出勤") == "/hr/policy"
+        assert self.router.plan("出勤工资") == "/hr/payroll/info"
+
+    def test_plan_many(self):
+        queries = ["我今年年假还剩几天？", "公司有哪些福利？", "我今年年假还剩几天？", "", "内推候选人"]
+        assert self.router.plan_many(queries) == [self.router.plan(q) for q in queries]
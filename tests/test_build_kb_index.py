@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+知识库增量构建测试（无需启动后端）
+
+使用方法：
+    pytest tests/test_build_kb_index.py -v
+"""
+
+import os
+import sys
+import json
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+for p in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "tools")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import build_kb_index
+from agent_platform.knowledge.retriever import TfidfRAG
+
+
+class TestIncrementalBuild:
+    """增量构建测试"""
+
+    def setup_method(self):
+        with open(build_kb_index.KB_PATH, "r", encoding="utf-8") as f:
+            self.data = json.load(f)
+
+    def build(self, tmp_path, data, **kw):
+        kb = tmp_path / "kb.json"
+        kb.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        return build_kb_index.build(str(kb), str(tmp_path / "chunks.jsonl"), str(tmp_path / "index"), **kw)
+
+    def rows_by_text(self, tmp_path):
+        rag = TfidfRAG(str(tmp_path / "index"))
+        X = rag.postings.T.tocsr()
+        return rag, {rag.meta[i]["text"]: X[i].toarray().ravel() for i in range(len(rag.meta))}
+
+    def test_unchanged_and_appended(self, tmp_path):
+        assert self.build(tmp_path, self.data)["mode"] == "full"
+        assert self.build(tmp_path, self.data, incremental=True)["mode"] == "unchanged"
+        old, before = self.rows_by_text(tmp_path)
+
+        # 修改一篇文档（只用词表内已有的词），其余文档的向量行应原样复用
+        self.data[1]["content"] += "婚假政策。"
+        report = self.build(tmp_path, self.data, incremental=True)
+        assert report["mode"] == "incremental" and report["rechunked_docs"] == 1
+        rag, after = self.rows_by_text(tmp_path)
+        for text, row in before.items():
+            if text in after:
+                assert np.array_equal(row, after[text])
+        assert len(rag.meta) == len(old.meta) + 1
+        edited = sum(rag.meta[i]["doc_id"] == self.data[1]["id"] for i in range(len(rag.meta)))
+        assert rag.manifest["build"]["appended_chunks"] == edited
+
+    def test_removed_doc(self, tmp_path):
+        self.build(tmp_path, self.data)
+        report = self.build(tmp_path, self.data[:2], incremental=True, drift_threshold=1.0)
+        assert report["removed_docs"] == 1
+        rag = TfidfRAG(str(tmp_path / "index"))
+        assert {rag.meta[i]["doc_id"] for i in range(len(rag.meta))} == {e["id"] for e in self.data[:2]}
+
+    def test_refit_on_drift(self, tmp_path):
+        self.build(tmp_path, self.data)
+        self.data.append({"id": "policy_new", "title": "新制度", "category": "other", "applicable": "全体员工",
+                          "effective_date": "2025-01-01", "content": " ".join(f"term{i} word{i}" for i in range(50))})
+        report = self.build(tmp_path, self.data, incremental=True)
+        assert report["mode"] == "refit" and report["drift"] > build_kb_index.DRIFT_THRESHOLD
+        rag = TfidfRAG(str(tmp_path / "index"))
+        assert rag.search("term7 word7", k=1)[0]["doc_id"] == "policy_new"
+
+    def test_only_changed_docs_rechunked(self, tmp_path, monkeypatch):
+        self.build(tmp_path, self.data)
+        old_lines = (tmp_path / "chunks.jsonl").read_text(encoding="utf-8").splitlines()
+        chunked = []
+        real = build_kb_index.chunk_lines
+        monkeypatch.setattr(build_kb_index, "chunk_lines", lambda doc: chunked.append(doc["id"]) or real(doc))
+
+        self.data[1]["content"] += "婚假政策。"
+        report = self.build(tmp_path, self.data, incremental=True, drift_threshold=1.0)
+        assert chunked == [self.data[1]["id"]] and report["rechunked_docs"] == 1
+        # 未变化文档的切片行从上次的切片文件原样复制
+        new_lines = (tmp_path / "chunks.jsonl").read_text(encoding="utf-8").splitlines()
+        unchanged = [line for line in new_lines if json.loads(line)["doc_id"] != self.data[1]["id"]]
+        assert unchanged == [line for line in old_lines if json.loads(line)["doc_id"] != self.data[1]["id"]]
+        assert len(new_lines) == report["chunks"]
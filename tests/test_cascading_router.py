@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+级联路由测试（无需启动后端，不调用真实 LLM）
+
+使用方法：
+    pytest tests/test_cascading_router.py -v
+"""
+
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.core.data_types import RouteDecision
+from agent_platform.router.basic_router import BasicRouter
+from agent_platform.router.cascading_router import CascadingRouter
+
+
+class FakeLLM:
+    """记录调用次数的假 LLM 层"""
+    name = "llm"
+
+    def __init__(self, api="/hr/leave/apply", fail=False):
+        self.api = api
+        self.fail = fail
+        self.calls = []
+
+    def decide(self, query):
+        self.calls.append(query)
+        if self.fail:
+            raise RuntimeError("LLM 不可用")
+        return RouteDecision(self.api, 1.0)
+
+
+class TestCascadingRouter:
+    """BasicRouter 置信度与级联测试"""
+
+    @classmethod
+    def setup_class(cls):
+        cls.basic = BasicRouter()
+
+    def test_basic_confidence(self):
+        confident = self.basic.decide("我今年年假还剩几天？")
+        assert confident.api == "/hr/leave/balance" and confident.confidence >= 0.7
+        # 只命中规则默认结果 < 命中子规则；冲突进一步压低；兜底为 0
+        assert self.basic.decide("婚假").confidence < confident.confidence
+        conflict = self.basic.decide("请假可以领取福利吗")
+        assert conflict.confidence < self.basic.decide("婚假").confidence
+        assert {c[0] for c in conflict.candidates} == {"/hr/leave/apply", "/hr/benefits/apply"}
+        assert self.basic.decide("随便问问").confidence == 0.0
+        # decide 与 plan 的路由结果一致
+        for q in ["差旅政策是什么", "出勤", "出勤工资", "帮我报销住宿费用500元", ""]:
+            assert self.basic.decide(q).api == self.basic.plan(q), q
+
+    def test_escalation_and_stats(self):
+        llm = FakeLLM()
+        router = CascadingRouter([self.basic, llm], threshold=0.7)
+        assert router.plan("我今年年假还剩几天？") == "/hr/leave/balance"
+        assert router.plan("差旅政策是什么") == "/hr/travel/policy"
+        assert llm.calls == []
+        decision = router.decide("随便问问")
+        assert decision.tier == "llm" and llm.calls == ["随便问问"]
+        stats = router.stats()
+        assert stats["total"] == 3
+        assert stats["tiers"]["basic"]["share"] == pytest.approx(2 / 3, abs=1e-3)
+        assert stats["tiers"]["basic"]["escalated"] == 1 and stats["tiers"]["llm"]["handled"] == 1
+
+    def test_llm_failure_falls_back(self):
+        router = CascadingRouter([self.basic, FakeLLM(fail=True)], threshold=0.7)
+        decision = router.decide("婚假")
+        assert decision.api == "/hr/policy" and decision.tier == "basic"
+        assert router.stats()["tiers"]["llm"]["errors"] == 1
+        # 第一层出错不回退
+        with pytest.raises(RuntimeError):
+            CascadingRouter([FakeLLM(fail=True), self.basic]).decide("婚假")
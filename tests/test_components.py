@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+ComponentRegistry 测试（无需启动后端，不调用 LLM：级联路由只用 basic / knn 两层）
+
+使用方法：
+    pytest tests/test_components.py -v
+"""
+
+import os
+import sys
+import json
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.core.components import ComponentRegistry, REGISTRY_PATH
+from agent_platform.utils.config import Config
+
+NEW_API = {"api": "/hr/onboarding/submit", "method": "POST", "purpose": "提交入职材料",
+           "examples": {"positive": ["提交入职材料", "上传入职资料"], "negative": []}}
+
+
+class TestComponentRegistry:
+    """组件单例与注册表热加载"""
+
+    def setup_method(self):
+        with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+            self.apis = json.load(f)
+
+    def make(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, "ROUTER_MODE", "cascade")
+        monkeypatch.setattr(Config, "ROUTER_TIERS", "basic,knn")
+        path = tmp_path / "api_registry.json"
+        path.write_text(json.dumps(self.apis, ensure_ascii=False), encoding="utf-8")
+        return path, ComponentRegistry(registry_path=str(path), executor_kwargs={"backend": "http"})
+
+    def bump(self, path, apis):
+        """改写注册表并把 mtime 往后推 1 秒，避免文件系统时间精度导致 mtime 不变"""
+        path.write_text(json.dumps(apis, ensure_ascii=False), encoding="utf-8")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def test_singletons(self, tmp_path, monkeypatch):
+        _, components = self.make(tmp_path, monkeypatch)
+        routers, executors = [], []
+
+        def use():
+            routers.append(components.router())
+            executors.append(components.executor())
+
+        threads = [threading.Thread(target=use) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(r) for r in routers}) == 1 and len({id(e) for e in executors}) == 1
+        assert components.router() is routers[0] and components.executor() is executors[0]
+
+        components.reset()
+        assert components.router() is not routers[0] and components.executor() is not executors[0]
+
+    def test_hot_reload_on_mtime_change(self, tmp_path, monkeypatch):
+        path, components = self.make(tmp_path, monkeypatch)
+        router, executor = components.router(), components.executor()
+        assert executor.registry_path == str(path)
+        assert "/hr/onboarding/submit" not in executor.methods
+        assert router.decide("提交入职材料").api != "/hr/onboarding/submit"
+
+        self.bump(path, self.apis + [NEW_API])
+        # 只通过 executor() 触发检查：路由器与 Executor 的方法表一起更新，实例不变
+        assert components.executor() is executor
+        assert executor.methods["/hr/onboarding/submit"] == "POST"
+        assert components.router() is router
+        assert router.decide("提交入职材料").api == "/hr/onboarding/submit"
+
+        self.bump(path, self.apis)
+        assert components.router() is router and "/hr/onboarding/submit" not in executor.methods
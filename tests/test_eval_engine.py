@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+并发评估引擎测试（无需启动后端，不调用真实 LLM）
+
+使用方法：
+    pytest tests/test_eval_engine.py -v
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.core.eval_engine import EvaluationEngine
+
+
+class TestEvaluationEngine:
+    """EvaluationEngine 测试"""
+
+    def test_ordered_results(self):
+        """乱序完成的用例按输入顺序返回与回调"""
+        cases = [{"id": str(i), "query": f"q{i}"} for i in range(30)]
+        engine = EvaluationEngine(max_workers=8, provider_limits={}, case_timeout=None)
+        seen = []
+
+        def run_case(case, idx):
+            time.sleep(random.random() * 0.01)
+            return {"id": case["id"], "idx": idx, "pass": True}
+
+        results = engine.run(cases, run_case, on_result=lambda r: seen.append(r["id"]))
+        assert [r["id"] for r in results] == [c["id"] for c in cases]
+        assert [r["idx"] for r in results] == list(range(1, 31))
+        assert seen == [c["id"] for c in cases]
+
+    def test_provider_limit(self):
+        """同一 provider 的并发不超过配置上限"""
+        engine = EvaluationEngine(max_workers=8, provider_limits={"moonshot": 2}, case_timeout=None)
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def run_case(case, idx):
+            with engine.limit("moonshot"):
+                with lock:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                time.sleep(0.01)
+                with lock:
+                    state["active"] -= 1
+            return {"id": case["id"], "pass": True}
+
+        engine.run([{"id": str(i)} for i in range(12)], run_case)
+        assert state["peak"] == 2
+
+    def test_timeout_and_errors(self):
+        """超时与异常的用例记为失败结果，不影响其他用例"""
+        engine = EvaluationEngine(max_workers=4, provider_limits={}, case_timeout=0.05)
+
+        def run_case(case, idx):
+            if case["id"] == "slow":
+                time.sleep(0.5)
+            if case["id"] == "bad":
+                raise RuntimeError("boom")
+            return {"id": case["id"], "pass": True}
+
+        results = engine.run([{"id": "ok"}, {"id": "slow"}, {"id": "bad"}], run_case)
+        assert [r["pass"] for r in results] == [True, False, False]
+        assert "超时" in results[1]["error"]
+        assert results[2]["error"] == "boom"
+
+    def test_timeout_when_all_workers_hang(self):
+        """唯一的工作线程被卡住时，排队的用例也记为超时，run() 能够返回"""
+        engine = EvaluationEngine(max_workers=1, provider_limits={}, case_timeout=0.1)
+        release = threading.Event()
+
+        def run_case(case, idx):
+            if case["id"] == "hang":
+                release.wait(5)
+            return {"id": case["id"], "pass": True}
+
+        start = time.monotonic()
+        try:
+            results = engine.run([{"id": "hang"}, {"id": "queued"}], run_case)
+        finally:
+            release.set()
+        assert time.monotonic() - start < 2
+        assert [r["id"] for r in results] == ["hang", "queued"]
+        assert all(not r["pass"] and "超时" in r["error"] for r in results)
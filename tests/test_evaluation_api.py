@@ -7,6 +7,7 @@
 - /eval/testcases - 获取测试用例
 - /eval/run - 基础评估
 - /eval/comprehensive - 综合评估
+- /eval/jobs/<job_id> - 后台评估任务进度
 
 使用方法：
     python tests/test_evaluation_api.py
@@ -53,6 +54,25 @@ except ImportError:
     pass
 
 
+def wait_for_job(session, response, timeout=600):
+    """完整测试以后台任务执行：校验 202 响应并轮询到任务结束，返回与同步接口相同结构的结果"""
+    import time
+    assert response.status_code == 202, f"状态码应为202，实际为{response.status_code}"
+    data = response.json()
+    assert "job_id" in data, "响应应包含job_id字段"
+    deadline = time.time() + timeout
+    results = []
+    while time.time() < deadline:
+        job = session.get(f"{BASE_URL}/eval/jobs/{data['job_id']}", params={"offset": len(results)}).json()
+        results.extend(job.get("results", []))
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            assert job["status"] == "succeeded", f"任务应成功结束，实际为{job['status']}: {job.get('error')}"
+            assert job["completed"] == job["total"] == len(results), "结果条数应与用例总数一致"
+            return {**job["metrics"], "results": results}
+        time.sleep(1)
+    raise AssertionError("评估任务超时未结束")
+
+
 class TestEvaluationAPI:
     """评估 API 测试类"""
     
@@ -155,8 +175,7 @@ class TestEvaluationAPI:
             f"{self.base_url}/eval/run",
             json={"type": "full"}
         )
-        assert response.status_code == 200, f"状态码应为200，实际为{response.status_code}"
-        data = response.json()
+        data = wait_for_job(self.session, response)
         assert "results" in data, "响应应包含results字段"
         assert "total" in data, "响应应包含total字段"
         assert "passed" in data, "响应应包含passed字段"
@@ -213,8 +232,7 @@ class TestEvaluationAPI:
             f"{self.base_url}/eval/comprehensive",
             json={"type": "full"}
         )
-        assert response.status_code == 200, f"状态码应为200，实际为{response.status_code}"
-        data = response.json()
+        data = wait_for_job(self.session, response)
         assert "results" in data, "响应应包含results字段"
         assert "total" in data, "响应应包含total字段"
         assert "accuracy" in data, "响应应包含accuracy字段"
@@ -231,16 +249,22 @@ class TestEvaluationAPI:
         print(f"    JSON测试数: {data.get('json_tested')}")
         print(f"    幻觉测试数: {data.get('hallucination_tested')}\n")
     
+    def test_eval_job_not_found(self):
+        """测试查询不存在的评估任务"""
+        print("测试: GET /eval/jobs/<job_id> (不存在)")
+        response = self.session.get(f"{self.base_url}/eval/jobs/not-a-job")
+        assert response.status_code == 404, f"状态码应为404，实际为{response.status_code}"
+        print("  ✓ 任务不存在处理测试通过\n")
+    
     def test_eval_run_invalid_type(self):
         """测试基础评估 - 无效类型（应使用默认值）"""
         print("测试: POST /eval/run (无效type)")
         response = self.session.post(
             f"{self.base_url}/eval/run",
-            json={"type": "invalid"}
+            json={"type": "invalid", "limit": 3}
         )
-        # 应该返回200，使用默认值"full"
-        assert response.status_code == 200, f"状态码应为200，实际为{response.status_code}"
-        data = response.json()
+        # 按默认值"full"处理：提交后台任务
+        data = wait_for_job(self.session, response)
         assert "results" in data, "响应应包含results字段"
         print("  ✓ 无效类型处理测试通过（使用默认值）\n")
     
@@ -249,11 +273,10 @@ class TestEvaluationAPI:
         print("测试: POST /eval/comprehensive (无效type)")
         response = self.session.post(
             f"{self.base_url}/eval/comprehensive",
-            json={"type": "invalid"}
+            json={"type": "invalid", "limit": 3}
         )
-        # 应该返回200，使用默认值"full"
-        assert response.status_code == 200, f"状态码应为200，实际为{response.status_code}"
-        data = response.json()
+        # 按默认值"full"处理：提交后台任务
+        data = wait_for_job(self.session, response)
         assert "results" in data, "响应应包含results字段"
         print("  ✓ 无效类型处理测试通过（使用默认值）\n")
 
@@ -274,6 +297,7 @@ def run_tests():
         ("基础评估-完整", test_instance.test_eval_run_full),
         ("综合评估-单条", test_instance.test_eval_comprehensive_single),
         ("综合评估-完整", test_instance.test_eval_comprehensive_full),
+        ("错误处理-任务不存在", test_instance.test_eval_job_not_found),
         ("错误处理-无效type(基础)", test_instance.test_eval_run_invalid_type),
         ("错误处理-无效type(综合)", test_instance.test_eval_comprehensive_invalid_type),
     ]
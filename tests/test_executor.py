@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Executor 测试（无需启动后端：inprocess 后端使用 Flask test client，http 后端使用假的 HTTP 客户端）
+
+使用方法：
+    pytest tests/test_executor.py -v
+"""
+
+import os
+import sys
+
+from flask import Flask, jsonify, request
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.core.components import ComponentRegistry
+from agent_platform.core.executor import Executor
+from agent_platform.core.http_client import PooledHTTPClient
+from agent_platform.utils.config import Config
+
+
+def make_app():
+    """只回显收到的请求的小 app"""
+    app = Flask(__name__)
+
+    @app.route("/echo/get", methods=["GET"])
+    def echo_get():
+        return jsonify({"method": request.method, "args": request.args.to_dict(), "json": request.get_json(silent=True)})
+
+    @app.route("/echo/post", methods=["POST"])
+    def echo_post():
+        return jsonify({"method": request.method, "args": request.args.to_dict(), "json": request.get_json()})
+
+    return app
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class FakeHTTPClient:
+    """记录请求，不访问网络"""
+
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        timing = {"connect_ms": 1.0, "ttfb_ms": 2.0, "total_ms": 3.0, "retries": 0}
+        return FakeResponse({"ok": True}), timing
+
+
+class TestInprocessExecutor:
+    """inprocess 后端：按路由实际支持的方法分发给 Flask app"""
+
+    def setup_method(self):
+        self.executor = Executor(backend="inprocess", app=make_app())
+
+    def test_post_only_route_gets_json_body(self):
+        trace = self.executor.execute_trace("c1", "q", "/echo/post", {"employee_id": "E1", "days": 3})
+        assert trace.request == {"method": "POST", "url": "/echo/post", "json": {"employee_id": "E1", "days": 3}}
+        assert trace.response == {"method": "POST", "args": {}, "json": {"employee_id": "E1", "days": 3}}
+        assert trace.timing["retries"] == 0 and trace.latency_ms == trace.timing["total_ms"]
+
+    def test_get_params_in_query_string(self):
+        # route_plan 自带的 query 参数与 params 合并，params 优先
+        trace = self.executor.execute_trace("c2", "q", "/echo/get?topic=年假&employee_id=E0", {"employee_id": "E2"})
+        assert trace.request["method"] == "GET" and "json" not in trace.request
+        assert trace.response == {"method": "GET", "args": {"topic": "年假", "employee_id": "E2"}, "json": None}
+
+    def test_flask_server_routes(self):
+        sys.path.insert(0, os.path.join(PROJECT_ROOT, "poc/hr/apis"))
+        import flask_server
+
+        executor = Executor(backend="inprocess", app=flask_server.app)
+        assert executor.methods["/hr/leave/apply"] == "POST" and executor.methods["/hr/leave/balance"] == "GET"
+        resp, _ = executor.execute("c3", "q", "/hr/leave/balance", {"employee_id": "E777"})
+        assert resp["employee_id"] == "E777"
+        trace = executor.execute_trace("c4", "q", "/hr/leave/apply",
+                                       {"employee_id": "E777", "start_date": "2025-11-01", "end_date": "2025-11-05"})
+        assert trace.request["json"]["employee_id"] == "E777" and trace.response["status"] == "submitted"
+        assert "E777" in trace.response["message"] and "2025-11-05" in trace.response["message"]
+
+    def test_requires_app(self):
+        try:
+            Executor(backend="inprocess")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("inprocess 后端缺少 app 时应报错")
+
+
+class TestHTTPExecutor:
+    """http 后端：方法取自 API 注册表，GET 参数放在 params，POST 参数放在 JSON body"""
+
+    def test_selected_through_config(self, monkeypatch):
+        sys.path.insert(0, os.path.join(PROJECT_ROOT, "poc/hr/apis"))
+        import flask_server
+
+        monkeypatch.setattr(Config, "EXECUTOR_BACKEND", "http")
+        monkeypatch.setattr(Config, "EXECUTOR_BASE_URL", "http://127.0.0.1:9999")
+        executor = ComponentRegistry(executor_kwargs=flask_server._executor_kwargs()).executor()
+        assert executor.backend == "http" and executor.base_url == "http://127.0.0.1:9999"
+        assert isinstance(executor.http, PooledHTTPClient)
+
+        monkeypatch.setattr(Config, "EXECUTOR_BACKEND", "inprocess")
+        assert ComponentRegistry(executor_kwargs=flask_server._executor_kwargs()).executor().backend == "inprocess"
+
+    def test_request_shape(self):
+        http = FakeHTTPClient()
+        executor = Executor(base_url="http://api", backend="http", http_client=http)
+        trace = executor.execute_trace("c1", "q", "/hr/leave/balance", {"employee_id": "E1"})
+        executor.execute_trace("c2", "q", "/hr/leave/apply", {"employee_id": "E1"})
+        assert http.calls == [
+            ("GET", "http://api/hr/leave/balance", {"params": {"employee_id": "E1"}}),
+            ("POST", "http://api/hr/leave/apply", {"json": {"employee_id": "E1"}}),
+        ]
+        assert trace.response == {"ok": True} and trace.latency_ms == 3.0
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+PooledHTTPClient 测试（在本机随机端口上启动一个脚本化的 HTTPServer，不访问外网）
+
+使用方法：
+    pytest tests/test_http_client.py -v
+"""
+
+import os
+import sys
+import time
+import json
+import socket
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.core.http_client import PooledHTTPClient
+
+TIMING_KEYS = {"connect_ms", "ttfb_ms", "total_ms", "retries"}
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """
+    /status/<a>,<b>,... 第 n 次请求返回第 n 个状态码（之后一直返回最后一个）
+    /slow 先等待 0.5s 再返回 200
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def _handle(self):
+        path = self.path.split("?")[0]
+        with self.server.lock:
+            self.server.hits[(self.command, path)] += 1
+            n = self.server.hits[(self.command, path)]
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if path == "/slow":
+            time.sleep(0.5)
+            status = 200
+        else:
+            statuses = [int(s) for s in path.rsplit("/", 1)[-1].split(",")]
+            status = statuses[min(n, len(statuses)) - 1]
+        body = json.dumps({"status": status, "hit": n}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass  # 客户端已超时断开
+
+    do_GET = do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+class CountingClient(PooledHTTPClient):
+    """退避等待固定为 sleep 秒，并记录等待次数"""
+
+    def __init__(self, sleep=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.sleep = sleep
+        self.sleeps = 0
+
+    def _sleep_before_retry(self, attempt):
+        self.sleeps += 1
+        time.sleep(self.sleep)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestPooledHTTPClient:
+    """重试、超时与耗时拆分"""
+
+    @classmethod
+    def setup_class(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ScriptedHandler)
+        cls.server.daemon_threads = True
+        cls.server.block_on_close = False
+        cls.server.lock = threading.Lock()
+        cls.server.hits = Counter()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setup_method(self):
+        self.server.hits.clear()
+
+    def hits(self, method, path):
+        return self.server.hits[(method, path)]
+
+    def test_timing_keys_and_keepalive(self):
+        client = CountingClient(max_retries=2)
+        resp, timing = client.request("get", f"{self.base}/status/200")
+        assert resp.status_code == 200 and set(timing) == TIMING_KEYS
+        assert timing["retries"] == 0 and timing["connect_ms"] > 0
+        assert 0 < timing["ttfb_ms"] <= timing["total_ms"]
+        # 第二次请求复用 keep-alive 连接，不再建连
+        _, timing = client.request("GET", f"{self.base}/status/200")
+        assert timing["connect_ms"] == 0.0
+
+    def test_retry_stops_at_max_retries(self):
+        client = CountingClient(max_retries=2)
+        resp, timing = client.request("GET", f"{self.base}/status/503")
+        assert resp.status_code == 503 and timing["retries"] == 2
+        assert self.hits("GET", "/status/503") == 3 and client.sleeps == 2
+
+        resp, timing = client.request("GET", f"{self.base}/status/502,504,200")
+        assert resp.status_code == 200 and resp.json()["hit"] == 3 and timing["retries"] == 2
+
+        resp, timing = CountingClient(max_retries=0).request("GET", f"{self.base}/status/504")
+        assert resp.status_code == 504 and timing["retries"] == 0
+
+    def test_total_ms_covers_retries(self):
+        client = CountingClient(sleep=0.05, max_retries=2)
+        _, timing = client.request("GET", f"{self.base}/status/503,503,200")
+        assert timing["retries"] == 2
+        # total_ms 包含两次退避等待，ttfb_ms 只是最后一次尝试
+        assert timing["total_ms"] >= 100 and timing["ttfb_ms"] < timing["total_ms"] - 90
+
+    def test_post_not_retried_after_sent(self):
+        client = CountingClient(max_retries=3, read_timeout=0.1)
+        resp, timing = client.request("POST", f"{self.base}/status/503", json={"a": 1})
+        assert resp.status_code == 503 and timing["retries"] == 0
+        assert self.hits("POST", "/status/503") == 1
+
+        # 读超时：请求已经发出，POST 不重试，直接抛出
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            client.request("POST", f"{self.base}/slow", json={"a": 1})
+        assert self.hits("POST", "/slow") == 1 and client.sleeps == 0
+
+    def test_read_timeout_get(self):
+        client = CountingClient(max_retries=1, read_timeout=0.1)
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            client.request("GET", f"{self.base}/slow")
+        assert self.hits("GET", "/slow") == 2 and client.sleeps == 1
+
+    def test_connect_errors(self):
+        url = f"http://127.0.0.1:{free_port()}/status/200"  # 没有服务监听，建连被拒
+        for method in ("GET", "POST"):
+            # 请求确定没有发出，POST 同样可以重试
+            client = CountingClient(max_retries=2, connect_timeout=0.5)
+            with pytest.raises(requests.exceptions.ConnectionError):
+                client.request(method, url)
+            assert client.sleeps == 2
+
+        client = PooledHTTPClient(max_retries=0)
+        assert client._safe_to_retry("POST", requests.exceptions.ConnectTimeout())
+        assert not client._safe_to_retry("POST", requests.exceptions.ReadTimeout())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+知识库流式导入测试（无需启动后端）
+
+使用方法：
+    pytest tests/test_ingest.py -v
+"""
+
+import os
+import sys
+import json
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+for p in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "tools")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import build_kb_index
+from agent_platform.knowledge import ingest
+from agent_platform.knowledge.retriever import TfidfRAG
+
+
+class TestIngest:
+    """多来源流式导入测试"""
+
+    def setup_method(self):
+        with open(build_kb_index.KB_PATH, "r", encoding="utf-8") as f:
+            self.data = json.load(f)
+
+    def test_json_array_streaming(self, tmp_path):
+        items = self.data + [{"id": "x", "content": "含 ] 与 [ 和 \"引号\" 的正文，\\u00e9", "n": [1, {"a": None}]},
+                             12345, "尾部字符串", True]
+        path = tmp_path / "kb.json"
+        path.write_text(json.dumps(items, ensure_ascii=False, indent=2), encoding="utf-8")
+        # 每次只读 7 个字符，元素必然跨越读入边界
+        assert list(ingest.iter_json_array(str(path), read_size=7)) == items
+        (tmp_path / "empty.json").write_text("", encoding="utf-8")
+        assert list(ingest.iter_json_array(str(tmp_path / "empty.json"))) == []
+
+    def test_sources_and_normalize(self, tmp_path):
+        (tmp_path / "kb.jsonl").write_text("\n".join(json.dumps(e, ensure_ascii=False) for e in [
+            {"doc_id": "j1", "name": "加班规定", "text": ["工作日加班1.5倍", "休息日2倍"]},
+            {"id": "j2", "title": "空文档"},
+        ]) + "\n", encoding="utf-8")
+        docs_dir = tmp_path / "handbook" / "attendance"
+        docs_dir.mkdir(parents=True)
+        (docs_dir / "remote.md").write_text("# 远程办公\n\n每周可远程办公**两天**。", encoding="utf-8")
+        (docs_dir / "late.txt").write_text("---\nid: late\napplicable: 正式员工\neffective_date: 2024-05-01\n---\n"
+                                           "迟到超过30分钟按半天事假处理。", encoding="utf-8")
+        sources = [str(tmp_path / "kb.jsonl"), str(tmp_path / "handbook")]
+        stats = {}
+        assert len(list(ingest.iter_chunked(sources, workers=1, stats=stats))) == 3 and stats["skipped"] == 1
+        docs = [d for d in map(ingest.normalize, ingest.iter_entries(sources)) if d]
+        assert docs[0] == {"id": "j1", "title": "加班规定", "category": "general", "applicable": "全体员工",
+                           "effective_date": "", "content": "工作日加班1.5倍\n休息日2倍"}
+        late, remote = docs[1], docs[2]
+        assert late["id"] == "late" and late["applicable"] == "正式员工" and late["category"] == "attendance"
+        assert late["content"].strip() == "迟到超过30分钟按半天事假处理。"
+        assert remote["id"] == "attendance/remote" and remote["title"] == "远程办公"
+        assert "**" not in remote["content"]
+
+    def test_parallel_matches_serial(self, tmp_path):
+        data = [dict(e, id=f"{e['id']}_{i}") for i in range(50) for e in self.data]
+        (tmp_path / "kb.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        serial = ingest.ingest([str(tmp_path / "kb.json")], str(tmp_path / "a.jsonl"), workers=1)
+        parallel = ingest.ingest([str(tmp_path / "kb.json")] * 2, str(tmp_path / "b.jsonl"), workers=2)
+        assert parallel["docs"] == serial["docs"] and parallel["duplicates"] == len(data)
+        assert (tmp_path / "a.jsonl").read_text(encoding="utf-8") == (tmp_path / "b.jsonl").read_text(encoding="utf-8")
+        assert len(ingest.ChunkFile(str(tmp_path / "a.jsonl"))) == serial["chunks"]
+
+    def test_build_from_multiple_sources(self, tmp_path):
+        (tmp_path / "extra.jsonl").write_text(json.dumps(
+            {"id": "policy_overtime", "title": "加班政策", "category": "attendance", "content": "加班需提前审批。"},
+            ensure_ascii=False) + "\n", encoding="utf-8")
+        (tmp_path / "empty.json").write_text("", encoding="utf-8")
+        sources = [build_kb_index.KB_PATH, str(tmp_path / "empty.json"), str(tmp_path / "extra.jsonl")]
+        report = build_kb_index.build(sources, str(tmp_path / "chunks.jsonl"), str(tmp_path / "index"), workers=2)
+        assert report["mode"] == "full" and report["rechunked_docs"] == len(self.data) + 1
+        hits = TfidfRAG(str(tmp_path / "index")).search("加班政策", k=1)
+        assert hits[0]["doc_id"] == "policy_overtime"
+        again = build_kb_index.build(sources, str(tmp_path / "chunks.jsonl"), str(tmp_path / "index"),
+                                     incremental=True)
+        assert again["mode"] == "unchanged"
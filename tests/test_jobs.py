@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+后台评估任务测试（无需启动后端，用假的 run_case 代替真实评估）
+
+使用方法：
+    pytest tests/test_jobs.py -v
+"""
+
+import os
+import sys
+import time
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.core.eval_engine import EvaluationEngine
+from agent_platform.core.jobs import JobManager
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.005)
+
+
+class GatedCases:
+    """每条用例都要等测试放行一次才能完成，用来逐步推进任务进度"""
+
+    def __init__(self):
+        self.gate = threading.Semaphore(0)
+
+    def run_case(self, case, idx):
+        assert self.gate.acquire(timeout=5)
+        return {"id": case["id"], "idx": idx, "pass": idx % 2 == 1}
+
+    def step(self, n=1):
+        for _ in range(n):
+            self.gate.release()
+
+
+def summarize(results):
+    return {"total": len(results), "passed": sum(r["pass"] for r in results)}
+
+
+def make_manager():
+    engine = EvaluationEngine(max_workers=1, provider_limits={}, case_timeout=None)
+    return JobManager(max_workers=1, engine=engine)
+
+
+class TestJobs:
+    """JobManager / EvalJob 测试"""
+
+    cases = [{"id": f"c{i}"} for i in range(1, 5)]
+
+    def test_progress_and_snapshot(self):
+        gated = GatedCases()
+        manager = make_manager()
+        job = manager.submit("run", self.cases, gated.run_case, summarize)
+        assert manager.get(job.id) is job and job.total == 4
+        wait_until(lambda: job.status == "running")
+        assert job.snapshot()["completed"] == 0
+
+        gated.step(2)
+        wait_until(lambda: len(job.results) == 2)
+        snap = job.snapshot()
+        assert snap["completed"] == 2 and snap["progress"] == 50.0 and snap["metrics"] is None
+        # offset 之后只返回新增结果
+        assert [r["id"] for r in job.snapshot(offset=1)["results"]] == ["c2"]
+        assert job.snapshot(offset=2)["results"] == []
+
+        gated.step(2)
+        wait_until(lambda: job.finished)
+        snap = job.snapshot(offset=2)
+        assert snap["status"] == "succeeded" and [r["id"] for r in snap["results"]] == ["c3", "c4"]
+        assert snap["metrics"] == {"total": 4, "passed": 2}
+        assert "results" not in manager.list()[0]
+
+    def test_cancel(self):
+        gated = GatedCases()
+        manager = make_manager()
+        job = manager.submit("run", self.cases, gated.run_case, summarize)
+        gated.step()
+        wait_until(lambda: len(job.results) == 1)
+        assert manager.cancel(job.id) is job and manager.cancel("missing") is None
+        gated.step(len(self.cases))  # 放行正在执行的用例；其余用例不应再开始
+        wait_until(lambda: job.finished)
+        assert job.status == "cancelled" and len(job.results) < len(self.cases)
+        assert job.metrics == summarize(job.results)
+
+    def test_events(self):
+        gated = GatedCases()
+        manager = make_manager()
+        job = manager.submit("run", self.cases[:3], gated.run_case, summarize)
+        events = job.events(heartbeat=0.02)
+        # 没有进展时先收到心跳
+        event, payload = next(events)
+        assert event == "ping" and payload["completed"] == 0
+
+        gated.step(3)
+        rest = [e for e in events if e[0] != "ping"]  # 任务结束后生成器自行结束
+        assert [e[0] for e in rest] == ["progress"] * 3 + ["done"]
+        assert [p["index"] for _, p in rest[:3]] == [1, 2, 3]
+        assert rest[0][1]["result"]["id"] == "c1"
+        assert rest[-1][1]["status"] == "succeeded" and "results" not in rest[-1][1]
+
+        # 任务结束后从 offset 订阅：只补发之后的结果，然后立即结束
+        replay = list(job.events(offset=2))
+        assert [e[0] for e in replay] == ["progress", "done"] and replay[0][1]["result"]["id"] == "c3"
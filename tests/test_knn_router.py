@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+KNNRouter 近邻路由测试（无需启动后端，不访问网络）
+
+使用方法：
+    pytest tests/test_knn_router.py -v
+"""
+
+import os
+import sys
+import json
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.router.basic_router import BasicRouter
+from agent_platform.router.cascading_router import CascadingRouter
+from agent_platform.router.knn_router import KNNRouter, REGISTRY_PATH, char_ngrams
+
+
+class TestKNNRouter:
+    """注册表示例近邻路由测试"""
+
+    @classmethod
+    def setup_class(cls):
+        with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+            cls.apis = json.load(f)
+        cls.router = KNNRouter()
+
+    def test_char_ngrams(self):
+        assert char_ngrams("年假？", (1, 2)) == {"年": 1, "假": 1, "年假": 1}
+        assert char_ngrams("  ", (1, 3)) == {}
+
+    def test_registry_examples(self):
+        """注册表中的 positive 示例原样查询时都路由回自己的 API，且有一定把握"""
+        for api in self.apis:
+            for q in api["examples"]["positive"]:
+                d = self.router.decide(q)
+                assert d.api == api["api"] and d.confidence >= 0.5, (q, d)
+                assert d.candidates[0] == (d.api, self.router.rank(q)[0][1]) and len(d.candidates) == 3
+
+    def test_negative_penalty(self):
+        apis = [
+            {"api": "/a", "purpose": "", "examples": {"positive": ["住宿标准查询"], "negative": ["住宿标准"]}},
+            {"api": "/b", "purpose": "", "examples": {"positive": ["住宿费用标准"], "negative": []}},
+        ]
+        assert KNNRouter(apis=apis, negative_weight=0).plan("住宿标准") == "/a"
+        assert KNNRouter(apis=apis).plan("住宿标准") == "/b"
+
+    def test_latency_and_cascade(self):
+        queries = ["我想报销上个月出差的机票费用", "合同快到期了怎么续签", "今天天气不错"] * 200
+        start = time.perf_counter()
+        for q in queries:
+            self.router.decide(q)
+        assert (time.perf_counter() - start) / len(queries) < 0.001
+        # 规则路由没把握的问题由近邻路由接住
+        cascade = CascadingRouter([BasicRouter(), self.router], threshold=0.7)
+        decision = cascade.decide("查一下假期余额")
+        assert decision.tier == "knn" and decision.api == "/hr/leave/balance"
+
+    def test_refit_during_rank(self):
+        """rank 进行中发生热加载：本次仍完整使用开始时的状态，下一次使用新状态"""
+
+        class ReloadingKNN(KNNRouter):
+            reload_to = None
+
+            def _similarities(self, index, query):
+                sims = super()._similarities(index, query)
+                if self.reload_to is not None:
+                    self.fit(self.reload_to)
+                    self.reload_to = None
+                return sims
+
+        query = "合同快到期了怎么续签"
+        router = ReloadingKNN(apis=self.apis)
+        router.reload_to = self.apis[:3]
+        assert router.rank(query) == KNNRouter(apis=self.apis).rank(query)
+        assert router.rank(query) == KNNRouter(apis=self.apis[:3]).rank(query)
+        assert router.api_names == [a["api"] for a in self.apis[:3]]
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+LLMRouter prompt 构造测试（无需启动后端，用假的 LLM 客户端代替真实调用）
+
+使用方法：
+    pytest tests/test_llm_router.py -v
+"""
+
+import os
+import re
+import sys
+import json
+from types import SimpleNamespace
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.router.knn_router import REGISTRY_PATH
+from agent_platform.router.llm_router import LLMRouter, FALLBACK_API, parse_batch_answer
+from agent_platform.router.route_cache import RouteCache
+from agent_platform.utils.text import estimate_tokens, normalize_query
+
+
+class FakeClient:
+    """按固定答案返回的假 chat.completions 客户端，记录收到的 prompt"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature=0):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        answer = next(api for q, api in self.answers.items() if q in prompt)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"`{answer}`"))])
+
+
+def make_router(monkeypatch, answers, **kwargs):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    router = LLMRouter(registry_path=REGISTRY_PATH, use_cache=False, **kwargs)
+    router.client = FakeClient(answers)
+    return router
+
+
+class TestLLMRouterPrompt:
+    """候选 API 预选与 prompt token 统计"""
+
+    def test_full_catalog(self, monkeypatch):
+        router = make_router(monkeypatch, {"年假还剩几天": "/hr/leave/balance"}, candidates=0)
+        assert router.plan("我今年年假还剩几天？") == "/hr/leave/balance"
+        prompt = router.client.prompts[0]
+        assert all(api["api"] in prompt for api in router.apis)
+        stats = router.prompt_stats()
+        assert stats["requests"] == 1 and stats["saved_tokens"] == 0
+        # 前缀按注册表版本预先估算，与逐字估算整个 prompt 只差取整误差
+        assert abs(stats["prompt_tokens"] - estimate_tokens(prompt) - estimate_tokens("你是一个精确的 API 分类助手。")) <= 3
+
+    def test_candidates(self, monkeypatch):
+        answers = {"年假还剩几天": "/hr/leave/balance", "续签": "/hr/contract/renew", "天气": "/hr/leave/apply"}
+        router = make_router(monkeypatch, answers, candidates=3)
+        assert router.plan("我今年年假还剩几天？") == "/hr/leave/balance"
+        prompt, picked, tokens, full_tokens = router.build_prompt("我要续签合同")
+        assert picked[0] == "/hr/contract/renew" and picked[-1] == FALLBACK_API and len(picked) == 4
+        assert "/hr/recruitment/openings" not in prompt and tokens < full_tokens
+        full_prompt = make_router(monkeypatch, answers, candidates=0).build_prompt("我要续签合同")[0]
+        assert abs(full_tokens - (estimate_tokens(full_prompt) + estimate_tokens("你是一个精确的 API 分类助手。"))) <= 5
+        assert router.decide("今天天气不错").api == "/hr/leave/apply"
+        stats = router.prompt_stats()
+        assert stats["requests"] == 2 and stats["saved_tokens"] > 0 and stats["saved_ratio"] > 0.3
+        assert stats["off_candidates"] == ("/hr/leave/apply" not in router._candidate_apis("今天天气不错"))
+
+    def test_reload_registry(self, monkeypatch, tmp_path):
+        with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+            apis = json.load(f)
+        path = tmp_path / "registry.json"
+        path.write_text(json.dumps(apis[:5], ensure_ascii=False), encoding="utf-8")
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        router = LLMRouter(registry_path=str(path), use_cache=False, candidates=3)
+        assert len(router._candidate_apis("续签合同")) <= 4
+        apis.append({"api": "/hr/new", "purpose": "新功能", "examples": {"positive": ["新功能怎么用"], "negative": []}})
+        path.write_text(json.dumps(apis, ensure_ascii=False), encoding="utf-8")
+        router.reload_registry()
+        assert router._candidate_apis("新功能怎么用")[0] == "/hr/new"
+        assert "/hr/new：新功能" in router._prompt_parts["full_prefix"]
+
+    def test_reload_during_plan(self, monkeypatch, tmp_path):
+        """路由过程中注册表热加载：本次路由完整使用旧版本，结果不写入新版本的缓存"""
+        with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+            apis = json.load(f)
+        path = tmp_path / "registry.json"
+        path.write_text(json.dumps(apis[:5], ensure_ascii=False), encoding="utf-8")
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        cache = RouteCache(str(tmp_path / "routes.sqlite3"), "init")
+        router = LLMRouter(registry_path=str(path), cache=cache, candidates=3)
+        new_apis = apis[:5] + [{"api": "/hr/new", "purpose": "新功能",
+                                "examples": {"positive": ["新功能怎么用"], "negative": []}}]
+
+        class ReloadingClient(FakeClient):
+            def create(self, model, messages, temperature=0):
+                path.write_text(json.dumps(new_apis, ensure_ascii=False), encoding="utf-8")
+                router.reload_registry()
+                return super().create(model, messages, temperature)
+
+        router.client = ReloadingClient({"新功能": "/hr/leave/balance"})
+        decision = router.decide("新功能怎么用")
+        assert decision.api == "/hr/leave/balance" and decision.confidence == 1.0
+        assert "/hr/new" not in router.client.prompts[0]
+        assert cache.get(normalize_query("新功能怎么用")) is None
+        # 热加载后的路由使用新版本
+        assert router._candidate_apis("新功能怎么用")[0] == "/hr/new" and "/hr/new" in router._prompt_parts["lines"]
+
+    def test_unknown_api_not_cached(self, monkeypatch, tmp_path):
+        """注册表中没有的路径照常返回（置信度 0），但不写入缓存，下次仍重新调用 LLM"""
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        router = LLMRouter(registry_path=REGISTRY_PATH, cache=RouteCache(str(tmp_path / "r.sqlite3"), "fp"))
+        router.client = FakeClient({"加班费": "/hr/overtime/pay", "年假": "/hr/leave/balance"})
+        for _ in range(2):
+            assert router.decide("加班费怎么算").confidence == 0.0
+        assert router.plan("年假还剩几天") == router.plan("年假还剩几天") == "/hr/leave/balance"
+        assert len(router.client.prompts) == 3
+        assert router.cache.get(normalize_query("加班费怎么算")) is None
+        router.cache.close()
+
+
+class BatchFakeClient(FakeClient):
+    """批量 prompt 返回 JSON；omit 中的问题不出现在批量结果里，raw 不为 None 时原样返回 raw"""
+
+    def __init__(self, answers, omit=(), raw=None):
+        super().__init__(answers)
+        self.omit = set(omit)
+        self.raw = raw
+
+    def create(self, model, messages, temperature=0):
+        prompt = messages[-1]["content"]
+        if "编号" not in prompt:
+            return super().create(model, messages, temperature)
+        self.prompts.append(prompt)
+        questions = re.findall(r"^(\d+)\. (.+)$", prompt, re.M)
+        result = {n: self.answers[q] for n, q in questions if q not in self.omit}
+        content = self.raw if self.raw is not None else "```json\n" + json.dumps(result) + "\n```"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class TestPlanBatch:
+    """批量路由"""
+
+    answers = {"我今年年假还剩几天？": "/hr/leave/balance", "帮我申请明天一天病假": "/hr/leave/apply",
+               "我要续签合同": "/hr/contract/renew", "查一下我的个税": "/hr/payroll/tax",
+               "推荐候选人张三": "/hr/recruitment/referral"}
+
+    def test_parse_batch_answer(self):
+        assert parse_batch_answer('结果：{"1": "`/hr/policy`", "2": "不知道", "9": "/hr/a"}', 3) == {1: "/hr/policy"}
+        assert parse_batch_answer('["/hr/a", "/hr/b"]', 2) == {1: "/hr/a", 2: "/hr/b"}
+        assert parse_batch_answer("/hr/policy", 1) == {} and parse_batch_answer("{1: ", 1) == {}
+
+    def test_batches_and_retry(self, monkeypatch):
+        router = make_router(monkeypatch, {}, candidates=3)
+        router.client = BatchFakeClient(self.answers, omit={"我要续签合同"})
+        queries = list(self.answers) + ["我今年年假还剩几天"]  # 规范化后与第一条相同
+        assert router.plan_batch(queries, batch_size=2) == [self.answers[q] for q in self.answers] + ["/hr/leave/balance"]
+        # 5 条不同问题 -> 2 次批量调用（2+2）+ 最后 1 条单独调用 + 1 条缺失重试
+        prompts = router.client.prompts
+        assert len(prompts) == 4 and sum("编号" in p for p in prompts) == 2
+        stats = router.prompt_stats()
+        assert stats["batch_calls"] == 2 and stats["batch_queries"] == 4 and stats["batch_retries"] == 1
+        assert stats["requests"] == 4 and stats["saved_tokens"] > 0
+
+    def test_unparseable_and_cache(self, monkeypatch, tmp_path):
+        from agent_platform.router.route_cache import RouteCache
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        router = LLMRouter(registry_path=REGISTRY_PATH, cache=RouteCache(str(tmp_path / "r.sqlite3"), "fp"))
+        router.client = BatchFakeClient(self.answers, raw="抱歉，我无法确定。")
+        queries = list(self.answers)
+        assert router.plan_batch(queries, batch_size=10) == [self.answers[q] for q in queries]
+        assert len(router.client.prompts) == 1 + len(queries)
+        # 结果已写入缓存，再次批量路由不调用 LLM
+        assert router.plan_batch(queries[::-1]) == [self.answers[q] for q in queries[::-1]]
+        assert len(router.client.prompts) == 1 + len(queries)
+        router.cache.close()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+知识库索引热替换测试（无需启动后端）
+
+使用方法：
+    pytest tests/test_reloadable_rag.py -v
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+for p in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "tools")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import build_kb_index
+from agent_platform.knowledge.reloadable import ReloadableRAG
+from agent_platform.knowledge.retriever import TfidfRAG
+
+
+class TestReloadableRAG:
+    """ReloadableRAG 测试"""
+
+    def build(self, tmp_path, data):
+        kb = tmp_path / "kb.json"
+        kb.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        build_kb_index.build(str(kb), str(tmp_path / "chunks.jsonl"), str(tmp_path / "index"))
+
+    def test_swap_under_concurrent_queries(self, tmp_path):
+        with open(build_kb_index.KB_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.build(tmp_path, data)
+        handle = ReloadableRAG(str(tmp_path / "index"), check_interval=0)
+        old_version = handle.version
+        assert old_version and handle.status()["loads"] == 1
+
+        errors, seen = [], set()
+        stop = threading.Event()
+
+        def query():
+            while not stop.is_set():
+                try:
+                    rag = handle.get()
+                    rag.search("婚假政策", k=3)
+                    seen.add(rag.index_id)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for t in threads:
+            t.start()
+        data[1]["content"] += "新增一段说明。"
+        self.build(tmp_path, data)
+        deadline = time.time() + 10
+        while handle.version == old_version and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        assert not errors
+        assert handle.version != old_version
+        assert seen == {old_version, handle.version}
+
+    def test_reload_closes_old_pool(self, tmp_path):
+        """分片索引热替换后旧实例的线程池被关闭，反复替换不泄漏线程"""
+        with open(build_kb_index.KB_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        kb = tmp_path / "kb.json"
+        kb.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        build_kb_index.build(str(kb), str(tmp_path / "chunks.jsonl"), str(tmp_path / "index"), shards=3)
+
+        def pool_threads():
+            return sum(t.name.startswith("rag-shard") for t in threading.enumerate())
+
+        before = pool_threads()
+        handle = ReloadableRAG(str(tmp_path / "index"), loader=lambda path: TfidfRAG(path, workers=3))
+        first = handle.get()
+        expected = first.search("婚假政策", k=3)
+        for _ in range(5):
+            handle.reload(wait=True)
+            assert handle.get().search("婚假政策", k=3) == expected
+        # 旧实例已关闭，仍持有它的请求在当前线程照常检索
+        assert first._closed and first.search("婚假政策", k=3) == expected
+        deadline = time.time() + 5
+        while pool_threads() > before + 3 and time.time() < deadline:
+            time.sleep(0.01)
+        assert pool_threads() <= before + 3
+
+    def test_failed_reload_keeps_current(self, tmp_path):
+        with open(build_kb_index.KB_PATH, "r", encoding="utf-8") as f:
+            self.build(tmp_path, json.load(f))
+        handle = ReloadableRAG(str(tmp_path / "index"), check_interval=0)
+        version = handle.version
+        (tmp_path / "index" / "vocab.json").write_text("not json", encoding="utf-8")
+        status = handle.reload(wait=True)
+        assert status["index_version"] == version
+        assert status["failures"] == 1 and status["last_error"]
+        assert handle.get().search("婚假政策", k=1)
+
+
+class TestAdminReload:
+    """/admin/rag/reload 鉴权"""
+
+    def setup_method(self):
+        sys.path.insert(0, os.path.join(PROJECT_ROOT, "poc/hr/apis"))
+        import flask_server
+
+        self.server = flask_server
+        self.client = flask_server.app.test_client()
+
+    def reload(self, addr="127.0.0.1", headers=None):
+        return self.client.post("/admin/rag/reload", json={"wait": True}, headers=headers or {},
+                                environ_base={"REMOTE_ADDR": addr})
+
+    def test_loopback_only_without_token(self, monkeypatch):
+        monkeypatch.setattr(self.server.Config, "ADMIN_TOKEN", "")
+        assert self.reload("10.0.0.8").status_code == 403
+        assert self.reload("127.0.0.1").status_code == 200
+        assert self.reload("::1").status_code == 200
+
+    def test_token_required_when_configured(self, monkeypatch):
+        monkeypatch.setattr(self.server.Config, "ADMIN_TOKEN", "s3cret")
+        # 配置了令牌后本机请求同样需要令牌
+        assert self.reload().status_code == 401
+        assert self.reload(headers={"X-Admin-Token": "wrong"}).status_code == 401
+        assert self.reload("10.0.0.8", {"X-Admin-Token": "s3cret"}).status_code == 200
+        assert self.reload("10.0.0.8", {"Authorization": "Bearer s3cret"}).status_code == 200
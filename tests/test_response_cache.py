@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+政策接口响应缓存测试（无需启动后端，使用 Flask test client）
+
+使用方法：
+    pytest tests/test_response_cache.py -v
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.utils.response_cache import ResponseCache
+from agent_platform.utils.text import normalize_topic
+
+
+class TestResponseCache:
+    """ResponseCache 与主题规范化测试"""
+
+    def test_lru_and_get_or_build(self):
+        cache = ResponseCache(max_size=2)
+        calls = []
+        build = lambda body: (lambda: calls.append(body) or body)
+        a = cache.get_or_build("a", build(b'{"x": 1}'))
+        assert cache.get_or_build("a", build(b"other")) == a and calls == [b'{"x": 1}']
+        assert a[1] == ResponseCache.etag_for(b'{"x": 1}')
+        cache.get_or_build("b", build(b"2"))
+        cache.get("a")  # a 变为最近使用，b 被淘汰
+        cache.get_or_build("c", build(b"3"))
+        assert cache.get("b") is None and cache.get("a") == a
+        assert cache.get_or_build("d", lambda: None) is None and cache.get("d") is None
+        assert cache.stats()["size"] == 2
+
+    def test_normalize_topic(self):
+        assert normalize_topic("  婚假政策？") == normalize_topic("婚假政策") == "婚假政策"
+        assert normalize_topic("Annual   LEAVE") == "annual leave"
+        # 保留词间空格：分词结果不同的主题不能共用缓存
+        assert normalize_topic("适用对象 全体员工") != normalize_topic("适用对象全体员工")
+
+    def test_policy_endpoint(self):
+        sys.path.insert(0, os.path.join(PROJECT_ROOT, "poc/hr/apis"))
+        import flask_server
+
+        client = flask_server.app.test_client()
+        flask_server.policy_cache.clear()
+        first = client.get("/hr/policy", query_string={"topic": "婚假政策"})
+        assert first.status_code == 200 and first.headers["Cache-Control"]
+        etag = first.headers["ETag"]
+        hits = flask_server.policy_cache.hits
+        # 规范化后相同的主题命中缓存，topic 仍原样回显
+        second = client.get("/hr/policy", query_string={"topic": "婚假政策？"})
+        assert flask_server.policy_cache.hits == hits + 1
+        assert second.json["topic"] == "婚假政策？" and second.json["snippets"] == first.json["snippets"]
+        assert second.json["index_version"] == flask_server.rag_index.get().index_id
+        # 重新验证
+        again = client.get("/hr/policy", query_string={"topic": "婚假政策"}, headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.data == b""
+        # 不同接口 / 过滤条件不共用缓存
+        travel = client.get("/hr/travel/policy", query_string={"topic": "婚假政策"})
+        assert travel.headers.get("ETag") != etag
+
+    def test_invalid_filters_rejected(self):
+        sys.path.insert(0, os.path.join(PROJECT_ROOT, "poc/hr/apis"))
+        import flask_server
+
+        client = flask_server.app.test_client()
+        for path in ("/hr/policy", "/hr/travel/policy"):
+            for value in ("2024-13-99", "abc"):
+                resp = client.get(path, query_string={"topic": "婚假政策", "effective_on": value})
+                assert resp.status_code == 400 and "effective_on" in resp.json["error"]
+        assert client.get("/hr/policy", query_string={"topic": "婚假政策", "effective_on": "2024-02-01"}).status_code == 200
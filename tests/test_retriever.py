@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+知识库检索测试（无需启动后端）
+
+使用方法：
+    pytest tests/test_retriever.py -v
+"""
+
+import os
+import sys
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+for p in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "tools")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import build_kb_index
+from agent_platform.knowledge.retriever import TfidfRAG, top_k
+from agent_platform.knowledge.chunk_meta import ChunkMeta
+from agent_platform.knowledge.ingest import make_chunks
+
+
+def brute_force(rag, query, k, allowed=None):
+    """全量打分 + 全排序的参考实现：只保留得分 > 0 的切片，分数并列时行号小者优先"""
+    qv = rag.vectorizer.transform([query])
+    sims = (rag.postings.T @ qv.T).toarray().ravel()
+    rows = np.flatnonzero(sims > 0)
+    if allowed is not None:
+        rows = [i for i in rows if allowed(rag.meta[i])]
+    order = sorted(rows, key=lambda i: (-sims[i], i))[:k]
+    return [(int(i), float(sims[i])) for i in order]
+
+
+class TestTopK:
+    """top_k 选择测试"""
+
+    def test_matches_full_sort(self):
+        rng = np.random.default_rng(0)
+        for _ in range(500):
+            n = int(rng.integers(0, 40))
+            rows = rng.permutation(200)[:n]
+            scores = rng.integers(0, 5, n).astype(float)
+            k = int(rng.integers(1, 10))
+            got_rows, got_scores = top_k(rows, scores, k)
+            expected = sorted(zip(-scores, rows))[:k]
+            assert list(got_rows) == [r for _, r in expected]
+            assert list(got_scores) == [-s for s, _ in expected]
+
+
+class TestTfidfRAG:
+    """TfidfRAG 检索测试"""
+
+    QUERIES = ["婚假政策", "年假政策", "差旅机票标准", "适用对象 全体员工", "生效日期 2024", "没有命中的问题"]
+
+    @classmethod
+    def setup_class(cls):
+        cls.rag = TfidfRAG()
+
+    def test_search_matches_brute_force(self):
+        for q in self.QUERIES:
+            for k in (1, 3, 10):
+                hits = self.rag.search(q, k=k)
+                expected = brute_force(self.rag, q, k)
+                assert [h["text"] for h in hits] == [self.rag.meta[i]["text"] for i, _ in expected]
+                assert np.allclose([h["score"] for h in hits], [s for _, s in expected])
+
+    def test_search_many(self):
+        """批量检索与逐条检索结果一致"""
+        batch = self.rag.search_many(self.QUERIES * 3, k=3)
+        assert len(batch) == len(self.QUERIES) * 3
+        for q, hits in zip(self.QUERIES * 3, batch):
+            assert hits == self.rag.search(q, k=3)
+        assert self.rag.search_many([], k=3) == []
+
+    def test_search_with_filters(self):
+        """过滤后的检索 = 先按元数据筛选切片再全量打分"""
+        cases = [
+            ({"category": "travel"}, lambda m: m["category"] == "travel"),
+            ({"category": ["leave", "travel"]}, lambda m: True),
+            ({"applicable": "正式员工"}, lambda m: m["applicable"] in ("正式员工", "全体员工")),
+            ({"effective_on": "2024-02-01"}, lambda m: m["effective_date"] <= "2024-02-01"),
+            ({"category": "leave", "applicable": "全职员工", "effective_on": "2024-12-31"},
+             lambda m: m["category"] == "leave" and m["applicable"] in ("全职员工", "全体员工")),
+        ]
+        for filters, allowed in cases:
+            for q in self.QUERIES + ["适用对象 生效日期 2024"]:
+                hits = self.rag.search(q, k=5, filters=filters)
+                expected = brute_force(self.rag, q, 5, allowed)
+                assert [h["text"] for h in hits] == [self.rag.meta[i]["text"] for i, _ in expected]
+                assert np.allclose([h["score"] for h in hits], [s for _, s in expected])
+            assert self.rag.search_many(self.QUERIES, k=5, filters=filters) == \
+                [self.rag.search(q, k=5, filters=filters) for q in self.QUERIES]
+
+    def test_invalid_filters(self):
+        with pytest.raises(ValueError):
+            self.rag.search("婚假政策", filters={"department": "HR"})
+        # 无效日期不能当作“一直有效”放过所有切片
+        for value in ("2024-13-99", "abc", "2024-02-30"):
+            with pytest.raises(ValueError, match="effective_on"):
+                self.rag.search("婚假政策", filters={"effective_on": value})
+        assert self.rag.search("婚假政策", filters={"effective_on": date(2024, 2, 1)}) == \
+            self.rag.search("婚假政策", filters={"effective_on": "2024-02-01"})
+
+    def test_index_is_memory_mapped(self):
+        """postings 直接引用 mmap 打开的 .npy，不在进程内复制"""
+        for arr in (self.rag.postings.data, self.rag.postings.indices, self.rag.postings.indptr):
+            base = arr
+            while not isinstance(base, np.memmap) and base.base is not None:
+                base = base.base
+            assert isinstance(base, np.memmap)
+        assert self.rag.postings.dtype == np.float32
+        assert self.rag.manifest["n_chunks"] == len(self.rag.meta)
+
+    def test_no_shared_terms(self):
+        assert self.rag.search("没有命中的问题", k=3) == []
+
+
+class TestChunkMeta:
+    """紧凑切片元数据测试"""
+
+    def setup_method(self):
+        with open(build_kb_index.KB_PATH, "r", encoding="utf-8") as f:
+            self.chunks = [c for e in json.load(f) for c in make_chunks(e)]
+
+    def test_roundtrip_and_shared_doc_rows(self):
+        meta = ChunkMeta.from_chunks(self.chunks)
+        assert len(meta) == len(self.chunks)
+        assert [meta[i] for i in range(len(meta))] == self.chunks
+        assert meta.n_docs == len({c["doc_id"] for c in self.chunks})
+        assert list(meta.chunk_codes("category")) == [meta.values("category").index(c["category"])
+                                                      for c in self.chunks]
+
+    def test_loaded_from_index(self, tmp_path):
+        rag = TfidfRAG()
+        assert isinstance(rag.meta.arrays["meta.text.bytes"], np.memmap)
+        # 旧版 meta.json（按列的完整字符串）仍可读取
+        columns = {field: [c[field] for c in self.chunks] for field in self.chunks[0]}
+        (tmp_path / "meta.json").write_text(json.dumps(columns, ensure_ascii=False), encoding="utf-8")
+        legacy = ChunkMeta.load(str(tmp_path))
+        assert [legacy[i] for i in range(len(legacy))] == [rag.meta[i] for i in range(len(rag.meta))]
+
+
+class TestShardedRAG:
+    """分片索引检索测试"""
+
+    QUERIES = TestTfidfRAG.QUERIES + ["适用对象 生效日期 2024", "hr leave apply"]
+
+    @classmethod
+    def setup_class(cls):
+        import tempfile
+        cls.tmp = tempfile.TemporaryDirectory()
+        with open(build_kb_index.KB_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # 每篇文档复制多份，制造跨分片的同分切片，检验并列时的排序
+        data = [dict(e, id=f"{e['id']}_{i}") for i in range(4) for e in data]
+        kb = os.path.join(cls.tmp.name, "kb.json")
+        with open(kb, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        cls.rags = {}
+        for shards in (1, 3, 5):
+            index = os.path.join(cls.tmp.name, f"index{shards}")
+            build_kb_index.build(kb, os.path.join(cls.tmp.name, "chunks.jsonl"), index, shards=shards)
+            cls.rags[shards] = TfidfRAG(index, workers=shards)
+
+    @classmethod
+    def teardown_class(cls):
+        cls.tmp.cleanup()
+
+    def test_identical_to_unsharded(self):
+        assert len(self.rags[5].shards) == 5
+        for filters in (None, {"category": "travel"}, {"applicable": "正式员工", "effective_on": "2024-02-01"}):
+            for q in self.QUERIES:
+                for k in (1, 3, 10):
+                    expected = self.rags[1].search(q, k=k, filters=filters)
+                    for shards in (3, 5):
+                        assert self.rags[shards].search(q, k=k, filters=filters) == expected
+            for shards in (3, 5):
+                assert self.rags[shards].search_many(self.QUERIES, k=5, filters=filters) == \
+                    self.rags[1].search_many(self.QUERIES, k=5, filters=filters)
+
+
+class TestSearchDocuments:
+    """文档级检索测试"""
+
+    @classmethod
+    def setup_class(cls):
+        import tempfile
+        import synth_kb
+        from agent_platform.knowledge.bm25 import BM25RAG
+        cls.tmp = tempfile.TemporaryDirectory()
+        docs, cls.labels = synth_kb.generate(300, vocab_size=800, seed=3, n_queries=20)
+        synth_kb.write(cls.tmp.name, docs, cls.labels)
+        build_kb_index.build(os.path.join(cls.tmp.name, "kb.json"), os.path.join(cls.tmp.name, "chunks.jsonl"),
+                             os.path.join(cls.tmp.name, "tfidf"), shards=3,
+                             bm25_path=os.path.join(cls.tmp.name, "bm25"))
+        cls.rags = [TfidfRAG(os.path.join(cls.tmp.name, "tfidf")), BM25RAG(os.path.join(cls.tmp.name, "bm25"))]
+
+    @classmethod
+    def teardown_class(cls):
+        cls.tmp.cleanup()
+
+    @staticmethod
+    def reference(rag, query, k, pooling, filters=None):
+        """逐切片打分后用 Python 按 doc_id 分组聚合"""
+        by_doc = {}
+        for hit in rag.search(query, k=len(rag.meta), filters=filters):
+            by_doc.setdefault(hit["doc_id"], []).append(hit["score"])
+        pool = {"max": max, "sum": sum, "mean_topn": lambda s: sum(sorted(s, reverse=True)[:2]) / 2}[pooling]
+        return sorted(((pool(s), d) for d, s in by_doc.items()), key=lambda x: -x[0])[:k]
+
+    def test_matches_reference(self):
+        for rag in self.rags:
+            for item in self.labels:
+                for pooling in ("max", "sum", "mean_topn"):
+                    for filters in (None, {"category": "leave"}):
+                        got = rag.search_documents(item["query"], k=5, pooling=pooling, filters=filters)
+                        expected = self.reference(rag, item["query"], 5, pooling, filters)
+                        assert np.allclose([h["score"] for h in got], [s for s, _ in expected])
+                        assert len({h["doc_id"] for h in got}) == len(got)
+                        for h in got:
+                            assert h["text"] == h["passages"][0]["text"]
+                            assert [p["score"] for p in h["passages"]] == sorted(
+                                [p["score"] for p in h["passages"]], reverse=True)
+
+    def test_invalid_pooling(self):
+        with pytest.raises(ValueError):
+            self.rags[0].search_documents("年假", pooling="median")
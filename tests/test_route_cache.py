@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+路由缓存测试（无需启动后端，不调用真实 LLM）
+
+使用方法：
+    pytest tests/test_route_cache.py -v
+"""
+
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.router.route_cache import RouteCache, registry_fingerprint
+from agent_platform.utils.text import normalize_query
+
+
+class TestRouteCache:
+    """RouteCache 测试"""
+
+    def test_hit_miss_and_persistence(self, tmp_path):
+        path = str(tmp_path / "routes.sqlite3")
+        cache = RouteCache(path, "fp1")
+        assert cache.get("年假还剩几天") is None
+        cache.put("年假还剩几天", "/hr/leave/balance")
+        assert cache.get("年假还剩几天") == "/hr/leave/balance"
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+        cache.close()
+
+        # 重启后仍可命中
+        reopened = RouteCache(path, "fp1")
+        assert reopened.get("年假还剩几天") == "/hr/leave/balance"
+        reopened.close()
+
+    def test_fingerprint_change_invalidates(self, tmp_path):
+        path = str(tmp_path / "routes.sqlite3")
+        cache = RouteCache(path, registry_fingerprint("model-a", [{"api": "/hr/policy"}]))
+        cache.put("婚假几天", "/hr/policy")
+        cache.close()
+
+        cache = RouteCache(path, registry_fingerprint("model-b", [{"api": "/hr/policy"}]))
+        assert cache.get("婚假几天") is None
+        cache.close()
+
+    def test_stale_fingerprint_ignored(self, tmp_path):
+        """调用方带上旧 fingerprint（路由开始后注册表热加载）时不读不写"""
+        cache = RouteCache(str(tmp_path / "routes.sqlite3"), "fp1")
+        cache.put("a", "/a", "fp1")
+        cache.set_fingerprint("fp2")
+        cache.put("b", "/b", "fp1")
+        assert cache.get("b") is None and cache.get("b", "fp2") is None
+        cache.put("c", "/c", "fp2")
+        assert cache.get("c", "fp1") is None and cache.get("c", "fp2") == "/c" and cache.get("c") == "/c"
+        cache.close()
+
+    def test_lru_eviction(self, tmp_path):
+        cache = RouteCache(str(tmp_path / "routes.sqlite3"), "fp", max_size=2)
+        cache.put("a", "/a")
+        cache.put("b", "/b")
+        cache.get("a")
+        cache.put("c", "/c")
+        assert cache.get("b") is None
+        assert cache.get("a") == "/a" and cache.get("c") == "/c"
+        cache.close()
+
+    def test_ttl(self, tmp_path):
+        cache = RouteCache(str(tmp_path / "routes.sqlite3"), "fp", ttl=0.01)
+        cache.put("a", "/a")
+        time.sleep(0.02)
+        assert cache.get("a") is None
+        cache.close()
+
+    def test_normalize_query(self):
+        assert normalize_query(" 年假 还剩几天？") == normalize_query("年假还剩几天")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+纯 NumPy 查询向量化器测试：与 sklearn TfidfVectorizer + Normalizer 管道结果一致
+
+使用方法：
+    pytest tests/test_vectorizer.py -v
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from agent_platform.knowledge.index_store import write_index, read_index
+from agent_platform.knowledge.retriever import CHUNK_PATH, build_vectorizer
+from agent_platform.knowledge.vectorizer import QueryVectorizer
+
+PARAM_KEYS = ["lowercase", "analyzer", "token_pattern", "ngram_range", "strip_accents",
+              "norm", "use_idf", "smooth_idf", "sublinear_tf", "binary"]
+
+
+def corpus():
+    with open(CHUNK_PATH, "r", encoding="utf-8") as f:
+        texts = [json.loads(line)["text"] for line in f if line.strip()]
+    rng = np.random.default_rng(0)
+    words = ["Café", "cafe", "HR", "leave", "apply", "婚假", "年假", "差旅", "标准", "naïve", "2024", "01", "a"]
+    for _ in range(200):
+        texts.append(" ".join(rng.choice(words, int(rng.integers(0, 12)))))
+    return texts
+
+
+class TestQueryVectorizer:
+    """QueryVectorizer 与 sklearn 等价性测试"""
+
+    @pytest.mark.parametrize("params", [
+        {"ngram_range": (1, 2)},
+        {"ngram_range": (1, 3), "sublinear_tf": True},
+        {"ngram_range": (2, 3), "binary": True, "norm": "l1"},
+        {"lowercase": False, "strip_accents": "unicode", "use_idf": False},
+        {"strip_accents": "ascii", "token_pattern": r"(?u)\b(\w+)\b", "norm": None},
+    ])
+    def test_matches_sklearn(self, params):
+        text = pytest.importorskip("sklearn.feature_extraction.text")
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import Normalizer
+
+        docs = corpus()
+        tfidf = text.TfidfVectorizer(**params).fit(docs)
+
+        all_params = tfidf.get_params()
+        qv = QueryVectorizer(list(tfidf.get_feature_names_out()), tfidf.idf_ if tfidf.use_idf else None,
+                             {k: all_params[k] for k in PARAM_KEYS})
+        queries = docs[::3] + ["", "没有命中的问题", "CAFÉ Naïve hr leave apply hr leave"]
+        expected = tfidf.transform(queries).tocsr()
+        got = qv.transform(queries)
+        expected.sort_indices()
+        assert got.shape == expected.shape
+        assert np.array_equal(got.indptr, expected.indptr)
+        assert np.array_equal(got.indices, expected.indices)
+        assert np.array_equal(got.data, expected.data)
+
+        # 原索引管道在 TfidfVectorizer 之后再接一个 L2 Normalizer，重复归一只带来舍入级差异
+        if tfidf.norm == "l2":
+            pipe = Pipeline([("tfidf", tfidf), ("norm", Normalizer())])
+            assert np.allclose(got.toarray(), pipe.transform(queries).toarray(), rtol=1e-12, atol=1e-15)
+
+    def test_matches_sklearn_through_index(self, tmp_path):
+        """经 write_index / read_index 落盘再读回的词表与 idf，查询向量仍与 sklearn 逐位一致"""
+        text = pytest.importorskip("sklearn.feature_extraction.text")
+        docs = corpus()
+        tfidf = text.TfidfVectorizer(ngram_range=(1, 2), norm="l2").fit(docs)
+        all_params = tfidf.get_params()
+        chunks = [{"doc_id": str(i), "title": "", "category": "general", "applicable": "全体员工",
+                   "effective_date": "", "text": t} for i, t in enumerate(docs)]
+        write_index(str(tmp_path / "index"), tfidf.transform(docs).T.tocsr(), list(tfidf.get_feature_names_out()),
+                    tfidf.idf_, {k: all_params[k] for k in PARAM_KEYS}, chunks)
+
+        index = read_index(str(tmp_path / "index"))
+        qv = build_vectorizer(index["vocab"], index["idf"], index["manifest"]["vectorizer"])
+        queries = docs[::3] + ["没有命中的问题", "CAFÉ Naïve hr leave apply hr leave"]
+        expected = tfidf.transform(queries).tocsr()
+        expected.sort_indices()
+        got = qv.transform(queries)
+        assert np.array_equal(got.indices, expected.indices) and np.array_equal(got.data, expected.data)
+
+    def test_serving_does_not_import_sklearn(self):
+        code = ("import sys; from agent_platform.knowledge.retriever import TfidfRAG; "
+                "TfidfRAG().search('婚假政策'); print('sklearn' in sys.modules)")
+        out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True)
+        assert out.returncode == 0, out.stderr
+        assert out.stdout.strip() == "False"
@@ -0,0 +1,76 @@
+"""
+对比 Executor 两种后端（inprocess / http）的调用延迟
+
+用法（在项目根目录执行）：
+    python tools/bench_executor.py                 # 只测 inprocess
+    python tools/bench_executor.py --http          # 同时测 http（需先启动 Flask 后端）
+    python tools/bench_executor.py --http --rounds 20 --base-url http://127.0.0.1:8000
+    python tools/bench_executor.py --include-writes  # 连同 POST 写接口一起测（会真实写库，请使用可丢弃的数据库）
+
+默认只测注册表中的 GET 接口：POST 接口（请假、报销、出差、打卡、合同等）会真实写入数据
+"""
+import os, sys, json, argparse, statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in (ROOT, os.path.join(ROOT, "poc/hr/apis")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from agent_platform.core.executor import Executor, REGISTRY_PATH
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def bench(executor, routes, rounds):
+    latencies, connects, ttfbs = [], [], []
+    for _ in range(rounds):
+        for route in routes:
+            trace = executor.execute_trace(case_id="bench", query="", route_plan=route)
+            latencies.append(trace.latency_ms)
+            connects.append(trace.timing["connect_ms"])
+            ttfbs.append(trace.timing["ttfb_ms"])
+    return {
+        "backend": executor.backend,
+        "calls": len(latencies),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "max_ms": round(max(latencies), 3),
+        "mean_connect_ms": round(statistics.mean(connects), 3),
+        "mean_ttfb_ms": round(statistics.mean(ttfbs), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executor 后端延迟对比")
+    parser.add_argument("--rounds", type=int, default=10, help="每个接口调用轮数")
+    parser.add_argument("--http", action="store_true", help="同时测试 http 后端")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--include-writes", action="store_true", help="同时测试 POST 写接口（会真实写入数据）")
+    args = parser.parse_args()
+
+    from flask_server import app
+
+    with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+        apis = json.load(f)
+    routes = [api["api"] for api in apis
+              if args.include_writes or api.get("method", "GET").upper() == "GET"]
+    if args.include_writes:
+        print("[警告] 已包含 POST 写接口，每轮调用都会写入请假 / 报销 / 出差等记录", file=sys.stderr)
+
+    executors = [Executor(backend="inprocess", app=app)]
+    if args.http:
+        executors.append(Executor(base_url=args.base_url, backend="http"))
+
+    # 预热一轮，避免首次导入 / 建连影响结果
+    for ex in executors:
+        bench(ex, routes, 1)
+    reports = [bench(ex, routes, args.rounds) for ex in executors]
+    print(json.dumps(reports, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
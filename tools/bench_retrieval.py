@@ -0,0 +1,190 @@
+"""
+检索基准与质量评测：在 synth_kb.py 生成的合成 HR 政策语料上，对每个检索后端（TF-IDF / BM25）测量
+构建耗时、索引磁盘大小、加载后的常驻内存、不同 k 下的 p50/p99 查询延迟，以及 recall@k 与 MRR，
+结果输出为 JSON，便于比较不同索引格式 / 检索引擎之间的回归
+
+用法（在项目根目录执行）：
+    python tools/bench_retrieval.py                                   # 1k / 10k / 100k 文档
+    python tools/bench_retrieval.py --sizes 1000,10000 --ks 1,3,10 --out .cache/bench.json
+    python tools/bench_retrieval.py --kb .cache/synth_10k/kb.json --labels .cache/synth_10k/queries.jsonl
+
+索引用 build_kb_index 的正式流程（同样的切片与分词参数）构建；每个后端在独立子进程中加载与查询，
+常驻内存（/proc/self/status 的 VmRSS）因此不受构建过程与其他后端的影响。
+recall@k：前 k 个切片中出现标注文档的查询占比；MRR：标注文档首次出现的名次倒数（取最大的 k 截断）
+"""
+import os, sys, json, time, argparse, tempfile, subprocess, statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+TOOLS = os.path.join(ROOT, "tools")
+if TOOLS not in sys.path:
+    sys.path.insert(0, TOOLS)
+
+from bench_retrievers import percentile, dir_bytes
+
+ENGINES = ["tfidf", "bm25"]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource  # 非 Linux：退回峰值常驻内存（macOS 单位为字节）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def load_labels(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def first_rank(hits, relevant) -> int:
+    """标注文档在结果中首次出现的名次（从 1 开始），未出现为 0"""
+    for rank, hit in enumerate(hits, 1):
+        if hit["doc_id"] in relevant:
+            return rank
+    return 0
+
+
+def evaluate(rag, labels, ks):
+    """延迟与质量：每个 k 各跑一遍全部查询（先预热一次）"""
+    rag.search(labels[0]["query"], k=max(ks))
+    report, ranks = {}, []
+    for k in ks:
+        latencies, found = [], 0
+        for item in labels:
+            start = time.perf_counter()
+            hits = rag.search(item["query"], k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            rank = first_rank(hits, set(item["relevant"]))
+            found += rank > 0
+            if k == max(ks):
+                ranks.append(rank)
+        report[f"k={k}"] = {
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "mean_ms": round(statistics.mean(latencies), 3),
+            "recall": round(found / len(labels), 4),
+        }
+    report["mrr"] = round(sum(1 / r for r in ranks if r) / len(ranks), 4)
+    return report
+
+
+def worker(engine, index_path, labels_path, ks):
+    """子进程入口：加载索引、记录内存，再跑查询"""
+    from agent_platform.knowledge.reloadable import retriever_backend
+
+    labels = load_labels(labels_path)
+    loader, _ = retriever_backend(engine)
+    before = rss_mb()
+    start = time.perf_counter()
+    rag = loader(index_path)
+    rag.warm()
+    load_s = time.perf_counter() - start
+    after = rss_mb()
+    report = {"load_s": round(load_s, 3), "rss_base_mb": round(before, 1), "rss_after_load_mb": round(after, 1),
+              "rss_load_delta_mb": round(after - before, 1)}
+    report.update(evaluate(rag, labels, ks))
+    report["rss_after_queries_mb"] = round(rss_mb(), 1)
+    return report
+
+
+def run_worker(engine, index_path, labels_path, ks):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", engine, "--index", index_path,
+         "--labels", labels_path, "--ks", ",".join(map(str, ks))],
+        capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout)
+
+
+def build_indexes(kb_path, tmp, engines):
+    """用 build_kb_index 的流程构建各后端索引，返回 {engine: {path, build_s, index_mb}}"""
+    import build_kb_index
+    from agent_platform.knowledge.index_store import read_manifest
+    from agent_platform.knowledge.bm25 import build_bm25_index
+
+    chunk_path = os.path.join(tmp, "kb_chunks.jsonl")
+    paths = {"tfidf": os.path.join(tmp, "tfidf_index"), "bm25": os.path.join(tmp, "bm25_index")}
+    built = {}
+    # BM25 沿用 TF-IDF 构建产生的切片与分词参数，因此 TF-IDF 总是先构建
+    start = time.perf_counter()
+    report = build_kb_index.build_tfidf(kb_path, chunk_path, paths["tfidf"])
+    built["tfidf"] = {"build_s": round(time.perf_counter() - start, 2), "chunks": report["chunks"]}
+    if "bm25" in engines:
+        with open(chunk_path, "r", encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f if line.strip()]
+        analyzer = {k: v for k, v in read_manifest(paths["tfidf"])["vectorizer"].items()
+                    if k in build_kb_index.ANALYZER_PARAMS}
+        start = time.perf_counter()
+        build_bm25_index(paths["bm25"], chunks, analyzer)
+        built["bm25"] = {"build_s": round(time.perf_counter() - start, 2), "chunks": len(chunks)}
+    for engine in built:
+        built[engine].update(path=paths[engine], index_mb=round(dir_bytes(paths[engine]) / 2 ** 20, 2))
+    return {e: built[e] for e in engines}
+
+
+def bench_corpus(kb_path, labels_path, args, tmp):
+    ks = [int(k) for k in args.ks.split(",")]
+    report = {}
+    for engine, info in build_indexes(kb_path, tmp, args.engines.split(",")).items():
+        path = info.pop("path")
+        report[engine] = {**info, **run_worker(engine, path, labels_path, ks)}
+        print(json.dumps({engine: report[engine]}, ensure_ascii=False), file=sys.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检索基准与质量评测（合成 HR 政策语料）")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="合成语料文档数，逗号分隔")
+    parser.add_argument("--ks", default="1,3,10", help="测量的 k，逗号分隔")
+    parser.add_argument("--queries", type=int, default=200, help="每个规模的标注查询数")
+    parser.add_argument("--vocab", type=int, default=20000, help="合成短语词表大小")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", default=",".join(ENGINES), help="检索后端，逗号分隔")
+    parser.add_argument("--kb", help="使用已有语料（hr_kb.json 格式）代替合成语料，需同时给出 --labels")
+    parser.add_argument("--labels", help="标注查询 JSONL：{\"query\", \"relevant\": [doc_id]}")
+    parser.add_argument("--out", help="结果 JSON 输出路径（默认打印到标准输出）")
+    parser.add_argument("--worker", choices=ENGINES, help=argparse.SUPPRESS)
+    parser.add_argument("--index", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.index, args.labels, [int(k) for k in args.ks.split(",")])))
+        return
+
+    results = {"ks": [int(k) for k in args.ks.split(",")], "runs": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.kb:
+            if not args.labels:
+                parser.error("--kb 需要同时给出 --labels")
+            run = {"kb": args.kb, "labels": args.labels}
+            run.update(bench_corpus(args.kb, args.labels, args, tmp))
+            results["runs"].append(run)
+        else:
+            from synth_kb import generate, write
+
+            for n in (int(s) for s in args.sizes.split(",")):
+                corpus_dir = os.path.join(tmp, f"synth_{n}")
+                docs, labels = generate(n, args.vocab, args.seed, args.queries)
+                write(corpus_dir, docs, labels)
+                run = {"docs": n, "queries": len(labels)}
+                run.update(bench_corpus(os.path.join(corpus_dir, "kb.json"),
+                                        os.path.join(corpus_dir, "queries.jsonl"), args, corpus_dir))
+                results["runs"].append(run)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+对比检索后端（TF-IDF / BM25）在合成语料上的构建耗时、索引大小与查询延迟
+
+用法（在项目根目录执行）：
+    python tools/bench_retrievers.py                              # 10k / 100k / 1M 切片
+    python tools/bench_retrievers.py --sizes 10000,100000 --queries 500 --k 10
+"""
+import os, sys, json, time, argparse, tempfile, statistics
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent_platform.knowledge.index_store import write_index
+from agent_platform.knowledge.retriever import TfidfRAG
+from agent_platform.knowledge.bm25 import BM25RAG, build_bm25_index
+
+ANALYZER = {"lowercase": True, "analyzer": "word", "token_pattern": r"(?u)\b\w\w+\b",
+            "ngram_range": [1, 1], "strip_accents": None}
+CATEGORIES = ["leave", "travel", "benefits", "payroll"]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def synth_corpus(n, vocab_size, rng):
+    """Zipf 分布的词表（词频长尾，接近真实文本），切片长度 8~40 个词"""
+    words = np.array([f"w{i}" for i in range(vocab_size)])
+    p = 1.0 / np.arange(1, vocab_size + 1) ** 1.1
+    p /= p.sum()
+    lengths = rng.integers(8, 41, n)
+    tokens = words[rng.choice(vocab_size, int(lengths.sum()), p=p)]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    return [{
+        "doc_id": f"doc_{i // 5}",
+        "title": f"doc_{i // 5}",
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "applicable": "全体员工",
+        "effective_date": "2024-01-01",
+        "text": " ".join(tokens[bounds[i]:bounds[i + 1]])
+    } for i in range(n)], words, p
+
+
+def dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def build_tfidf(path, chunks):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vec = TfidfVectorizer(norm="l2", **{k: tuple(v) if k == "ngram_range" else v for k, v in ANALYZER.items()})
+    X = vec.fit_transform([c["text"] for c in chunks])
+    params = vec.get_params()
+    write_index(path, X.T.tocsr(), list(vec.get_feature_names_out()), vec.idf_,
+                {k: params[k] for k in list(ANALYZER) + ["norm", "use_idf", "smooth_idf", "sublinear_tf", "binary"]},
+                chunks)
+
+
+def run_queries(rag, queries, k):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        rag.search(q, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def bench_size(n, args, tmp):
+    rng = np.random.default_rng(args.seed)
+    chunks, words, p = synth_corpus(n, args.vocab, rng)
+    # 查询：2~5 个按同样的 Zipf 分布抽取的词
+    queries = [" ".join(words[rng.choice(len(words), int(rng.integers(2, 6)), p=p)]) for _ in range(args.queries)]
+    report = {"chunks": n}
+
+    for name, build, load in (
+        ("tfidf", build_tfidf, TfidfRAG),
+        ("bm25", lambda path, cs: build_bm25_index(path, cs, ANALYZER), BM25RAG),
+    ):
+        path = os.path.join(tmp, f"{name}_{n}")
+        start = time.perf_counter()
+        build(path, chunks)
+        build_s = time.perf_counter() - start
+        rag = load(path)
+        rag.search(queries[0], k=args.k)  # 预热
+        report[name] = {"build_s": round(build_s, 2), "index_mb": round(dir_bytes(path) / 2 ** 20, 2),
+                        **run_queries(rag, queries, args.k)}
+        if name == "bm25":
+            rag.stats = dict.fromkeys(rag.stats, 0)
+            run_queries(rag, queries, args.k)
+            report[name]["postings_touched"] = round(rag.touched_ratio(), 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检索后端对比（合成语料）")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="切片数，逗号分隔")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--vocab", type=int, default=50000, help="合成词表大小")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    reports = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(s) for s in args.sizes.split(",")):
+            reports.append(bench_size(n, args, tmp))
+            print(json.dumps(reports[-1], ensure_ascii=False), file=sys.stderr)
+    print(json.dumps(reports, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,217 @@
-import json, re, os, hashlib, joblib
+"""
+构建知识库 TF-IDF 索引（同时生成 BM25 索引，供 RETRIEVER_BACKEND=bm25 使用）
+
+用法（在项目根目录执行）：
+    python tools/build_kb_index.py                    # 全量构建
+    python tools/build_kb_index.py --incremental      # 增量构建：只重新切片新增 / 修改 / 删除的文档
+    python tools/build_kb_index.py --incremental --drift 0.2
+    python tools/build_kb_index.py --shards 4             # 按切片切成 4 个分片，检索时并行打分再合并 top-k
+    python tools/build_kb_index.py --source dumps/policies.jsonl --source docs/handbook --workers 8
+
+默认来源为 agent_platform/knowledge/hr_kb.json 与 poc/hr/kb/policy_kb.json；--source 可多次指定
+（.json 数组 / .jsonl / .txt、.md 目录），文档流式读取、多进程切片并边切边写入切片文件，
+TF-IDF 与 BM25 再从切片文件流式读取文本，不在内存中保留全部文档
+
+增量构建沿用上次的切片文件与词表 / idf，未变化文档的向量行直接复用，变化文档的切片追加为新行；
+当词表漂移（新文本里词表外的词 + 已不再出现的词，占词表的比例）超过阈值时自动退回全量重建
+"""
+import json, os, sys, argparse
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import Normalizer
 
-ROOT = os.path.dirname(os.path.dirname(__file__))
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent_platform.knowledge.index_store import write_index, read_index, read_manifest, merge_shards
+from agent_platform.knowledge.bm25 import build_bm25_index, BM25_INDEX_PATH
+from agent_platform.knowledge.retriever import build_vectorizer
+from agent_platform.knowledge.ingest import ingest, iter_docs, doc_hash, chunk_lines, ChunkFile
+
 KB_PATH = os.path.join(ROOT, "agent_platform/knowledge/hr_kb.json")
+KB_SOURCES = [KB_PATH, os.path.join(ROOT, "poc/hr/kb/policy_kb.json")]
 CHUNK_PATH = os.path.join(ROOT, "agent_platform/knowledge/kb_chunks.jsonl")
-INDEX_PATH = os.path.join(ROOT, "agent_platform/knowledge/tfidf_index.pkl")
-
-def clean(t: str) -> str:
-    return re.sub(r"\s+", " ", t).strip()
-
-def make_chunks(entry):
-    base = f"{entry['title']}。适用对象：{entry['applicable']}。生效日期：{entry['effective_date']}。{entry['content']}"
-    text = clean(base)
-    # 简单句段切片
-    parts = re.split(r"[。！？]\s*", text)
-    chunks = []
-    for i, p in enumerate(parts):
-        if not p: continue
-        chunk = {
-            "doc_id": entry["id"],
-            "title": entry["title"],
-            "category": entry["category"],
-            "applicable": entry["applicable"],
-            "effective_date": entry["effective_date"],
-            "text": p
-        }
-        chunks.append(chunk)
-    return chunks
+INDEX_PATH = os.path.join(ROOT, "agent_platform/knowledge/tfidf_index")
+# 写入 manifest 的向量化参数，检索时据此还原同样的分词与加权
+VECTORIZER_PARAMS = ["lowercase", "analyzer", "token_pattern", "ngram_range", "strip_accents",
+                     "norm", "use_idf", "smooth_idf", "sublinear_tf", "binary"]
+# 其中决定分词的参数，BM25 索引沿用
+ANALYZER_PARAMS = ["lowercase", "analyzer", "token_pattern", "ngram_range", "strip_accents"]
+DRIFT_THRESHOLD = 0.1
+
+def load_chunks(chunk_path):
+    """读取上次的切片文件，按 doc_id 分组记录各切片的 (行号, 字节偏移)（保持文件内顺序）"""
+    by_doc = {}
+    if not os.path.exists(chunk_path):
+        return by_doc, 0
+    n = offset = 0
+    with open(chunk_path, "rb") as f:
+        for line in f:
+            if line.strip():
+                by_doc.setdefault(json.loads(line)["doc_id"], []).append((n, offset))
+                n += 1
+            offset += len(line)
+    return by_doc, n
+
+def fit_full(chunks, docs, index_path, shards=1):
+    # 标准 TF-IDF，L2 归一（点积即余弦相似度）；chunks 为 ChunkFile 时文本从磁盘流式读取
+    vec = TfidfVectorizer(max_features=20000, ngram_range=(1,2), norm="l2")
+    X = vec.fit_transform(c["text"] for c in chunks)
+
+    params = vec.get_params()
+    return write_index(
+        index_path,
+        postings=X.T.tocsr(),
+        vocab=list(vec.get_feature_names_out()),
+        idf=vec.idf_,
+        vectorizer={k: params[k] for k in VECTORIZER_PARAMS},
+        chunks=chunks,
+        extra={"docs": docs, "build": {"mode": "full", "fitted_chunks": len(chunks)}},
+        shards=shards
+    )
+
+def plan_incremental(index_path, chunk_path):
+    """
+    读取上次的索引与切片文件，返回 (prev, old_chunks)；无法增量时返回 None
+    old_chunks: doc_id -> 上次的 [(切片行号, 字节偏移)]
+    """
+    if not os.path.exists(os.path.join(index_path, "manifest.json")):
+        return None
+    prev = read_index(index_path, mmap=False)
+    old_chunks, n_old = load_chunks(chunk_path)
+    # 索引早于增量构建、或切片文件与索引对不上时只能全量
+    if prev["manifest"].get("docs") is None or n_old != prev["manifest"]["n_chunks"]:
+        return None
+    prev["postings"] = merge_shards(prev["shards"])
+    return prev, old_chunks
+
+def rechunk_changed(sources, prev_docs, old_chunks, chunk_path, new_path):
+    """
+    增量切片：逐篇规范化并计算哈希，只对新增 / 修改的文档切片，未变化文档的切片行从上次的切片文件原样复制。
+    返回 (docs, rows, changed, stats)；rows 为新切片文件每行对应的上次行号（重新切片的行为 None）
+    """
+    docs, rows, changed = {}, [], set()
+    stats = {"skipped": 0, "duplicates": 0}
+    with open(chunk_path, "rb") as old, open(new_path, "wb") as out:
+        for doc in iter_docs(sources, stats):
+            doc_id = doc["id"]
+            if doc_id in docs:
+                stats["duplicates"] += 1
+                continue
+            docs[doc_id] = h = doc_hash(doc)
+            reused = old_chunks.get(doc_id) if prev_docs.get(doc_id) == h else None
+            if reused:
+                for row, offset in reused:
+                    old.seek(offset)
+                    line = old.readline()
+                    out.write(line if line.endswith(b"\n") else line + b"\n")
+                    rows.append(row)
+            else:
+                changed.add(doc_id)
+                lines, n_chunks = chunk_lines(doc)
+                out.write(lines.encode("utf-8"))
+                rows.extend([None] * n_chunks)
+    return docs, rows, changed, stats
+
+def vocab_drift(prev, vec, kept_rows, new_texts) -> float:
+    """词表漂移 = (新文本中词表外的词 + 不再出现在任何切片中的词) / 词表大小"""
+    vocab = vec.vocabulary_
+    analyze = vec.build_analyzer()
+    unseen = {t for text in new_texts for t in analyze(text) if t not in vocab}
+    present = set(prev["postings"].T.tocsr()[kept_rows].indices.tolist())
+    present.update(vocab[t] for text in new_texts for t in analyze(text) if t in vocab)
+    return (len(unseen) + len(vocab) - len(present)) / max(1, len(vocab))
+
+def build_tfidf(kb_path=KB_SOURCES, chunk_path=CHUNK_PATH, index_path=INDEX_PATH,
+                incremental=False, drift_threshold=DRIFT_THRESHOLD, shards=None, workers=None):
+    """
+    kb_path 为一个或多个知识库来源（.json / .jsonl / 文本目录，见 agent_platform/knowledge/ingest.py）；
+    shards 为 None 时：增量构建沿用上次的分片数，全量构建为 1
+    """
+    sources = [kb_path] if isinstance(kb_path, str) else list(kb_path)
+    # 先写到新文件；增量构建要从上次的切片文件复制未变化文档的切片，写完后再替换
+    new_path = f"{chunk_path}.new"
+    plan = plan_incremental(index_path, chunk_path) if incremental else None
+    if plan is None:
+        ingested = ingest(sources, new_path, workers)
+        docs = ingested["docs"]
+        report = {"mode": "full", "chunks": ingested["chunks"], "rechunked_docs": len(docs),
+                  "skipped_docs": ingested["skipped"], "duplicate_docs": ingested["duplicates"]}
+        rows = None
+    else:
+        # 未变化文档的切片与上次相同，沿用上次的切片行与向量行；只有变化文档重新切片，其切片为新行
+        prev, old_chunks = plan
+        docs, rows, changed, stats = rechunk_changed(sources, prev["manifest"]["docs"], old_chunks,
+                                                     chunk_path, new_path)
+        removed = set(prev["manifest"]["docs"]) - set(docs)
+        if shards is None:
+            shards = len(prev["shards"])
+        if not changed and not removed and shards == len(prev["shards"]):
+            os.remove(new_path)
+            return {"mode": "unchanged", "chunks": prev["manifest"]["n_chunks"],
+                    "index_id": prev["manifest"]["index_id"]}
+        report = {"mode": "incremental", "chunks": len(rows), "rechunked_docs": len(changed),
+                  "removed_docs": len(removed), "skipped_docs": stats["skipped"],
+                  "duplicate_docs": stats["duplicates"]}
+
+    os.replace(new_path, chunk_path)
+    all_chunks = ChunkFile(chunk_path)
+
+    if plan is not None:
+        vec = build_vectorizer(prev["vocab"], prev["idf"], prev["manifest"]["vectorizer"])
+        kept = [r for r in rows if r is not None]
+        new_texts = [c["text"] for c, r in zip(all_chunks, rows) if r is None]
+        drift = vocab_drift(prev, vec, kept, new_texts)
+        report["drift"] = round(drift, 4)
+        if drift <= drift_threshold:
+            # 沿用词表与 idf，只对新切片做 transform；未变化切片的行原样复用
+            old_X = prev["postings"].T.tocsr()
+            new_X = vec.transform(new_texts).astype(old_X.dtype) if new_texts else None
+            parts, j = [], 0
+            for r in rows:
+                if r is None:
+                    parts.append(new_X[j])
+                    j += 1
+                else:
+                    parts.append(old_X[r])
+            X = sp.vstack(parts, format="csr") if parts else sp.csr_matrix((0, len(prev["vocab"])), dtype=old_X.dtype)
+            build_info = dict(prev["manifest"].get("build", {}), mode="incremental", appended_chunks=len(new_texts))
+            manifest = write_index(index_path, postings=X.T.tocsr(), vocab=prev["vocab"], idf=prev["idf"],
+                                   vectorizer=prev["manifest"]["vectorizer"], chunks=all_chunks,
+                                   extra={"docs": docs, "build": build_info}, shards=shards)
+            report["shards"] = len(manifest["shards"])
+            report["index_id"] = manifest["index_id"]
+            return report
+        report["mode"] = "refit"
+
+    manifest = fit_full(all_chunks, docs, index_path, shards=shards or 1)
+    report["shards"] = len(manifest["shards"])
+    report["index_id"] = manifest["index_id"]
+    return report
+
+def build(kb_path=KB_SOURCES, chunk_path=CHUNK_PATH, index_path=INDEX_PATH,
+          incremental=False, drift_threshold=DRIFT_THRESHOLD, shards=None, bm25_path=None, workers=None):
+    """构建 TF-IDF 索引；给出 bm25_path 时再按同一份切片与分词参数全量构建 BM25 索引（BM25 构建很快，不做增量）"""
+    report = build_tfidf(kb_path, chunk_path, index_path, incremental, drift_threshold, shards, workers)
+    if bm25_path and (report["mode"] != "unchanged" or not os.path.exists(os.path.join(bm25_path, "manifest.json"))):
+        chunks = ChunkFile(chunk_path)
+        analyzer = {k: v for k, v in read_manifest(index_path)["vectorizer"].items() if k in ANALYZER_PARAMS}
+        report["bm25_index_id"] = build_bm25_index(bm25_path, chunks, analyzer)["index_id"]
+    return report
 
 def main():
-    with open(KB_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    all_chunks = []
-    for e in data:
-        all_chunks.extend(make_chunks(e))
-
-    with open(CHUNK_PATH, "w", encoding="utf-8") as f:
-        for c in all_chunks:
-            f.write(json.dumps(c, ensure_ascii=False) + "\n")
-
-    corpus = [c["text"] for c in all_chunks]
-    # 管道 标准 TF-IDF L2 归一
-    pipe = Pipeline([
-        ("tfidf", TfidfVectorizer(max_features=20000, ngram_range=(1,2))),
-        ("norm", Normalizer(copy=False))
-    ])
-    X = pipe.fit_transform(corpus)
-
-    joblib.dump({
-        "pipeline": pipe,
-        "matrix": X,
-        "meta": all_chunks
-    }, INDEX_PATH)
-
-    print(f"OK chunks={len(all_chunks)}  index={INDEX_PATH}")
+    parser = argparse.ArgumentParser(description="构建知识库 TF-IDF 索引")
+    parser.add_argument("--incremental", action="store_true", help="增量构建（沿用上次的切片与词表）")
+    parser.add_argument("--drift", type=float, default=DRIFT_THRESHOLD, help="词表漂移超过该比例时全量重建")
+    parser.add_argument("--shards", type=int, default=None, help="索引分片数（默认 1；增量构建默认沿用上次）")
+    parser.add_argument("--no-bm25", action="store_true", help="不构建 BM25 索引")
+    parser.add_argument("--source", action="append", help="知识库来源（可多次指定；默认 hr_kb.json + policy_kb.json）")
+    parser.add_argument("--workers", type=int, default=None, help="切片进程数（默认 CPU 核数）")
+    args = parser.parse_args()
+
+    report = build(args.source or KB_SOURCES, incremental=args.incremental, drift_threshold=args.drift,
+                   shards=args.shards, bm25_path=None if args.no_bm25 else BM25_INDEX_PATH, workers=args.workers)
+    print(f"OK {json.dumps(report, ensure_ascii=False)}  index={INDEX_PATH}")
 
 if __name__ == "__main__":
     main()
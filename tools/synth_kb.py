@@ -0,0 +1,107 @@
+"""
+生成合成的中文 HR 政策知识库（字段同 agent_platform/knowledge/hr_kb.json）与带标注的查询集
+
+用法（在项目根目录执行）：
+    python tools/synth_kb.py --docs 10000 --out .cache/synth_10k
+    # 生成 .cache/synth_10k/kb.json 与 .cache/synth_10k/queries.jsonl
+
+文档由“短语”组成：短语之间用逗号分隔、句子用句号分隔（与真实政策文本的分词方式一致），
+短语按 Zipf 分布抽样，因此既有大量文档共享的高频短语，也有区分度高的长尾短语；
+每条查询取自某篇文档同一句中的 2~3 个短语，该文档即标注的相关文档
+"""
+import os, json, argparse
+
+import numpy as np
+
+CATEGORIES = ["leave", "travel", "benefits", "payroll", "attendance", "contract", "expense"]
+TOPICS = {
+    "leave": ["年假", "婚假", "产假", "病假", "事假", "丧假", "调休"],
+    "travel": ["差旅", "机票", "住宿", "出差补贴", "交通"],
+    "benefits": ["福利", "餐补", "体检", "节日礼金", "补充医疗"],
+    "payroll": ["工资", "个税", "奖金", "社保", "公积金"],
+    "attendance": ["考勤", "打卡", "加班", "迟到", "远程办公"],
+    "contract": ["劳动合同", "试用期", "离职", "续签", "竞业限制"],
+    "expense": ["报销", "发票", "借款", "预算", "审批"],
+}
+APPLICABLE = ["全体员工", "正式员工", "全职员工", "试用期员工", "管理层"]
+SUFFIXES = ["政策", "制度", "规定", "管理办法", "实施细则"]
+CHARS = ("员工公司部门申请审批流程标准额度天数期间办理提交材料证明系统人事财务主管经理总监按照规定执行"
+         "发放计算工作日自然年度累计折算扣除核算补贴上限下限城市级别等级岗位职级入职满周年以上不超过"
+         "每月季度年度当地法规制度为准情况特殊说明另行通知相关附件要求时限逾期视为放弃须在之前完成")
+
+
+def phrase_vocab(size: int, rng) -> np.ndarray:
+    """随机组合 2~5 个汉字的短语词表（去重）"""
+    chars = np.array(list(CHARS))
+    seen, out = set(), []
+    while len(out) < size:
+        p = "".join(rng.choice(chars, int(rng.integers(2, 6))))
+        if p not in seen:
+            seen.add(p)
+            out.append(p)
+    return np.array(out)
+
+
+def zipf_probs(n: int, s: float = 1.05) -> np.ndarray:
+    p = 1.0 / np.arange(1, n + 1) ** s
+    return p / p.sum()
+
+
+def generate(n_docs: int, vocab_size: int = 20000, seed: int = 0, n_queries: int = 200):
+    """返回 (文档列表, 查询列表)；查询为 {"query", "relevant": [doc_id]}"""
+    rng = np.random.default_rng(seed)
+    vocab = phrase_vocab(vocab_size, rng)
+    probs = zipf_probs(vocab_size)
+    docs = []
+    for i in range(n_docs):
+        category = CATEGORIES[int(rng.integers(len(CATEGORIES)))]
+        topic = TOPICS[category][int(rng.integers(len(TOPICS[category])))]
+        sentences = []
+        for _ in range(int(rng.integers(2, 7))):
+            phrases = vocab[rng.choice(vocab_size, int(rng.integers(2, 6)), p=probs)]
+            sentences.append("，".join([topic, *phrases]) if rng.random() < 0.3 else "，".join(phrases))
+        docs.append({
+            "id": f"policy_synth_{i:07d}",
+            "title": f"{topic}{SUFFIXES[i % len(SUFFIXES)]}{i}",
+            "category": category,
+            "applicable": APPLICABLE[int(rng.integers(len(APPLICABLE)))],
+            "effective_date": f"{int(rng.integers(2021, 2026))}-{int(rng.integers(1, 13)):02d}-01",
+            "content": "。".join(sentences) + "。",
+        })
+
+    queries = []
+    for i in rng.choice(n_docs, min(n_queries, n_docs), replace=False):
+        doc = docs[int(i)]
+        # 从同一句（即同一个切片）中取短语，模拟针对某条具体规定的提问
+        sentences = doc["content"].strip("。").split("。")
+        phrases = sentences[int(rng.integers(len(sentences)))].split("，")
+        picked = rng.choice(len(phrases), min(len(phrases), int(rng.integers(2, 4))), replace=False)
+        queries.append({"query": " ".join(phrases[j] for j in sorted(picked)), "relevant": [doc["id"]]})
+    return docs, queries
+
+
+def write(out_dir: str, docs, queries):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "kb.json"), "w", encoding="utf-8") as f:
+        json.dump(docs, f, ensure_ascii=False)
+    with open(os.path.join(out_dir, "queries.jsonl"), "w", encoding="utf-8") as f:
+        for q in queries:
+            f.write(json.dumps(q, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成 HR 政策知识库与标注查询")
+    parser.add_argument("--docs", type=int, default=10000, help="文档数")
+    parser.add_argument("--vocab", type=int, default=20000, help="短语词表大小")
+    parser.add_argument("--queries", type=int, default=200, help="标注查询数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="输出目录")
+    args = parser.parse_args()
+
+    docs, queries = generate(args.docs, args.vocab, args.seed, args.queries)
+    write(args.out, docs, queries)
+    print(f"OK docs={len(docs)} queries={len(queries)} out={args.out}")
+
+
+if __name__ == "__main__":
+    main()